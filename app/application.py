@@ -1,21 +1,67 @@
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import ORJSONResponse
 
-from .db.redis import create_redis_client, get_redis
-from .routers.root import root_router
+from .core.conditional_get.middleware import ConditionalGetMiddleware
+from .core.health.probes import HealthChecks
+from .core.http.client import http_client
+from .core.idempotency.middleware import IdempotencyMiddleware
+from .core.load_shedding.middleware import LoadSheddingMiddleware
+from .core.load_shedding.monitor import lag_monitor
+from .core.log.handlers import log_pipeline
+from .core.metrics.middleware import MetricsMiddleware
+from .core.profiling.middleware import ProfilingMiddleware
+from .core.rate_limit.middleware import RateLimitMiddleware
+from .core.request_context import RequestContextMiddleware
+from .core.tracing.middleware import TracingMiddleware
+from .core.tracing.tracer import exporter as span_exporter
+from .db.redis import Redis, create_redis_client, get_redis
+from .db.settings import settings as db_settings
+from .jobs.settings import settings as job_settings
+from .jobs.worker import JobWorkerPool
+from .ref_code_manager import ReferralCodesUnavailable
+from .referral_events.events import referral_event_hub
+from .routers.metrics import metrics_router
+from .routers.root import include_lazy_routers, root_router
+from .server.warmup import warm_up
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    log_pipeline.start()
+    app.state.ready = False
+    include_lazy_routers(app)
     redis_client = create_redis_client()
-    app.dependency_overrides[get_redis] = lambda: redis_client
+
+    # Async, FastAPI runs sync dependencies in the threadpool
+    async def get_redis_client() -> Redis:
+        return redis_client
+
+    app.dependency_overrides[get_redis] = get_redis_client
+    app.state.redis = redis_client
+    app.state.health = HealthChecks(app, redis_client)
+    http_client.start()
+    referral_event_hub.start(redis_client)
+    lag_monitor.start()
+    span_exporter.start()
+    job_workers = JobWorkerPool(redis_client, job_settings.JOBS_WORKERS)
+    job_workers.start()
+    await warm_up(app, redis_client)
+    app.state.ready = True
 
     yield
 
+    app.state.ready = False
+
+    await job_workers.stop()
+    await span_exporter.stop()
+    await lag_monitor.stop()
+    await referral_event_hub.stop()
+    await http_client.aclose()
     await redis_client.aclose()
+    log_pipeline.stop()
 
 
 fastapi_app = FastAPI(
@@ -25,6 +71,23 @@ fastapi_app = FastAPI(
 )
 
 
+@fastapi_app.exception_handler(ReferralCodesUnavailable)
+async def referral_codes_unavailable(request: Request, exc: ReferralCodesUnavailable):
+    return ORJSONResponse(
+        {"detail": "Referral codes are temporarily unavailable."},
+        status_code=503,
+        headers={"Retry-After": str(int(db_settings.REDIS_BREAKER_RESET_TIMEOUT))},
+    )
+
+
+fastapi_app.add_middleware(ConditionalGetMiddleware)
+fastapi_app.add_middleware(IdempotencyMiddleware)
+fastapi_app.add_middleware(RequestContextMiddleware)
+fastapi_app.add_middleware(ProfilingMiddleware)
+fastapi_app.add_middleware(RateLimitMiddleware)
+fastapi_app.add_middleware(LoadSheddingMiddleware)
+fastapi_app.add_middleware(MetricsMiddleware)
+fastapi_app.add_middleware(TracingMiddleware)
 fastapi_app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -40,6 +103,8 @@ fastapi_app.add_middleware(
         "Set-Cookie",
     ],
     allow_credentials=True,
+    expose_headers=["X-Trace-Id"],
 )
 
 fastapi_app.include_router(root_router)
+fastapi_app.include_router(metrics_router)
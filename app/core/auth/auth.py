@@ -1,5 +1,8 @@
+import logging
 import uuid
-from typing import Annotated
+from contextlib import asynccontextmanager
+from functools import cached_property
+from typing import Annotated, Any, AsyncIterator
 
 from fastapi import Depends, Request
 from fastapi_users import BaseUserManager, FastAPIUsers, UUIDIDMixin
@@ -8,58 +11,240 @@ from fastapi_users.authentication import (
     BearerTransport,
     JWTStrategy,
 )
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi_users.password import PasswordHelper
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 
+from app.core.conditional_get.versions import UserVersions
+from app.core.request_context import get_request_context
+from app.core.single_flight import SingleFlight
+from app.core.tracing.tracer import span
 from app.db.db import get_session
 from app.db.models.oauth_account import OAuthAccount
 from app.db.models.user import User
-from app.db.redis import create_redis_client
-from app.ref_code_manager import ReferralCodeManager
+from app.db.redis import Redis, get_redis
+from app.jobs.cleanup import UserCleanup, cleanup_user
+from app.jobs.queue import JobQueue
+from app.jobs.settings import settings as job_settings
+from app.jobs.worker import CLEANUP_USER, SEND_EMAIL
+from app.leaderboard.leaderboard import Leaderboard
+from app.referral_events.events import ReferralEvents, referral_event_data
 
+from .email_cache import EmailCache
 from .settings import settings as auth_settings
 from .user_db import MySQLAlchemyUserDatabase
 
+logger = logging.getLogger(__name__)
 
-async def get_user_db(session: Annotated[AsyncSession, Depends(get_session)]):
-    yield MySQLAlchemyUserDatabase(session, User, OAuthAccount)
+user_lookups = SingleFlight("user_exists")
+
+
+class TracedPasswordHelper(PasswordHelper):
+    def verify_and_update(
+        self, plain_password: str, hashed_password: str
+    ) -> tuple[bool, str | None]:
+        with span("password.verify"):
+            return super().verify_and_update(plain_password, hashed_password)
+
+    def hash(self, password: str) -> str:
+        with span("password.hash"):
+            return super().hash(password)
+
+
+password_helper = TracedPasswordHelper()
 
 
 class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
     reset_password_token_secret = auth_settings.RESTORE_PASSWORD_SECRET
     verification_token_secret = auth_settings.VERIFICATION_SECRET
 
+    def __init__(
+        self, user_db, password_helper=password_helper, redis: Redis | None = None
+    ):
+        super().__init__(user_db, password_helper)
+        self.redis = redis
+
+    # Built on first use, most requests only authenticate the user
+
+    @cached_property
+    def job_queue(self) -> JobQueue | None:
+        return JobQueue(self.redis) if self.redis is not None else None
+
+    @cached_property
+    def email_cache(self) -> EmailCache | None:
+        return EmailCache(self.redis) if self.redis is not None else None
+
+    @cached_property
+    def leaderboard(self) -> Leaderboard | None:
+        return Leaderboard(self.redis) if self.redis is not None else None
+
+    @cached_property
+    def referral_events(self) -> ReferralEvents | None:
+        return ReferralEvents(self.redis) if self.redis is not None else None
+
+    @cached_property
+    def user_versions(self) -> UserVersions | None:
+        return UserVersions(self.redis) if self.redis is not None else None
+
+    async def get_by_email(self, user_email: str) -> User:
+        if self.email_cache is None:
+            return await super().get_by_email(user_email)
+
+        user_id = await self.email_cache.get(user_email)
+        if user_id is not None:
+            user = await self.user_db.get(user_id)
+            if user is not None and user.email.lower() == user_email.lower():
+                return user
+
+        user = await super().get_by_email(user_email)
+        await self.email_cache.set(user_email, user.id)
+        return user
+
+    async def _update(self, user: User, update_dict: dict[str, Any]) -> User:
+        old_email = user.email
+        old_referrer_id = user.referrer_id if user.is_verified else None
+        old_any_referrer_id = user.referrer_id
+        user = await super()._update(user, update_dict)
+        if self.user_versions is not None:
+            # The referrers list their referrals, so their data changes too
+            await self.user_versions.bump(
+                user.id, old_any_referrer_id, user.referrer_id
+            )
+        if self.email_cache is not None and user.email != old_email:
+            await self.email_cache.delete(old_email)
+
+        # Only verified referrals count, verification and email changes
+        # move the user on or off the leaderboard as well
+        referrer_id = user.referrer_id if user.is_verified else None
+        if self.leaderboard is not None and referrer_id != old_referrer_id:
+            try:
+                if old_referrer_id is not None:
+                    await self.leaderboard.remove_referral(old_referrer_id, user.id)
+                if referrer_id is not None:
+                    await self.leaderboard.add_referral(referrer_id, user.id)
+            except RedisError:
+                logger.exception("Failed to update the leaderboard")
+        return user
+
+    async def send_email(self, to: str, subject: str, body: str) -> None:
+        """Enqueue an email, delivery happens outside of the request."""
+        if self.job_queue is None:
+            return
+        try:
+            await self.job_queue.enqueue(
+                SEND_EMAIL, {"to": to, "subject": subject, "body": body}
+            )
+        except RedisError:
+            logger.exception("Failed to enqueue email", extra={"subject": subject})
+
+    async def exists(self, user_id: uuid.UUID) -> bool:
+        """Check the user exists, sharing the query with concurrent checks.
+
+        The shared query runs on a session of its own, the request starting it
+        may be cancelled and close its session while others still wait.
+        """
+        bind = self.user_db.session.bind
+        return await user_lookups.do(user_id, lambda: user_exists(bind, user_id))
+
     async def get_referrals(self, user_id: uuid.UUID) -> list[User]:
         return await self.user_db.get_referrals(user_id)
 
+    async def on_after_register(
+        self, user: User, request: Request | None = None
+    ) -> None:
+        if self.user_versions is not None:
+            await self.user_versions.bump(user.referrer_id)
+        await self.send_email(
+            user.email, "Welcome", "Your account has been registered."
+        )
+
     async def on_after_request_verify(
         self, user: User, token: str, request: Request | None = None
     ) -> None:
-        print(f"User {user.id} requested verification. Token: {token}.")
+        logger.info("User requested verification", extra={"verify_user_id": user.id})
+        await self.send_email(
+            user.email, "Verify your email", f"Your verification token: {token}"
+        )
 
-    async def on_before_delete(
-        self, user: User, request: Request | None = None
+    async def on_after_verify(self, user: User, request: Request | None = None) -> None:
+        if self.referral_events is not None and user.referrer_id is not None:
+            await self.referral_events.publish(
+                user.referrer_id, "verified", referral_event_data(user)
+            )
+
+    async def on_after_forgot_password(
+        self, user: User, token: str, request: Request | None = None
     ) -> None:
-        new_redis = create_redis_client()
-        await ReferralCodeManager(new_redis).delete(user.id)
-        await new_redis.aclose()
+        await self.send_email(
+            user.email, "Reset your password", f"Your password reset token: {token}"
+        )
+
+    async def delete(self, user: User, request: Request | None = None) -> None:
+        """Delete the user and clean up everything referencing it.
+
+        Users with many referrals are deactivated right away and removed by
+        a background cleanup job, which detaches the referrals in batches.
+        """
+        await self.on_before_delete(user, request)
+        max_referrals = job_settings.USER_CLEANUP_INLINE_MAX_REFERRALS
+        referrals = await self.user_db.count_referrals(user.id, max_referrals + 1)
+        if referrals <= max_referrals:
+            await cleanup_user(UserCleanup(user.id, self.user_db.session, self.redis))
+        else:
+            await self.user_db.update(user, {"is_active": False})
+            await self.job_queue.enqueue(CLEANUP_USER, {"user_id": str(user.id)})
+        await self.on_after_delete(user, request)
+
+
+@asynccontextmanager
+async def own_user_db(bind: AsyncEngine) -> AsyncIterator[MySQLAlchemyUserDatabase]:
+    """User database on a short-lived session, for work shared between requests."""
+    async with AsyncSession(bind) as session:
+        yield MySQLAlchemyUserDatabase(session, User, OAuthAccount)
+
+
+async def user_exists(bind: AsyncEngine, user_id: uuid.UUID) -> bool:
+    async with own_user_db(bind) as user_db:
+        return await user_db.exists(user_id)
 
 
 async def get_user_manager(
-    user_db: Annotated[MySQLAlchemyUserDatabase, Depends(get_user_db)]
-):
-    yield UserManager(user_db)
+    session: Annotated[AsyncSession, Depends(get_session)],
+    redis: Annotated[Redis, Depends(get_redis)],
+) -> UserManager:
+    # Every level of dependencies costs a resolution on each request, so the
+    # user database is built here rather than by a dependency of its own
+    user_db = MySQLAlchemyUserDatabase(session, User, OAuthAccount)
+    return UserManager(user_db, password_helper, redis)
+
+
+class ContextJWTStrategy(JWTStrategy):
+    """JWT strategy exposing the authenticated user to the request context."""
+
+    async def read_token(self, token: str | None, user_manager) -> User | None:
+        user = await super().read_token(token, user_manager)
+        request_context = get_request_context()
+        if user is not None and request_context is not None:
+            request_context.user_id = user.id
+        return user
+
+
+# The strategies only hold settings, so every request shares them. The
+# dependencies are async to be resolved without a threadpool round trip.
+access_strategy = ContextJWTStrategy(
+    auth_settings.ACCESS_SECRET, lifetime_seconds=auth_settings.ACCESS_LIFETIME
+)
+refresh_strategy = ContextJWTStrategy(
+    auth_settings.REFRESH_SECRET, lifetime_seconds=auth_settings.REFRESH_LIFETIME
+)
 
 
-def get_jwt_strategy() -> JWTStrategy:
-    return JWTStrategy(
-        auth_settings.ACCESS_SECRET, lifetime_seconds=auth_settings.ACCESS_LIFETIME
-    )
+async def get_jwt_strategy() -> JWTStrategy:
+    return access_strategy
 
 
-def get_jwt_refresh_strategy() -> JWTStrategy:
-    return JWTStrategy(
-        auth_settings.REFRESH_SECRET, lifetime_seconds=auth_settings.REFRESH_LIFETIME
-    )
+async def get_jwt_refresh_strategy() -> JWTStrategy:
+    return refresh_strategy
 
 
 bearer_transport = BearerTransport(tokenUrl="/api/v1/auth/login")
@@ -71,3 +256,4 @@ auth_backend = AuthenticationBackend(
 fastapi_users_app = FastAPIUsers[User, uuid.UUID](get_user_manager, [auth_backend])
 
 current_verified_user = fastapi_users_app.current_user(active=True, verified=True)
+current_superuser = fastapi_users_app.current_user(active=True, superuser=True)
@@ -10,7 +10,19 @@ from fastapi_users.openapi import OpenAPIResponseType
 from fastapi_users.router.common import ErrorCode, ErrorModel
 from fastapi_users.types import DependencyCallable
 
-from app.ref_code_manager import ReferralCodeManager, get_ref_code_manager
+from app.core.tracing.tracer import span
+from app.jobs.pending_referrals import pending_referrals
+from app.ref_code_manager import (
+    ReferralCodeManager,
+    ReferralCodesUnavailable,
+    get_ref_code_manager,
+)
+from app.referral_events.events import (
+    ReferralEvents,
+    get_referral_events,
+    referral_event_data,
+)
+from app.referral_stats.stats import ReferralStats, get_referral_stats
 
 from .settings import settings as auth_settings
 
@@ -177,34 +189,55 @@ def get_register_router(
     async def register(
         request: Request,
         ref_code_manager: Annotated[ReferralCodeManager, Depends(get_ref_code_manager)],
+        referral_stats: Annotated[ReferralStats, Depends(get_referral_stats)],
+        referral_events: Annotated[ReferralEvents, Depends(get_referral_events)],
         user_manager: Annotated[
             BaseUserManager[models.UP, models.ID], Depends(get_user_manager)
         ],
         user_create: user_create_schema,  # type: ignore
         referral_code: Annotated[str | None, Body()] = None,
     ):
+        referrer_id = None
+        created_user = None
+        deferred = False
         try:
             if referral_code is not None:
                 referrer_doesnt_exist = HTTPException(
                     status_code=400,
                     detail="User with this referral code doesn't exist.",
                 )
-                referrer_id = await ref_code_manager.retieve_user_id_by_code(
-                    referral_code
-                )
-                if referrer_id is None:
-                    raise referrer_doesnt_exist
                 try:
-                    referrer = await user_manager.get(referrer_id)
-                except exceptions.UserNotExists:
-                    raise referrer_doesnt_exist
+                    with span("referral_code.resolve"):
+                        referrer_id = await ref_code_manager.retieve_user_id_by_code(
+                            referral_code
+                        )
+                except ReferralCodesUnavailable:
+                    # Register without the referral now and attach it once
+                    # codes can be resolved again
+                    deferred = True
+                else:
+                    if referrer_id is None:
+                        raise referrer_doesnt_exist
+                    with span("referrer.exists"):
+                        if not await user_manager.exists(referrer_id):
+                            raise referrer_doesnt_exist
 
-            created_user = await user_manager.create(
-                user_create, safe=True, request=request
-            )
-            if referral_code is not None:
-                created_user = await user_manager._update(
-                    created_user, {"referrer_id": referrer.id}
+            with span("user.create"):
+                created_user = await user_manager.create(
+                    user_create, safe=True, request=request
+                )
+            if deferred:
+                await user_manager.user_db.add_pending_referral(
+                    created_user.id, referral_code
+                )
+                pending_referrals.labels("queued").inc()
+            elif referral_code is not None:
+                with span("user.set_referrer"):
+                    created_user = await user_manager._update(
+                        created_user, {"referrer_id": referrer_id}
+                    )
+                await referral_events.publish(
+                    referrer_id, "signup", referral_event_data(created_user)
                 )
         except exceptions.UserAlreadyExists:
             raise HTTPException(
@@ -219,6 +252,14 @@ def get_register_router(
                     "reason": e.reason,
                 },
             )
+        finally:
+            if referrer_id is not None:
+                await referral_stats.record(
+                    referral_code,
+                    referrer_id,
+                    request.client.host if request.client else "unknown",
+                    converted=created_user is not None,
+                )
 
         return schemas.model_validate(user_schema, created_user)
 
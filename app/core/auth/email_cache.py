@@ -0,0 +1,57 @@
+import logging
+import uuid
+
+from redis.exceptions import RedisError
+
+from app.core.metrics.registry import Counter
+from app.db.redis import Redis
+
+from .settings import settings as auth_settings
+
+logger = logging.getLogger(__name__)
+
+email_cache_lookups = Counter(
+    "email_cache_lookups_total", "Email to user id cache lookups.", ["result"]
+)
+
+
+class EmailCache:
+    """Caches user ids by lowercased email.
+
+    Entries are hints only: callers load the user by id and have to check the
+    email still matches. Redis failures are logged and treated as misses.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        prefix: str = auth_settings.REDIS_EMAIL_TO_UID_PREFIX,
+        ttl: int = auth_settings.EMAIL_CACHE_TTL,
+    ):
+        self.redis = redis
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def key(self, email: str) -> str:
+        return f"{self.prefix}{email.lower()}"
+
+    async def get(self, email: str) -> uuid.UUID | None:
+        try:
+            user_id = await self.redis.get(self.key(email))
+        except RedisError:
+            logger.warning("Email cache is unavailable", exc_info=True)
+            user_id = None
+        email_cache_lookups.labels("hit" if user_id else "miss").inc()
+        return uuid.UUID(user_id) if user_id else None
+
+    async def set(self, email: str, user_id: uuid.UUID) -> None:
+        try:
+            await self.redis.set(self.key(email), str(user_id), ex=self.ttl)
+        except RedisError:
+            logger.warning("Email cache is unavailable", exc_info=True)
+
+    async def delete(self, email: str) -> None:
+        try:
+            await self.redis.delete(self.key(email))
+        except RedisError:
+            logger.warning("Email cache is unavailable", exc_info=True)
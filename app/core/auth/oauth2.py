@@ -1,12 +1,110 @@
-from httpx_oauth.clients.github import GitHubOAuth2
-from httpx_oauth.clients.google import GoogleOAuth2
+import time
+from contextlib import contextmanager
+from functools import cache
+from typing import Any, AsyncContextManager, Iterator, cast
+
+import httpx
+from httpx_oauth.clients import github, google
+from httpx_oauth.exceptions import GetIdEmailError
+
+from app.core.http.client import http_client
+from app.core.metrics.registry import Counter, Histogram
+from app.core.tracing.tracer import span
 
 from .settings import settings as auth_settins
 
-google_oauth_client = GoogleOAuth2(
-    auth_settins.OAUTH_GOOGLE_CLIENT_ID, auth_settins.OAUTH_GOOGLE_CLIENT_SECRET
+oauth_request_duration = Histogram(
+    "oauth_request_duration_seconds",
+    "OAuth provider request latency.",
+    ["provider", "operation"],
 )
-
-github_oauth_client = GitHubOAuth2(
-    auth_settins.OAUTH_GITHUB_CLIENT_ID, auth_settins.OAUTH_GITHUB_CLIENT_SECRET
+oauth_request_errors = Counter(
+    "oauth_request_errors_total",
+    "Failed OAuth provider requests.",
+    ["provider", "operation"],
 )
+
+
+class SharedClientOAuth2Mixin:
+    """Sends provider requests through the shared HTTP client and times them."""
+
+    name: str
+
+    def get_httpx_client(self) -> AsyncContextManager[httpx.AsyncClient]:
+        return http_client.borrow()
+
+    @contextmanager
+    def observe(self, operation: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            with span(f"oauth {operation}", **{"oauth.provider": self.name}):
+                yield
+        except Exception:
+            oauth_request_errors.labels(self.name, operation).inc()
+            raise
+        finally:
+            oauth_request_duration.labels(self.name, operation).observe(
+                time.perf_counter() - started
+            )
+
+    async def get_access_token(self, *args, **kwargs):
+        with self.observe("access_token"):
+            return await super().get_access_token(*args, **kwargs)
+
+    async def refresh_token(self, *args, **kwargs):
+        with self.observe("refresh_token"):
+            return await super().refresh_token(*args, **kwargs)
+
+    async def revoke_token(self, *args, **kwargs):
+        with self.observe("revoke_token"):
+            return await super().revoke_token(*args, **kwargs)
+
+    async def get_id_email(self, token: str) -> tuple[str, str | None]:
+        with self.observe("profile"):
+            return await super().get_id_email(token)
+
+
+class GoogleOAuth2(SharedClientOAuth2Mixin, google.GoogleOAuth2):
+    pass
+
+
+class GitHubOAuth2(SharedClientOAuth2Mixin, github.GitHubOAuth2):
+    async def get_id_email(self, token: str) -> tuple[str, str | None]:
+        # The upstream implementation opens its own client to set the headers
+        headers = {**self.request_headers, "Authorization": f"token {token}"}
+        with self.observe("profile"):
+            async with self.get_httpx_client() as client:
+                response = await client.get(github.PROFILE_ENDPOINT, headers=headers)
+                if response.status_code >= 400:
+                    raise GetIdEmailError(response=response)
+
+                data = cast(dict[str, Any], response.json())
+                email = data.get("email")
+
+                # No public email, make a separate call to /user/emails
+                if email is None:
+                    response = await client.get(github.EMAILS_ENDPOINT, headers=headers)
+                    if response.status_code >= 400:
+                        raise GetIdEmailError(response=response)
+
+                    emails = cast(list[dict[str, Any]], response.json())
+                    email = next(
+                        (e["email"] for e in emails if e.get("primary")),
+                        emails[0]["email"],
+                    )
+
+            return str(data["id"]), email
+
+
+@cache
+def get_google_oauth_client() -> GoogleOAuth2:
+    return GoogleOAuth2(
+        auth_settins.OAUTH_GOOGLE_CLIENT_ID, auth_settins.OAUTH_GOOGLE_CLIENT_SECRET
+    )
+
+
+@cache
+def get_github_oauth_client() -> GitHubOAuth2:
+    return GitHubOAuth2(
+        auth_settins.OAUTH_GITHUB_CLIENT_ID, auth_settins.OAUTH_GITHUB_CLIENT_SECRET
+    )
@@ -11,6 +11,13 @@ class AuthSettings(BaseSettings):
     REFRESH_LIFETIME: int = 2592000
     REDIS_UID_TO_REF_CODE_RPEFIX: str
     REDIS_REF_CODE_TO_UID_RPEFIX: str
+    # Recently read referral codes are kept in process and served while
+    # Redis is unavailable
+    REFERRAL_CODE_LOCAL_CACHE_SIZE: int = 10_000
+    REFERRAL_CODE_LOCAL_CACHE_TTL: int = 300
+    REDIS_EMAIL_TO_UID_PREFIX: str = "email_to_uid:"
+    # Entries expire so the cache stays bounded by recently active users
+    EMAIL_CACHE_TTL: int = 3600
 
     OAUTH_GOOGLE_CLIENT_ID: str
     OAUTH_GOOGLE_CLIENT_SECRET: str
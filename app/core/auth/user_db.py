@@ -2,7 +2,9 @@ import uuid
 
 from fastapi_users.db import SQLAlchemyUserDatabase
 from fastapi_users.models import UP
-from sqlalchemy import and_, select
+from sqlalchemy import and_, func, select
+
+from app.db.models.pending_referral import PendingReferral
 
 
 class MySQLAlchemyUserDatabase(SQLAlchemyUserDatabase):
@@ -14,3 +16,45 @@ class MySQLAlchemyUserDatabase(SQLAlchemyUserDatabase):
             )
         )
         return (await self.session.scalars(stmt)).unique().all()
+
+    async def get_many(self, user_ids: list[uuid.UUID]) -> list[UP]:
+        stmt = select(self.user_table).where(self.user_table.id.in_(user_ids))
+        return (await self.session.scalars(stmt)).unique().all()
+
+    async def exists(self, user_id: uuid.UUID) -> bool:
+        stmt = select(self.user_table.id).where(self.user_table.id == user_id)
+        return await self.session.scalar(stmt) is not None
+
+    async def add_pending_referral(self, user_id: uuid.UUID, referral_code: str):
+        self.session.add(PendingReferral(user_id=user_id, referral_code=referral_code))
+        await self.session.commit()
+
+    async def count_referrals(
+        self, user_id: uuid.UUID, limit: int | None = None
+    ) -> int:
+        """Count referrals of the user, stopping at ``limit`` if given."""
+        referrals = (
+            select(self.user_table.id)
+            .where(self.user_table.referrer_id == user_id)
+            .limit(limit)
+            .subquery()
+        )
+        return await self.session.scalar(select(func.count()).select_from(referrals))
+
+    async def get_by_oauth_account(self, oauth: str, account_id: str) -> UP | None:
+        """Resolve the user through the unique (oauth_name, account_id) index.
+
+        Upstream joins ``oauth_account`` to filter on top of the joined eager
+        load of ``oauth_accounts``. Selecting the user by primary key lets the
+        database resolve the account with a single index lookup first.
+        """
+        user_id = (
+            select(self.oauth_account_table.user_id)
+            .where(
+                self.oauth_account_table.oauth_name == oauth,
+                self.oauth_account_table.account_id == account_id,
+            )
+            .scalar_subquery()
+        )
+        stmt = select(self.user_table).where(self.user_table.id == user_id)
+        return await self._get_user(stmt)
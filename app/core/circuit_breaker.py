@@ -0,0 +1,100 @@
+import asyncio
+import time
+from enum import IntEnum
+from typing import Awaitable, Callable, TypeVar
+
+from redis.exceptions import RedisError
+
+from app.core.metrics.registry import Counter, Gauge
+
+T = TypeVar("T")
+
+circuit_breaker_state = Gauge(
+    "circuit_breaker_state",
+    "Circuit breaker state: 0 closed, 1 open, 2 half open.",
+    ["name"],
+)
+circuit_breaker_rejections = Counter(
+    "circuit_breaker_rejections_total",
+    "Calls rejected by open circuit breakers.",
+    ["name"],
+)
+
+# Breakers by name, for health reports
+breakers: dict[str, "CircuitBreaker"] = {}
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class State(IntEnum):
+    CLOSED = 0
+    OPEN = 1
+    HALF_OPEN = 2
+
+
+class CircuitBreaker:
+    """Fails calls fast while a dependency keeps failing.
+
+    The breaker opens after ``failure_threshold`` consecutive failures or
+    timeouts. Once ``reset_timeout`` seconds pass it lets a single probe
+    call through: success closes it again, failure keeps it open.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 10.0,
+        call_timeout: float | None = None,
+        errors: tuple[type[BaseException], ...] = (RedisError, OSError),
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.call_timeout = call_timeout
+        self.errors = errors
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+        circuit_breaker_state.labels(name).set_function(lambda: self.state)
+        breakers[name] = self
+
+    @property
+    def state(self) -> State:
+        if self.opened_at is None:
+            return State.CLOSED
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return State.OPEN
+        return State.HALF_OPEN
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        state = self.state
+        if state == State.OPEN or (state == State.HALF_OPEN and self._probing):
+            circuit_breaker_rejections.labels(self.name).inc()
+            raise CircuitOpenError(f"Circuit {self.name!r} is open")
+
+        probe = state == State.HALF_OPEN
+        self._probing = probe
+        try:
+            # Timeouts raise TimeoutError, which is an OSError
+            async with asyncio.timeout(self.call_timeout):
+                result = await fn()
+        except self.errors:
+            self.record_failure()
+            raise
+        finally:
+            if probe:
+                self._probing = False
+        self.record_success()
+        return result
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
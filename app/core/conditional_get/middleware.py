@@ -0,0 +1,113 @@
+import hashlib
+import time
+
+import jwt
+from fastapi import Response
+from fastapi_users.jwt import decode_jwt
+from redis.exceptions import RedisError
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.auth.auth import access_strategy
+from app.core.metrics.registry import Counter
+
+from .settings import ConditionalGetSettings
+from .settings import settings as conditional_get_settings
+from .versions import UserVersions
+
+conditional_get_responses = Counter(
+    "conditional_get_responses_total",
+    "Responses of endpoints with ETags.",
+    ["result"],
+)
+
+
+def read_user_id(token: str) -> str | None:
+    """User id of a valid access token, without loading the user."""
+    try:
+        data = decode_jwt(
+            token,
+            access_strategy.decode_key,
+            access_strategy.token_audience,
+            algorithms=[access_strategy.algorithm],
+        )
+    except jwt.PyJWTError:
+        return None
+    return data.get("sub")
+
+
+def if_none_match(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    return etag in (tag.strip() for tag in header.split(","))
+
+
+class ConditionalGetMiddleware:
+    """Answer GETs of per user endpoints with 304 when the client is current.
+
+    ETags are derived from the user's version stamp in Redis, so a matching
+    ``If-None-Match`` is answered after a token decode and a single Redis
+    read, before any route dependency runs. Redis failures disable ETags.
+    """
+
+    def __init__(
+        self, app: ASGIApp, settings: ConditionalGetSettings = conditional_get_settings
+    ):
+        self.app = app
+        self.settings = settings
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ("GET", "HEAD")
+            or not self.settings.CONDITIONAL_GET_ENABLED
+            or scope["path"] not in self.settings.CONDITIONAL_GET_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        etag = await self.get_etag(scope)
+        if etag is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {
+            "ETag": etag,
+            "Cache-Control": self.settings.CONDITIONAL_GET_CACHE_CONTROL,
+        }
+        if if_none_match(Headers(scope=scope).get("if-none-match", ""), etag):
+            conditional_get_responses.labels("not_modified").inc()
+            await Response(status_code=304, headers=headers)(scope, receive, send)
+            return
+
+        conditional_get_responses.labels("modified").inc()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                MutableHeaders(scope=message).update(headers)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def get_etag(self, scope: Scope) -> str | None:
+        scheme, _, token = Headers(scope=scope).get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+        user_id = read_user_id(token)
+        if user_id is None:
+            return None
+
+        try:
+            version = await UserVersions(scope["app"].state.redis, self.settings).get(
+                user_id
+            )
+        except (RedisError, OSError):
+            return None
+
+        path = scope["path"]
+        granularity = self.settings.CONDITIONAL_GET_PATHS[path]
+        time_bucket = int(time.time() // granularity) if granularity else 0
+        digest = hashlib.blake2b(
+            f"{user_id}:{version}:{path}:{time_bucket}".encode(), digest_size=12
+        ).hexdigest()
+        return f'W/"{digest}"'
@@ -0,0 +1,20 @@
+from pydantic_settings import BaseSettings
+
+
+class ConditionalGetSettings(BaseSettings):
+    """ETag and conditional GET settings"""
+
+    CONDITIONAL_GET_ENABLED: bool = True
+    CONDITIONAL_GET_REDIS_PREFIX: str = "user_version:"
+    CONDITIONAL_GET_VERSION_TTL: int = 30 * 24 * 3600
+    # Per user GET endpoints with ETags. Bodies depending on the current time
+    # get a new ETag every that many seconds, 0 for bodies that don't
+    CONDITIONAL_GET_PATHS: dict[str, int] = {
+        "/api/v1/users/me": 0,
+        "/api/v1/users/me/referrals": 0,
+        "/api/v1/users/me/referral_code": 30,
+    }
+    CONDITIONAL_GET_CACHE_CONTROL: str = "private, no-cache"
+
+
+settings = ConditionalGetSettings()
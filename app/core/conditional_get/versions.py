@@ -0,0 +1,58 @@
+import logging
+import time
+import uuid
+
+from redis.exceptions import RedisError
+
+from app.db.redis import Redis
+
+from .settings import ConditionalGetSettings
+from .settings import settings as conditional_get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class UserVersions:
+    """Per user version stamps, bumped whenever the user's data changes.
+
+    Changes cover the user itself, its referral code and its referrals.
+    Versions start from the current time, so a version lost with its key
+    is never reused.
+    """
+
+    def __init__(
+        self, redis: Redis, settings: ConditionalGetSettings = conditional_get_settings
+    ):
+        self.redis = redis
+        self.settings = settings
+
+    def key(self, user_id: uuid.UUID | str) -> str:
+        return f"{self.settings.CONDITIONAL_GET_REDIS_PREFIX}{user_id}"
+
+    async def get(self, user_id: uuid.UUID | str, ttl: int | None = None) -> str:
+        """The user's version, started with a TTL of ``ttl`` seconds if missing."""
+        key = self.key(user_id)
+        version = await self.redis.get(key)
+        if version is None:
+            await self.redis.set(
+                key,
+                time.time_ns(),
+                nx=True,
+                ex=ttl or self.settings.CONDITIONAL_GET_VERSION_TTL,
+            )
+            version = await self.redis.get(key)
+        return version
+
+    async def bump(self, *user_ids: uuid.UUID | None) -> None:
+        """Invalidate ETags of the users, failures are only logged."""
+        user_ids = {user_id for user_id in user_ids if user_id is not None}
+        if not user_ids:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for user_id in user_ids:
+                    # A missing version is set from the time again on read
+                    pipe.delete(self.key(user_id))
+                await pipe.execute()
+        except RedisError:
+            logger.exception("Failed to bump user versions")
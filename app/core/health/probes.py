@@ -0,0 +1,119 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from fastapi import FastAPI
+from sqlalchemy import QueuePool, text
+
+from app.core.circuit_breaker import breakers
+from app.core.single_flight import SingleFlight
+from app.db.db import get_engine, get_session
+from app.db.redis import Redis
+
+from .settings import HealthSettings
+from .settings import settings as health_settings
+
+probe_runs = SingleFlight("health_probe")
+
+
+@dataclass(slots=True)
+class ProbeResult:
+    ok: bool
+    latency: float
+    checked_at: float
+    error: str | None = None
+
+
+class HealthProbe:
+    """Runs a dependency check at most once per ``HEALTH_PROBE_INTERVAL``."""
+
+    def __init__(
+        self,
+        name: str,
+        check: Callable[[], Awaitable[Any]],
+        settings: HealthSettings = health_settings,
+    ):
+        self.name = name
+        self.check = check
+        self.settings = settings
+        self.result: ProbeResult | None = None
+
+    async def get(self) -> ProbeResult:
+        if (
+            self.result is not None
+            and time.time() - self.result.checked_at
+            < self.settings.HEALTH_PROBE_INTERVAL
+        ):
+            return self.result
+        return await probe_runs.do(id(self), self.run)
+
+    async def run(self) -> ProbeResult:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.check(), self.settings.HEALTH_PROBE_TIMEOUT)
+        except Exception as exc:
+            error = repr(exc)
+        else:
+            error = None
+        self.result = ProbeResult(
+            error is None, time.perf_counter() - started, time.time(), error
+        )
+        return self.result
+
+
+def pool_status() -> dict[str, Any] | None:
+    pool = get_engine().pool
+    if not isinstance(pool, QueuePool):
+        # Unpooled, as with sqlite
+        return None
+    size, checked_out = pool.size(), pool.checkedout()
+    return {
+        "size": size,
+        "checked_out": checked_out,
+        "overflow": max(pool.overflow(), 0),
+        "saturation": round(checked_out / size, 3) if size else None,
+    }
+
+
+class HealthChecks:
+    def __init__(
+        self, app: FastAPI, redis: Redis, settings: HealthSettings = health_settings
+    ):
+        self.app = app
+        self.settings = settings
+        self.probes = [
+            HealthProbe("database", self.check_database, settings),
+            HealthProbe("redis", redis.ping, settings),
+        ]
+
+    async def check_database(self) -> None:
+        get_app_session = self.app.dependency_overrides.get(get_session, get_session)
+        async with asynccontextmanager(get_app_session)() as session:
+            await session.execute(text("SELECT 1"))
+
+    async def readiness(self) -> tuple[bool, dict[str, Any]]:
+        results = await asyncio.gather(*(probe.get() for probe in self.probes))
+        checks = {probe.name: result for probe, result in zip(self.probes, results)}
+        ready = getattr(self.app.state, "ready", False) and all(
+            checks[name].ok
+            for name in self.settings.HEALTH_REQUIRED_CHECKS
+            if name in checks
+        )
+        return ready, {
+            "status": "ready" if ready else "not_ready",
+            "checks": {
+                name: {
+                    "ok": result.ok,
+                    "latency": round(result.latency, 4),
+                    "age": round(time.time() - result.checked_at, 3),
+                    "error": result.error,
+                }
+                for name, result in checks.items()
+            },
+            "database_pool": pool_status(),
+            "breakers": {
+                name: breaker.state.name.lower() for name, breaker in breakers.items()
+            },
+        }
@@ -0,0 +1,15 @@
+from pydantic_settings import BaseSettings
+
+
+class HealthSettings(BaseSettings):
+    """Liveness and readiness settings"""
+
+    # Probe results are reused for this many seconds, so frequent health
+    # checks don't turn into database and Redis load
+    HEALTH_PROBE_INTERVAL: float = 2.0
+    HEALTH_PROBE_TIMEOUT: float = 1.0
+    # Readiness fails when one of these checks fails, others are reported
+    HEALTH_REQUIRED_CHECKS: list[str] = ["database"]
+
+
+settings = HealthSettings()
@@ -0,0 +1,68 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import httpx
+
+from .settings import HTTPClientSettings
+from .settings import settings as http_settings
+
+try:
+    import h2  # noqa: F401
+except ImportError:
+    HTTP2_AVAILABLE = False
+else:
+    HTTP2_AVAILABLE = True
+
+
+def create_http_client(
+    settings: HTTPClientSettings = http_settings,
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY,
+    )
+    http2 = settings.HTTP_CLIENT_HTTP2 and HTTP2_AVAILABLE
+    if transport is None:
+        transport = httpx.AsyncHTTPTransport(
+            limits=limits, http2=http2, retries=settings.HTTP_CLIENT_RETRIES
+        )
+    return httpx.AsyncClient(
+        transport=transport,
+        limits=limits,
+        http2=http2,
+        timeout=httpx.Timeout(
+            settings.HTTP_CLIENT_TIMEOUT, connect=settings.HTTP_CLIENT_CONNECT_TIMEOUT
+        ),
+    )
+
+
+class SharedHTTPClient:
+    """Application wide HTTP client keeping connections alive between requests.
+
+    Started and closed by the application lifespan. Outside of it, e.g. in
+    scripts, ``borrow`` falls back to a short lived client.
+    """
+
+    def __init__(self):
+        self.client: httpx.AsyncClient | None = None
+
+    def start(self, transport: httpx.AsyncBaseTransport | None = None) -> None:
+        self.client = create_http_client(transport=transport)
+
+    async def aclose(self) -> None:
+        client, self.client = self.client, None
+        if client is not None:
+            await client.aclose()
+
+    @asynccontextmanager
+    async def borrow(self) -> AsyncIterator[httpx.AsyncClient]:
+        if self.client is not None:
+            yield self.client
+            return
+        async with create_http_client() as client:
+            yield client
+
+
+http_client = SharedHTTPClient()
@@ -0,0 +1,18 @@
+from pydantic_settings import BaseSettings
+
+
+class HTTPClientSettings(BaseSettings):
+    """Shared outgoing HTTP client settings"""
+
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 100
+    HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_CLIENT_KEEPALIVE_EXPIRY: float = 60.0
+    HTTP_CLIENT_TIMEOUT: float = 10.0
+    HTTP_CLIENT_CONNECT_TIMEOUT: float = 3.0
+    # Retries of failed connection attempts, requests are never resent
+    HTTP_CLIENT_RETRIES: int = 2
+    # Only used when the h2 package is installed
+    HTTP_CLIENT_HTTP2: bool = True
+
+
+settings = HTTPClientSettings()
@@ -0,0 +1,216 @@
+import hashlib
+import logging
+
+from fastapi.responses import ORJSONResponse
+from redis.exceptions import RedisError
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.conditional_get.middleware import read_user_id
+from app.core.metrics.registry import Counter
+
+from .settings import IdempotencySettings
+from .settings import settings as idempotency_settings
+from .store import IN_PROGRESS, IdempotencyStore, StoredResponse
+
+logger = logging.getLogger(__name__)
+
+idempotent_requests = Counter(
+    "idempotent_requests_total", "Requests with an Idempotency-Key.", ["result"]
+)
+
+
+def request_identity(headers: Headers) -> str:
+    """The user of a valid access token, or else the raw ``Authorization``.
+
+    Clients may refresh their token between retries, which must not change
+    the scope of their keys.
+    """
+    authorization = headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        user_id = read_user_id(token)
+        if user_id is not None:
+            return f"user:{user_id}"
+    return f"authorization:{authorization}"
+
+
+class IdempotencyMiddleware:
+    """Replay responses of POSTs retried with the same ``Idempotency-Key``.
+
+    Keys are scoped by route and the authenticated user. The first request
+    runs and its response is stored, duplicates arriving meanwhile wait for
+    it and later retries get the stored response. Reusing a key with another
+    body is rejected with 422. Server errors aren't stored, and requests
+    pass through unprotected when Redis is unavailable.
+    """
+
+    def __init__(
+        self, app: ASGIApp, settings: IdempotencySettings = idempotency_settings
+    ):
+        self.app = app
+        self.settings = settings
+        self.paths = frozenset(settings.IDEMPOTENCY_PATHS)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or not self.settings.IDEMPOTENCY_ENABLED
+            or scope["path"] not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get("idempotency-key")
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not 0 < len(idempotency_key) <= self.settings.IDEMPOTENCY_MAX_KEY_LENGTH:
+            await self.error(scope, receive, send, 400, "Invalid Idempotency-Key.")
+            return
+
+        body, more_body = await self.read_body(receive)
+        replayed = False
+
+        async def replay_receive() -> Message:
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": more_body}
+            return await receive()
+
+        if more_body:
+            # Oversized bodies can't be fingerprinted, run them unprotected
+            await self.app(scope, replay_receive, send)
+            return
+
+        scope_key = hashlib.sha256(
+            "\n".join(
+                (scope["path"], request_identity(headers), idempotency_key)
+            ).encode()
+        ).hexdigest()
+        fingerprint = hashlib.blake2b(
+            headers.get("content-type", "").encode() + b"\n" + body, digest_size=16
+        ).hexdigest()
+        store = IdempotencyStore(scope["app"].state.redis, self.settings)
+
+        try:
+            while True:
+                record = await store.claim(scope_key, fingerprint)
+                if record is None:
+                    break
+                if record.fingerprint != fingerprint:
+                    idempotent_requests.labels("mismatch").inc()
+                    await self.error(
+                        scope,
+                        receive,
+                        send,
+                        422,
+                        "Idempotency-Key was used with another request.",
+                    )
+                    return
+                if record.state == IN_PROGRESS:
+                    idempotent_requests.labels("waited").inc()
+                    record = await store.wait(scope_key)
+                    if record is None:
+                        # The first request failed, try to claim the key again
+                        continue
+                    if record.state == IN_PROGRESS:
+                        await self.error(
+                            scope,
+                            receive,
+                            send,
+                            409,
+                            "A request with this Idempotency-Key is in progress.",
+                        )
+                        return
+                idempotent_requests.labels("replayed").inc()
+                await self.replay(scope, receive, send, record.response)
+                return
+        except (RedisError, OSError):
+            logger.warning("Idempotency store is unavailable", exc_info=True)
+            await self.app(scope, replay_receive, send)
+            return
+
+        idempotent_requests.labels("executed").inc()
+        await self.execute(scope, replay_receive, send, store, scope_key, fingerprint)
+
+    async def execute(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        store: IdempotencyStore,
+        scope_key: str,
+        fingerprint: str,
+    ) -> None:
+        status = 500
+        response_headers: list[tuple[str, str]] = []
+        chunks: list[bytes] = []
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, response_headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = [
+                    (name.decode("latin-1"), value.decode("latin-1"))
+                    for name, value in message.get("headers", [])
+                ]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException:
+            await self.release(store, scope_key)
+            raise
+
+        if status >= 500:
+            await self.release(store, scope_key)
+            return
+        try:
+            await store.complete(
+                scope_key,
+                fingerprint,
+                StoredResponse(status, response_headers, b"".join(chunks)),
+            )
+        except (RedisError, OSError):
+            logger.warning("Failed to store idempotent response", exc_info=True)
+
+    async def release(self, store: IdempotencyStore, scope_key: str) -> None:
+        try:
+            await store.release(scope_key)
+        except (RedisError, OSError):
+            logger.warning("Failed to release Idempotency-Key", exc_info=True)
+
+    async def read_body(self, receive: Receive) -> tuple[bytes, bool]:
+        body = b""
+        more_body = True
+        while more_body and len(body) <= self.settings.IDEMPOTENCY_MAX_BODY_SIZE:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+        return body, more_body
+
+    async def replay(
+        self, scope: Scope, receive: Receive, send: Send, stored: StoredResponse
+    ) -> None:
+        response = Response(stored.body, status_code=stored.status)
+        response.raw_headers = [
+            (name.encode("latin-1"), value.encode("latin-1"))
+            for name, value in stored.headers
+        ] + [(b"idempotent-replayed", b"true")]
+        await response(scope, receive, send)
+
+    async def error(
+        self, scope: Scope, receive: Receive, send: Send, status: int, detail: str
+    ) -> None:
+        await ORJSONResponse({"detail": detail}, status_code=status)(
+            scope, receive, send
+        )
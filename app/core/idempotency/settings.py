@@ -0,0 +1,24 @@
+from pydantic_settings import BaseSettings
+
+
+class IdempotencySettings(BaseSettings):
+    """Idempotency-Key settings"""
+
+    IDEMPOTENCY_ENABLED: bool = True
+    IDEMPOTENCY_REDIS_PREFIX: str = "idempotency:"
+    IDEMPOTENCY_PATHS: list[str] = [
+        "/api/v1/auth/register",
+        "/api/v1/users/me/referral_code",
+    ]
+    # Completed responses are replayed for this long
+    IDEMPOTENCY_TTL: int = 24 * 3600
+    # Requests still in progress after this long are presumed dead
+    IDEMPOTENCY_LOCK_TTL: int = 30
+    # How long duplicates wait for the first request to complete
+    IDEMPOTENCY_WAIT: float = 10.0
+    IDEMPOTENCY_POLL_INTERVAL: float = 0.05
+    IDEMPOTENCY_MAX_KEY_LENGTH: int = 255
+    IDEMPOTENCY_MAX_BODY_SIZE: int = 64 * 1024
+
+
+settings = IdempotencySettings()
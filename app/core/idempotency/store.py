@@ -0,0 +1,113 @@
+import asyncio
+import base64
+import time
+from dataclasses import dataclass
+
+import orjson
+
+from app.db.redis import Redis
+
+from .settings import IdempotencySettings
+from .settings import settings as idempotency_settings
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+
+@dataclass(slots=True)
+class StoredResponse:
+    status: int
+    headers: list[tuple[str, str]]
+    body: bytes
+
+
+@dataclass(slots=True)
+class Record:
+    state: str
+    fingerprint: str
+    response: StoredResponse | None = None
+
+    @classmethod
+    def loads(cls, raw: str) -> "Record":
+        data = orjson.loads(raw)
+        response = data.get("response")
+        if response is not None:
+            response = StoredResponse(
+                response["status"],
+                [tuple(header) for header in response["headers"]],
+                base64.b64decode(response["body"]),
+            )
+        return cls(data["state"], data["fingerprint"], response)
+
+    def dumps(self) -> str:
+        data = {"state": self.state, "fingerprint": self.fingerprint}
+        if self.response is not None:
+            data["response"] = {
+                "status": self.response.status,
+                "headers": self.response.headers,
+                "body": base64.b64encode(self.response.body).decode(),
+            }
+        return orjson.dumps(data).decode()
+
+
+class IdempotencyStore:
+    """Records of requests by idempotency key.
+
+    A request claims its key with an ``in_progress`` record that expires
+    after ``IDEMPOTENCY_LOCK_TTL``, and replaces it with the ``completed``
+    response. Failed requests release the key so that they can be retried.
+    """
+
+    def __init__(
+        self, redis: Redis, settings: IdempotencySettings = idempotency_settings
+    ):
+        self.redis = redis
+        self.settings = settings
+
+    def key(self, scope_key: str) -> str:
+        return f"{self.settings.IDEMPOTENCY_REDIS_PREFIX}{scope_key}"
+
+    async def claim(self, scope_key: str, fingerprint: str) -> Record | None:
+        """Claim the key, returning the existing record if already claimed."""
+        key = self.key(scope_key)
+        claimed = await self.redis.set(
+            key,
+            Record(IN_PROGRESS, fingerprint).dumps(),
+            nx=True,
+            ex=self.settings.IDEMPOTENCY_LOCK_TTL,
+        )
+        if claimed:
+            return None
+        raw = await self.redis.get(key)
+        # The record expired in between, claim again
+        return Record.loads(raw) if raw else await self.claim(scope_key, fingerprint)
+
+    async def wait(self, scope_key: str) -> Record | None:
+        """Wait for the claimed request to complete.
+
+        Returns None if it failed or released the key, and the ``in_progress``
+        record if it didn't complete in ``IDEMPOTENCY_WAIT``.
+        """
+        deadline = time.monotonic() + self.settings.IDEMPOTENCY_WAIT
+        record = None
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.settings.IDEMPOTENCY_POLL_INTERVAL)
+            raw = await self.redis.get(self.key(scope_key))
+            if raw is None:
+                return None
+            record = Record.loads(raw)
+            if record.state == COMPLETED:
+                return record
+        return record
+
+    async def complete(
+        self, scope_key: str, fingerprint: str, response: StoredResponse
+    ) -> None:
+        await self.redis.set(
+            self.key(scope_key),
+            Record(COMPLETED, fingerprint, response).dumps(),
+            ex=self.settings.IDEMPOTENCY_TTL,
+        )
+
+    async def release(self, scope_key: str) -> None:
+        await self.redis.delete(self.key(scope_key))
@@ -0,0 +1,72 @@
+import random
+
+from fastapi.responses import ORJSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.metrics.registry import Counter, Gauge
+
+from .monitor import LoopLagMonitor, lag_monitor
+from .settings import LoadSheddingSettings
+from .settings import settings as load_shedding_settings
+
+in_flight_gauge = Gauge("http_requests_in_flight", "Requests being processed.")
+shed_counter = Counter(
+    "http_requests_shed_total", "Requests rejected due to overload.", ["reason"]
+)
+
+
+class LoadSheddingMiddleware:
+    """Reject requests with 503 while the worker is overloaded.
+
+    Between ``LOAD_SHEDDING_MAX_LAG`` and twice of it requests are shed with
+    a growing probability, so throughput degrades gradually. Requests above
+    ``LOAD_SHEDDING_MAX_IN_FLIGHT`` are always shed.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        monitor: LoopLagMonitor = lag_monitor,
+        settings: LoadSheddingSettings = load_shedding_settings,
+    ):
+        self.app = app
+        self.monitor = monitor
+        self.settings = settings
+        self.in_flight = 0
+        in_flight_gauge.set_function(lambda: self.in_flight)
+
+    def shed_reason(self) -> str | None:
+        if self.in_flight >= self.settings.LOAD_SHEDDING_MAX_IN_FLIGHT:
+            return "in_flight"
+
+        max_lag = self.settings.LOAD_SHEDDING_MAX_LAG
+        if self.monitor.lag > max_lag:
+            if random.random() < (self.monitor.lag - max_lag) / max_lag:
+                return "lag"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not self.settings.LOAD_SHEDDING_ENABLED
+            or scope["path"] in self.settings.LOAD_SHEDDING_EXEMPT_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        reason = self.shed_reason()
+        if reason is not None:
+            shed_counter.labels(reason).inc()
+            response = ORJSONResponse(
+                {"detail": "Server is overloaded, try again later."},
+                status_code=503,
+                headers={"Retry-After": str(self.settings.LOAD_SHEDDING_RETRY_AFTER)},
+            )
+            await response(scope, receive, send)
+            return
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
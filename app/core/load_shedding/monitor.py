@@ -0,0 +1,51 @@
+import asyncio
+
+from app.core.metrics.registry import Histogram
+
+from .settings import settings
+
+loop_lag_histogram = Histogram(
+    "event_loop_lag_seconds",
+    "Delay of event loop wakeups relative to schedule.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.2, 0.5, 1.0, 2.5, 5.0),
+)
+
+
+class LoopLagMonitor:
+    """Samples how late the event loop wakes up a sleeping task.
+
+    A wakeup that comes ``lag`` seconds late means every other coroutine on
+    the loop was delayed by about as much.
+    """
+
+    def __init__(self, interval: float = settings.LOOP_LAG_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.lag = 0.0
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self.lag = 0.0
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            loop_lag_histogram.observe(lag)
+            # Smooth single spikes out, but react to sustained lag quickly
+            self.lag = max(lag, self.lag * 0.5)
+
+
+lag_monitor = LoopLagMonitor()
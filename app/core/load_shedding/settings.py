@@ -0,0 +1,23 @@
+from pydantic_settings import BaseSettings
+
+
+class LoadSheddingSettings(BaseSettings):
+    """Event loop lag monitoring and load shedding settings"""
+
+    LOAD_SHEDDING_ENABLED: bool = True
+    # Seconds between event loop lag samples
+    LOOP_LAG_SAMPLE_INTERVAL: float = 0.25
+    # Requests start being shed above this lag, all of them at twice of it
+    LOAD_SHEDDING_MAX_LAG: float = 0.2
+    LOAD_SHEDDING_MAX_IN_FLIGHT: int = 500
+    LOAD_SHEDDING_RETRY_AFTER: int = 1
+    # Long lived streams would otherwise hold in-flight slots
+    LOAD_SHEDDING_EXEMPT_PATHS: set[str] = {
+        "/api/health",
+        "/api/ready",
+        "/metrics",
+        "/api/v1/users/me/referrals/stream",
+    }
+
+
+settings = LoadSheddingSettings()
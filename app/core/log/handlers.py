@@ -0,0 +1,118 @@
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+import orjson
+
+from app.core.metrics.registry import Counter
+from app.core.request_context import get_request_context
+from app.core.tracing.tracer import current_span
+
+from .settings import LogSettings
+from .settings import settings as log_settings
+
+dropped_records = Counter(
+    "log_records_dropped_total", "Log records dropped because the queue was full."
+)
+
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with ``extra`` fields as top level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and value is not None:
+                data[key] = value
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        return orjson.dumps(data, default=str).decode()
+
+
+class DebugSamplingFilter(logging.Filter):
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach the current route, user and trace id to records."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        request_context = get_request_context()
+        if request_context is not None:
+            record.method = request_context.method
+            record.route = request_context.route
+            record.user_id = request_context.user_id
+        span = current_span()
+        if span is not None:
+            record.trace_id = span.trace_id
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Queue handler that drops records instead of blocking on a full queue.
+
+    Formatting is left to the listener thread, only the message is rendered
+    here so that mutable arguments can't change before it is written.
+    """
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            dropped_records.inc()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class LogPipeline:
+    """Routes records of the root logger to stdout through a writer thread."""
+
+    def __init__(self, settings: LogSettings = log_settings):
+        self.settings = settings
+        self.queue: queue.Queue = queue.Queue(settings.LOG_QUEUE_SIZE)
+
+        self.handler = DroppingQueueHandler(self.queue)
+        self.handler.addFilter(DebugSamplingFilter(settings.LOG_DEBUG_SAMPLE_RATE))
+        self.handler.addFilter(RequestContextFilter())
+
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(JsonFormatter())
+        self.listener = QueueListener(self.queue, stream_handler)
+        self._started = False
+
+    def start(self) -> None:
+        if self._started:
+            return
+        root = logging.getLogger()
+        root.addHandler(self.handler)
+        root.setLevel(self.settings.LOG_LEVEL)
+        self.listener.start()
+        self._started = True
+
+    def stop(self) -> None:
+        if not self._started:
+            return
+        logging.getLogger().removeHandler(self.handler)
+        self.listener.stop()
+        self._started = False
+
+
+log_pipeline = LogPipeline()
@@ -0,0 +1,14 @@
+from pydantic_settings import BaseSettings
+
+
+class LogSettings(BaseSettings):
+    """Logging settings"""
+
+    LOG_LEVEL: str = "INFO"
+    # Records waiting to be written, further records are dropped
+    LOG_QUEUE_SIZE: int = 10_000
+    # Share of DEBUG records that are kept
+    LOG_DEBUG_SAMPLE_RATE: float = 0.01
+
+
+settings = LogSettings()
@@ -0,0 +1,49 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .registry import Counter, Histogram
+
+http_requests = Counter(
+    "http_requests_total", "Handled HTTP requests.", ["method", "route", "status"]
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency.",
+    ["method", "route"],
+)
+
+
+class MetricsMiddleware:
+    """Count requests and record their latency per route template.
+
+    Requests that didn't match a route are grouped under ``unmatched`` to keep
+    label cardinality bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            http_requests.labels(method, route_path, status_code).inc()
+            http_request_duration.labels(method, route_path).observe(elapsed)
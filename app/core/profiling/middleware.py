@@ -0,0 +1,124 @@
+import asyncio
+import os
+import re
+import time
+from contextlib import asynccontextmanager
+
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.auth.auth import UserManager, access_strategy, password_helper
+from app.core.auth.user_db import MySQLAlchemyUserDatabase
+from app.db.db import get_session
+from app.db.models.oauth_account import OAuthAccount
+from app.db.models.user import User
+
+from .sampler import StackSampler
+from .settings import ProfilingSettings
+from .settings import settings as profiling_settings
+
+_UNSAFE_FILENAME_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+async def is_superuser(scope: Scope, token: str) -> bool:
+    """Authenticate the access token like the routes' dependencies do."""
+    get_app_session = scope["app"].dependency_overrides.get(get_session, get_session)
+    async with asynccontextmanager(get_app_session)() as session:
+        user_manager = UserManager(
+            MySQLAlchemyUserDatabase(session, User, OAuthAccount),
+            password_helper,
+            scope["app"].state.redis,
+        )
+        user = await access_strategy.read_token(token, user_manager)
+    return user is not None and user.is_active and user.is_superuser
+
+
+class ProfilingMiddleware:
+    """Profile single requests of superusers sending the ``X-Profile`` header.
+
+    ``X-Profile: 1`` saves the collapsed stacks to ``PROFILING_DIR`` and names
+    the file in the ``X-Profile-File`` response header. ``X-Profile: inline``
+    returns the collapsed stacks instead of the response body. Requests
+    without the header only pay for a header lookup.
+    """
+
+    def __init__(self, app: ASGIApp, settings: ProfilingSettings = profiling_settings):
+        self.app = app
+        self.settings = settings
+        self.header = settings.PROFILING_HEADER.lower().encode()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or not self.settings.PROFILING_ENABLED
+            or not any(name == self.header for name, _ in scope["headers"])
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        mode = headers.get(self.header.decode(), "").strip().lower()
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        if mode in ("", "0") or scheme.lower() != "bearer" or not token:
+            await self.app(scope, receive, send)
+            return
+
+        if not await is_superuser(scope, token):
+            response = ORJSONResponse(
+                {"detail": "Profiling is allowed to superusers only."},
+                status_code=403,
+            )
+            await response(scope, receive, send)
+            return
+
+        if mode == "inline":
+            await self.profile_inline(scope, receive, send)
+        else:
+            await self.profile_to_file(scope, receive, send)
+
+    async def profile_inline(self, scope: Scope, receive: Receive, send: Send) -> None:
+        status_code = 500
+
+        async def discard_response(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        sampler = StackSampler(self.settings.PROFILING_SAMPLE_INTERVAL)
+        sampler.start()
+        try:
+            await self.app(scope, receive, discard_response)
+        finally:
+            sampler.stop()
+
+        response = PlainTextResponse(
+            sampler.collapsed(), headers={"X-Profile-Status": str(status_code)}
+        )
+        await response(scope, receive, send)
+
+    async def profile_to_file(self, scope: Scope, receive: Receive, send: Send) -> None:
+        filename = _UNSAFE_FILENAME_RE.sub(
+            "_", f"{time.time_ns()}-{scope['method']}-{scope['path'].strip('/')}"
+        )
+        filename = f"{filename}.folded"
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Profile-File", filename)
+            await send(message)
+
+        sampler = StackSampler(self.settings.PROFILING_SAMPLE_INTERVAL)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            await asyncio.to_thread(
+                self.write, os.path.join(self.settings.PROFILING_DIR, filename), sampler
+            )
+
+    def write(self, path: str, sampler: StackSampler) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(sampler.collapsed())
@@ -0,0 +1,14 @@
+from pydantic_settings import BaseSettings
+
+
+class ProfilingSettings(BaseSettings):
+    """Per-request profiling settings"""
+
+    PROFILING_ENABLED: bool = True
+    PROFILING_HEADER: str = "X-Profile"
+    PROFILING_DIR: str = "profiles"
+    # Seconds between stack samples
+    PROFILING_SAMPLE_INTERVAL: float = 0.001
+
+
+settings = ProfilingSettings()
@@ -0,0 +1,130 @@
+import math
+import time
+from collections import OrderedDict
+
+from redis.asyncio import Redis
+
+# Token bucket check over several buckets at once. A request is admitted only
+# if every bucket has a token, in which case one token is taken from each.
+# ARGV: capacity and refill rate (tokens per ms) for each key, in KEYS order.
+# Returns, for each key, how many ms to wait until it has a token (0 if admitted).
+TOKEN_BUCKET_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local tokens = {}
+local waits = {}
+local admitted = true
+
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', key, 't', 'ts')
+    local t = tonumber(state[1])
+    local ts = tonumber(state[2])
+    if t == nil or ts == nil then
+        t = capacity
+        ts = now
+    end
+    t = math.min(capacity, t + math.max(0, now - ts) * rate)
+    tokens[i] = t
+    if t < 1 then
+        admitted = false
+        waits[i] = math.ceil((1 - t) / rate)
+    else
+        waits[i] = 0
+    end
+end
+
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    if admitted then
+        tokens[i] = tokens[i] - 1
+    end
+    redis.call('HSET', key, 't', tostring(tokens[i]), 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate))
+end
+
+if admitted then
+    for i = 1, #KEYS do
+        waits[i] = 0
+    end
+end
+return waits
+"""
+
+
+class Bucket:
+    __slots__ = ("key", "capacity", "rate")
+
+    def __init__(self, key: str, limit: int, period: int):
+        self.key = key
+        self.capacity = limit
+        # tokens per millisecond
+        self.rate = limit / (period * 1000)
+
+
+class LocalBlocklist:
+    """In-process memory of buckets Redis has already rejected.
+
+    Lets floods of over-limit requests be rejected without a Redis round trip
+    until the bucket is due to have a token again.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._blocked: OrderedDict[str, float] = OrderedDict()
+
+    def retry_after(self, keys: list[str]) -> float:
+        """Seconds until all given keys are unblocked, 0 if none is blocked."""
+        if not self._blocked:
+            return 0
+
+        now = time.monotonic()
+        wait = 0.0
+        for key in keys:
+            blocked_until = self._blocked.get(key)
+            if blocked_until is None:
+                continue
+            if blocked_until <= now:
+                del self._blocked[key]
+                continue
+            wait = max(wait, blocked_until - now)
+        return wait
+
+    def block(self, key: str, seconds: float) -> None:
+        self._blocked[key] = time.monotonic() + seconds
+        self._blocked.move_to_end(key)
+        while len(self._blocked) > self.max_size:
+            self._blocked.popitem(last=False)
+
+
+class RateLimiter:
+    def __init__(self, redis: Redis, local_cache_size: int = 10_000):
+        self.redis = redis
+        self.local = LocalBlocklist(local_cache_size)
+        self._script = redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def hit(self, buckets: list[Bucket]) -> int:
+        """Take a token from every bucket.
+
+        :return: 0 if the request is admitted, otherwise seconds to wait.
+        """
+        keys = [bucket.key for bucket in buckets]
+        local_wait = self.local.retry_after(keys)
+        if local_wait > 0:
+            return math.ceil(local_wait)
+
+        args = []
+        for bucket in buckets:
+            args.extend((bucket.capacity, bucket.rate))
+
+        waits = await self._script(keys=keys, args=args)
+
+        retry_after = 0
+        for key, wait_ms in zip(keys, waits):
+            wait_ms = int(wait_ms)
+            if wait_ms > 0:
+                self.local.block(key, wait_ms / 1000)
+                retry_after = max(retry_after, math.ceil(wait_ms / 1000))
+        return retry_after
@@ -0,0 +1,144 @@
+import hashlib
+from typing import Any
+
+from fastapi.responses import ORJSONResponse
+from redis.exceptions import RedisError
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .limiter import Bucket, RateLimiter
+from .settings import RateLimitRule, RateLimitSettings
+from .settings import settings as rate_limit_settings
+
+
+def _get_field(data: Any, dotted_path: str) -> Any:
+    for part in dotted_path.split("."):
+        if not hasattr(data, "get"):
+            return None
+        data = data.get(part)
+    return data
+
+
+class RateLimitMiddleware:
+    """Token bucket admission control for the routes in ``RATE_LIMIT_RULES``.
+
+    Buckets live in Redis and are checked with a single script call per
+    request. Requests to other routes pass through untouched. If Redis is
+    unavailable requests are let through rather than failing auth endpoints.
+    """
+
+    def __init__(self, app: ASGIApp, settings: RateLimitSettings = rate_limit_settings):
+        self.app = app
+        self.settings = settings
+        self.rules: dict[tuple[str, str], RateLimitRule] = {
+            (rule.method.upper(), rule.path): rule for rule in settings.RATE_LIMIT_RULES
+        }
+        self.limiter: RateLimiter | None = None
+
+    def get_limiter(self, scope: Scope) -> RateLimiter | None:
+        redis = getattr(scope["app"].state, "redis", None)
+        if redis is None:
+            return None
+        if self.limiter is None or self.limiter.redis is not redis:
+            self.limiter = RateLimiter(redis, self.settings.RATE_LIMIT_LOCAL_CACHE_SIZE)
+        return self.limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        rule = self.rules.get((scope["method"], scope["path"]))
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.get_limiter(scope)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        prefix = f"{self.settings.RATE_LIMIT_REDIS_PREFIX}{rule.method}:{rule.path}"
+        buckets = []
+
+        if rule.ip_limit is not None:
+            client = scope.get("client")
+            ip = client[0] if client else "unknown"
+            buckets.append(Bucket(f"{prefix}:ip:{ip}", rule.ip_limit, rule.period))
+
+        if rule.account_limit is not None and rule.account_field is not None:
+            receive, account = await self.read_account(scope, receive, rule)
+            if account:
+                digest = hashlib.blake2b(account.encode(), digest_size=16).hexdigest()
+                buckets.append(
+                    Bucket(
+                        f"{prefix}:account:{digest}", rule.account_limit, rule.period
+                    )
+                )
+
+        if buckets:
+            try:
+                retry_after = await limiter.hit(buckets)
+            except (RedisError, OSError):
+                retry_after = 0
+
+            if retry_after > 0:
+                response = ORJSONResponse(
+                    {"detail": "Too many requests."},
+                    status_code=429,
+                    headers={"Retry-After": str(retry_after)},
+                )
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
+
+    async def read_account(
+        self, scope: Scope, receive: Receive, rule: RateLimitRule
+    ) -> tuple[Receive, str | None]:
+        """Buffer the request body and extract the account identifier from it.
+
+        Returns a receive callable replaying the buffered body downstream.
+        """
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] != "http.request":
+                return receive, None
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if len(body) > self.settings.RATE_LIMIT_MAX_BODY_SIZE:
+                break
+
+        replayed = False
+
+        async def replay_receive() -> Message:
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": more_body}
+            return await receive()
+
+        if more_body:
+            # Oversized body: let the endpoint deal with it, limit by IP only
+            return replay_receive, None
+
+        request = Request(scope)
+        request._body = body
+        content_type = request.headers.get("content-type", "")
+        account = None
+        try:
+            if content_type.startswith("application/json"):
+                account = _get_field(await request.json(), rule.account_field)
+            elif content_type.startswith(
+                ("multipart/form-data", "application/x-www-form-urlencoded")
+            ):
+                async with request.form() as form:
+                    account = _get_field(form, rule.account_field)
+        except Exception:
+            account = None
+
+        if not isinstance(account, str):
+            return replay_receive, None
+        return replay_receive, account.strip().lower()
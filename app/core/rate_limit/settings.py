@@ -0,0 +1,57 @@
+from pydantic import BaseModel
+from pydantic_settings import BaseSettings
+
+
+class RateLimitRule(BaseModel):
+    """Token bucket limits for a single route.
+
+    ``*_limit`` requests are allowed per ``period`` seconds, with bursts up to
+    the limit. ``account_field`` is a dotted path to the account identifier
+    in the form or JSON body (e.g. ``username`` or ``user_create.email``).
+    """
+
+    method: str = "POST"
+    path: str
+    period: int = 60
+    ip_limit: int | None = None
+    account_limit: int | None = None
+    account_field: str | None = None
+
+
+class RateLimitSettings(BaseSettings):
+    """Rate limiting settings"""
+
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_REDIS_PREFIX: str = "rate_limit:"
+    RATE_LIMIT_LOCAL_CACHE_SIZE: int = 10_000
+    RATE_LIMIT_MAX_BODY_SIZE: int = 64 * 1024
+    RATE_LIMIT_RULES: list[RateLimitRule] = [
+        RateLimitRule(
+            path="/api/v1/auth/login",
+            ip_limit=20,
+            account_limit=5,
+            account_field="username",
+        ),
+        RateLimitRule(
+            path="/api/v1/auth/register",
+            ip_limit=10,
+            account_limit=3,
+            account_field="user_create.email",
+        ),
+        RateLimitRule(
+            path="/api/v1/auth/forgot-password",
+            period=300,
+            ip_limit=10,
+            account_limit=3,
+            account_field="email",
+        ),
+        RateLimitRule(
+            path="/api/v1/users/referral_code",
+            ip_limit=30,
+            account_limit=10,
+            account_field="email",
+        ),
+    ]
+
+
+settings = RateLimitSettings()
@@ -0,0 +1,48 @@
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+@dataclass(slots=True)
+class RequestContext:
+    scope: Scope
+    user_id: uuid.UUID | None = None
+
+    @property
+    def route(self) -> str:
+        """Route template once the request has been routed, the path before."""
+        route = self.scope.get("route")
+        return route.path if route is not None else self.scope["path"]
+
+    @property
+    def method(self) -> str:
+        return self.scope["method"]
+
+
+_request_context: ContextVar[RequestContext | None] = ContextVar(
+    "request_context", default=None
+)
+
+
+def get_request_context() -> RequestContext | None:
+    return _request_context.get()
+
+
+class RequestContextMiddleware:
+    """Make the current request available to code deep in the call stack."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _request_context.set(RequestContext(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_context.reset(token)
@@ -0,0 +1,168 @@
+import logging
+import time
+import uuid
+from typing import Annotated, Awaitable, Callable
+
+from fastapi import Depends
+from redis.exceptions import RedisError
+
+from app.core.conditional_get.versions import UserVersions
+from app.core.metrics.registry import Counter
+from app.core.single_flight import RedisSingleFlight, SingleFlight
+from app.db.redis import Redis, get_redis
+
+from .settings import ResponseCacheSettings
+from .settings import settings as response_cache_settings
+
+logger = logging.getLogger(__name__)
+
+response_cache_lookups = Counter(
+    "response_cache_lookups_total", "Response cache lookups.", ["name", "result"]
+)
+
+cold_refills = SingleFlight("response_cache")
+
+
+class ResponseCache:
+    """Caches serialized responses about a user.
+
+    Entries remember the user's version from ``UserVersions`` they were built
+    at, so every change bumping the version invalidates them. Outdated and
+    expired entries are rebuilt by the single request holding the rebuild
+    lock while concurrent requests keep getting the stale body. Redis
+    failures are logged and bypass the cache.
+    """
+
+    def __init__(
+        self, redis: Redis, settings: ResponseCacheSettings = response_cache_settings
+    ):
+        self.redis = redis
+        self.settings = settings
+        self.user_versions = UserVersions(redis)
+
+    def key(self, name: str, user_id: uuid.UUID) -> str:
+        return f"{self.settings.RESPONSE_CACHE_REDIS_PREFIX}{name}:{user_id}"
+
+    async def get_or_build(
+        self,
+        name: str,
+        user_id: uuid.UUID,
+        build: Callable[[], Awaitable[bytes | None]],
+    ) -> bytes | None:
+        """Cached body of ``build``, which returns None for uncacheable results."""
+        if not self.settings.RESPONSE_CACHE_ENABLED:
+            return await build()
+
+        key = self.key(name, user_id)
+        try:
+            entry = await self.read(key, user_id)
+        except RedisError:
+            logger.warning("Response cache is unavailable", exc_info=True)
+            return await build()
+
+        if entry is not None:
+            body, valid = entry
+            if valid:
+                response_cache_lookups.labels(name, "hit").inc()
+                return body
+            if not await self.lock(key):
+                response_cache_lookups.labels(name, "stale").inc()
+                return body
+            response_cache_lookups.labels(name, "refresh").inc()
+            return await self.refill(key, user_id, build)
+
+        # Cold entries have no stale body to serve, concurrent misses in this
+        # process and then across workers wait for a single refill instead
+        response_cache_lookups.labels(name, "miss").inc()
+        return await cold_refills.do(
+            key,
+            lambda: RedisSingleFlight(
+                self.redis,
+                "response_cache",
+                self.settings.RESPONSE_CACHE_LOCK_TTL,
+                self.settings.RESPONSE_CACHE_REFILL_WAIT,
+            ).do(
+                key,
+                lambda: self.refill(key, user_id, build),
+                lambda: self.read_valid(key, user_id),
+            ),
+        )
+
+    async def read(self, key: str, user_id: uuid.UUID) -> tuple[bytes, bool] | None:
+        """The cached body and whether it is fresh and up to date."""
+        raw, version = await self.redis.mget(key, self.user_versions.key(user_id))
+        if raw is None:
+            return None
+        header, _, body = raw.partition("\n")
+        built_version, _, fresh_until = header.partition(":")
+        return (
+            body.encode(),
+            built_version == version and time.time() < float(fresh_until),
+        )
+
+    async def read_valid(self, key: str, user_id: uuid.UUID) -> bytes | None:
+        entry = await self.read(key, user_id)
+        return entry[0] if entry is not None and entry[1] else None
+
+    async def refill(
+        self,
+        key: str,
+        user_id: uuid.UUID,
+        build: Callable[[], Awaitable[bytes | None]],
+    ) -> bytes | None:
+        try:
+            # Users may not exist, a version started here expires soon
+            # unless an entry is stored with it
+            version = await self.user_versions.get(
+                user_id, self.settings.RESPONSE_CACHE_LOCK_TTL
+            )
+        except RedisError:
+            logger.warning("Response cache is unavailable", exc_info=True)
+            return await build()
+        # The version is read before building, a change in between
+        # outdates the entry right away
+        body = await build()
+        if body is not None:
+            await self.store(key, user_id, version, body)
+        return body
+
+    async def lock(self, key: str) -> bool:
+        try:
+            return bool(
+                await self.redis.set(
+                    f"{key}:lock",
+                    1,
+                    nx=True,
+                    ex=self.settings.RESPONSE_CACHE_LOCK_TTL,
+                )
+            )
+        except RedisError:
+            logger.warning("Response cache is unavailable", exc_info=True)
+            return True
+
+    async def store(
+        self, key: str, user_id: uuid.UUID, version: str, body: bytes
+    ) -> None:
+        fresh_until = time.time() + self.settings.RESPONSE_CACHE_FRESH_TTL
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.set(
+                    key,
+                    f"{version}:{fresh_until}\n".encode() + body,
+                    ex=self.settings.RESPONSE_CACHE_FRESH_TTL
+                    + self.settings.RESPONSE_CACHE_STALE_TTL,
+                )
+                pipe.delete(f"{key}:lock")
+                pipe.expire(
+                    self.user_versions.key(user_id),
+                    self.user_versions.settings.CONDITIONAL_GET_VERSION_TTL,
+                )
+                await pipe.execute()
+        except RedisError:
+            logger.warning("Response cache is unavailable", exc_info=True)
+
+
+async def get_response_cache(
+    redis: Annotated[Redis, Depends(get_redis)],
+) -> ResponseCache:
+    return ResponseCache(redis)
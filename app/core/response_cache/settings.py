@@ -0,0 +1,18 @@
+from pydantic_settings import BaseSettings
+
+
+class ResponseCacheSettings(BaseSettings):
+    """Serialized response cache settings"""
+
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_REDIS_PREFIX: str = "response:"
+    # Entries are fresh for FRESH_TTL seconds and may be served stale while
+    # one request rebuilds them for STALE_TTL seconds more
+    RESPONSE_CACHE_FRESH_TTL: int = 30
+    RESPONSE_CACHE_STALE_TTL: int = 600
+    RESPONSE_CACHE_LOCK_TTL: int = 10
+    # How long concurrent misses wait for another worker's refill
+    RESPONSE_CACHE_REFILL_WAIT: float = 2.0
+
+
+settings = ResponseCacheSettings()
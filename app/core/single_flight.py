@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from redis.exceptions import RedisError
+
+from app.core.metrics.registry import Counter
+from app.db.redis import Redis
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+single_flight_calls = Counter(
+    "single_flight_calls_total",
+    "Calls through single flight groups, by whether they were coalesced.",
+    ["name", "result"],
+)
+
+# Delete the lock only if it is still held by the caller
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one in-flight call.
+
+    Callers arriving while a call is in flight await its result instead of
+    starting their own. Results are shared between requests, so they must
+    not be bound to a request's session: return ids, flags or serialized
+    data rather than ORM objects.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        future = self._calls.get(key)
+        if future is None:
+            single_flight_calls.labels(self.name, "leader").inc()
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._forget(key, future))
+        else:
+            single_flight_calls.labels(self.name, "coalesced").inc()
+        # A cancelled caller must not cancel the call of the others
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+
+
+class RedisSingleFlight:
+    """Coalesces cache refills across workers with a Redis lock.
+
+    The lock holder runs the refill while the others poll ``read`` for its
+    result. Waiters give up and refill themselves once the lock is gone or
+    ``timeout`` passes, and Redis failures make every caller refill.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        name: str,
+        lock_ttl: float = 10,
+        timeout: float = 2,
+        poll_interval: float = 0.05,
+        prefix: str = "single_flight:",
+    ):
+        self.redis = redis
+        self.name = name
+        self.lock_ttl = lock_ttl
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.prefix = prefix
+        self._release = redis.register_script(RELEASE_LOCK_SCRIPT)
+
+    def lock_key(self, key: str) -> str:
+        return f"{self.prefix}{self.name}:{key}"
+
+    async def do(
+        self,
+        key: str,
+        refill: Callable[[], Awaitable[T]],
+        read: Callable[[], Awaitable[T | None]],
+    ) -> T:
+        lock_key, token = self.lock_key(key), uuid.uuid4().hex
+        try:
+            acquired = await self.redis.set(
+                lock_key, token, nx=True, px=int(self.lock_ttl * 1000)
+            )
+        except RedisError:
+            logger.warning("Single flight lock is unavailable", exc_info=True)
+            return await refill()
+
+        if acquired:
+            single_flight_calls.labels(self.name, "leader").inc()
+            try:
+                return await refill()
+            finally:
+                try:
+                    await self._release(keys=[lock_key], args=[token])
+                except RedisError:
+                    logger.warning("Failed to release single flight lock")
+
+        deadline = time.monotonic() + self.timeout
+        try:
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.poll_interval)
+                result = await read()
+                if result is not None:
+                    single_flight_calls.labels(self.name, "coalesced").inc()
+                    return result
+                if not await self.redis.exists(lock_key):
+                    break
+        except RedisError:
+            logger.warning("Single flight lock is unavailable", exc_info=True)
+        single_flight_calls.labels(self.name, "fallback").inc()
+        return await refill()
@@ -0,0 +1,118 @@
+import asyncio
+import fcntl
+import os
+from collections import deque
+
+import httpx
+import orjson
+
+from app.core.metrics.registry import Counter
+
+from .settings import TracingSettings
+
+dropped_spans = Counter(
+    "tracing_dropped_spans_total", "Spans dropped because the export queue was full."
+)
+export_errors = Counter("tracing_export_errors_total", "Failed span export batches.")
+
+
+class SpanExporter:
+    """Buffers finished spans and writes them in batches off the event loop.
+
+    Spans are kept in a bounded in-memory queue and dropped when it is full,
+    so a slow export target never slows requests down.
+    """
+
+    def __init__(self, settings: TracingSettings):
+        self.settings = settings
+        self.queue: deque[dict] = deque()
+        self._task: asyncio.Task | None = None
+
+    def export(self, span: dict) -> None:
+        if len(self.queue) >= self.settings.TRACING_QUEUE_SIZE:
+            dropped_spans.inc()
+            return
+        self.queue.append(span)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.settings.TRACING_FLUSH_INTERVAL)
+            await self.flush()
+
+    async def flush(self) -> None:
+        while self.queue:
+            batch = []
+            while self.queue and len(batch) < self.settings.TRACING_BATCH_SIZE:
+                batch.append(self.queue.popleft())
+            try:
+                await asyncio.to_thread(self.write, batch)
+            except Exception:
+                export_errors.inc()
+
+    def write(self, spans: list[dict]) -> None:
+        if self.settings.TRACING_EXPORTER == "otlp":
+            self.write_otlp(spans)
+        else:
+            self.write_file(spans)
+
+    def write_file(self, spans: list[dict]) -> None:
+        path = self.settings.TRACING_FILE_PATH
+        # Workers share the file, the lock keeps them from rotating it at
+        # once or writing to a file that is being moved
+        with open(f"{path}.lock", "ab") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            with open(path, "ab") as file:
+                file.writelines(orjson.dumps(span) + b"\n" for span in spans)
+                size = file.tell()
+            if size >= self.settings.TRACING_FILE_MAX_BYTES:
+                self.rotate_file(path)
+
+    def rotate_file(self, path: str) -> None:
+        """Move the file to ``path.1``, shifting older backups up by one."""
+        backups = self.settings.TRACING_FILE_BACKUPS
+        if backups <= 0:
+            os.remove(path)
+            return
+        for index in range(backups - 1, 0, -1):
+            if os.path.exists(f"{path}.{index}"):
+                os.replace(f"{path}.{index}", f"{path}.{index + 1}")
+        os.replace(path, f"{path}.1")
+
+    def write_otlp(self, spans: list[dict]) -> None:
+        payload = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {
+                                    "stringValue": self.settings.TRACING_SERVICE_NAME
+                                },
+                            }
+                        ]
+                    },
+                    "scopeSpans": [{"scope": {"name": "app"}, "spans": spans}],
+                }
+            ]
+        }
+        httpx.post(
+            self.settings.TRACING_OTLP_ENDPOINT,
+            content=orjson.dumps(payload),
+            headers={"Content-Type": "application/json"},
+            timeout=5,
+        ).raise_for_status()
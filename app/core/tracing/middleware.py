@@ -0,0 +1,61 @@
+import ipaddress
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .settings import TracingSettings
+from .settings import settings as tracing_settings
+from .tracer import _current_span, start_trace
+
+
+class TracingMiddleware:
+    """Wrap every request in a root span and return its trace id in a header."""
+
+    def __init__(self, app: ASGIApp, settings: TracingSettings = tracing_settings):
+        self.app = app
+        self.settings = settings
+        self.trusted_networks = [
+            ipaddress.ip_network(network, strict=False)
+            for network in settings.TRACING_TRUSTED_NETWORKS
+        ]
+
+    def is_trusted(self, scope: Scope) -> bool:
+        client = scope.get("client")
+        if not self.trusted_networks or client is None:
+            return False
+        try:
+            address = ipaddress.ip_address(client[0])
+        except ValueError:
+            return False
+        return any(address in network for network in self.trusted_networks)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.settings.TRACING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        root = start_trace(
+            f"{scope['method']} {scope['path']}",
+            Headers(scope=scope).get("traceparent"),
+            self.is_trusted(scope),
+        )
+        token = _current_span.set(root)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append(self.settings.TRACING_HEADER, root.trace_id)
+                root.set_attribute("http.status_code", message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            root.record_exception(exc)
+            raise
+        finally:
+            route = scope.get("route")
+            if route is not None:
+                root.name = f"{scope['method']} {route.path}"
+            _current_span.reset(token)
+            root.end()
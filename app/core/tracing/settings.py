@@ -0,0 +1,30 @@
+from typing import Literal
+
+from pydantic_settings import BaseSettings
+
+
+class TracingSettings(BaseSettings):
+    """Request tracing settings"""
+
+    TRACING_ENABLED: bool = True
+    # Share of requests whose spans are recorded
+    TRACING_SAMPLE_RATE: float = 0.01
+    # Addresses or networks of services whose traceparent sampled flag is
+    # honoured. Other clients continue their trace id but are sampled at
+    # TRACING_SAMPLE_RATE, so they can't get all of their requests traced.
+    TRACING_TRUSTED_NETWORKS: list[str] = []
+    TRACING_EXPORTER: Literal["file", "otlp"] = "file"
+    TRACING_FILE_PATH: str = "traces.jsonl"
+    # The file is rotated once it reaches this size, keeping TRACING_FILE_BACKUPS
+    # older files next to it
+    TRACING_FILE_MAX_BYTES: int = 50 * 1024 * 1024
+    TRACING_FILE_BACKUPS: int = 1
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_SERVICE_NAME: str = "ref-code-server"
+    TRACING_QUEUE_SIZE: int = 10_000
+    TRACING_BATCH_SIZE: int = 512
+    TRACING_FLUSH_INTERVAL: float = 1.0
+    TRACING_HEADER: str = "X-Trace-Id"
+
+
+settings = TracingSettings()
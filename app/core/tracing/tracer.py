@@ -0,0 +1,170 @@
+import random
+import time
+from contextvars import ContextVar
+from typing import Any
+
+from .exporter import SpanExporter
+from .settings import settings
+
+_current_span: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+exporter = SpanExporter(settings)
+
+# OTLP status codes
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Span:
+    """A timed operation within a trace.
+
+    Used as a context manager it becomes the parent of spans started inside.
+    Only spans of sampled traces are exported.
+    """
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "sampled",
+        "attributes",
+        "status",
+        "start_ns",
+        "end_ns",
+        "_token",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: str | None,
+        sampled: bool,
+        attributes: dict[str, Any] | None = None,
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = attributes or {}
+        self.status = STATUS_OK
+        self.start_ns = time.time_ns()
+        self.end_ns: int | None = None
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.attributes["exception.type"] = type(exc).__name__
+
+    def end(self) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if self.sampled:
+            exporter.export(self.to_dict())
+
+    def to_dict(self) -> dict:
+        """Span in OTLP JSON encoding."""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                {"key": key, "value": {"stringValue": str(value)}}
+                for key, value in self.attributes.items()
+            ],
+            "status": {"code": self.status},
+        }
+        if self.parent_id is not None:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc is not None:
+            self.record_exception(exc)
+        _current_span.reset(self._token)
+        self.end()
+
+
+class _NoopSpan:
+    """Stands in for spans of traces that aren't sampled."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def parse_traceparent(header: str | None) -> tuple[str, str, bool] | None:
+    """Parse a W3C ``traceparent`` header into trace id, parent id and flag."""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        sampled = bool(int(parts[3], 16) & 1)
+    except ValueError:
+        return None
+    return parts[1], parts[2], sampled
+
+
+def start_trace(
+    name: str, traceparent: str | None = None, trusted: bool = False
+) -> Span:
+    """Start the root span of a request, continuing an incoming trace if any.
+
+    The sampling decision of the caller is only followed if it's ``trusted``.
+    """
+    parent = parse_traceparent(traceparent)
+    if parent is not None:
+        trace_id, parent_id, parent_sampled = parent
+    else:
+        trace_id, parent_id, parent_sampled = _new_id(128), None, False
+    if parent is not None and trusted:
+        sampled = parent_sampled
+    else:
+        sampled = random.random() < settings.TRACING_SAMPLE_RATE
+    return Span(name, trace_id, parent_id, sampled)
+
+
+def span(name: str, **attributes: Any) -> Span | _NoopSpan:
+    """Start a child of the current span, or a no-op one if not sampled."""
+    parent = _current_span.get()
+    if parent is None or not parent.sampled:
+        return NOOP_SPAN
+    return Span(name, parent.trace_id, parent.span_id, True, attributes)
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
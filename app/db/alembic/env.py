@@ -6,6 +6,8 @@ from sqlalchemy import engine_from_config, pool
 
 from app.db.models.base import Base
 from app.db.models.oauth_account import OAuthAccount
+from app.db.models.pending_referral import PendingReferral
+from app.db.models.referral_code_stats import ReferralCodeStats
 from app.db.models.user import User
 
 # this is the Alembic Config object, which provides
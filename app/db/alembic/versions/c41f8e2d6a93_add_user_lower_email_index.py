@@ -0,0 +1,30 @@
+"""Add User lower(email) index
+
+Revision ID: c41f8e2d6a93
+Revises: 7d2e4a9c5b10
+Create Date: 2026-10-19 11:26:05.117482
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c41f8e2d6a93"
+down_revision: Union[str, None] = "7d2e4a9c5b10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # fastapi-users looks users up by lower(email), which the plain
+    # ix_user_email index can't serve
+    op.create_index(
+        "ix_user_email_lower", "user", [sa.text("lower(email)")], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_email_lower", table_name="user")
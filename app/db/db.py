@@ -1,17 +1,43 @@
 from contextlib import asynccontextmanager
+from functools import cache
 from typing import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 
+from .events import instrument_engine
 from .settings import settings
+from .slow_queries import slow_query_log
 
-# Postgresql
-engine = create_async_engine(settings.DB_URL, echo=False, future=True, pool_size=50)
-async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+@cache
+def get_engine() -> AsyncEngine:
+    """The Postgresql engine, created on first use.
+
+    Importing the driver and building the engine is left out of application
+    import, processes that never touch the database don't pay for it.
+    """
+    url = make_url(settings.DB_URL)
+    # sqlite, which load tests use as a stand-in, isn't pooled
+    pool_options = {} if url.get_backend_name() == "sqlite" else {"pool_size": 50}
+    engine = create_async_engine(url, echo=False, future=True, **pool_options)
+    instrument_engine(engine.sync_engine)
+    slow_query_log.attach(engine)
+    return engine
+
+
+@cache
+def get_session_maker() -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(get_engine(), expire_on_commit=False)
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    async with async_session_maker() as session:
+    async with get_session_maker()() as session:
         try:
             yield session
         finally:
@@ -20,7 +46,7 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
 
 @asynccontextmanager
 async def session_context_manager() -> AsyncGenerator[AsyncSession, None]:
-    async with async_session_maker() as session:
+    async with get_session_maker()() as session:
         try:
             yield session
         finally:
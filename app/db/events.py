@@ -0,0 +1,75 @@
+import re
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.metrics.registry import Counter, Gauge, Histogram
+from app.core.tracing.tracer import span
+
+_TABLE_RE = re.compile(r'\b(?:FROM|INTO|UPDATE|JOIN)\s+"?(\w+)"?', re.IGNORECASE)
+_MAX_CACHED_STATEMENTS = 1024
+
+db_statement_duration = Histogram(
+    "db_statement_duration_seconds",
+    "SQL statement execution time.",
+    ["operation", "table"],
+)
+db_statement_errors = Counter(
+    "db_statement_errors_total", "Failed SQL statements.", ["operation", "table"]
+)
+db_pool_size = Gauge("db_pool_size", "Connections the pool keeps open.")
+db_pool_checked_out = Gauge("db_pool_checked_out", "Pool connections currently in use.")
+db_pool_overflow = Gauge("db_pool_overflow", "Connections opened above the pool size.")
+
+# ORM statements are compiled once and reused, so their labels are cached
+_statement_labels: dict[str, tuple[str, str]] = {}
+
+
+def statement_labels(statement: str) -> tuple[str, str]:
+    labels = _statement_labels.get(statement)
+    if labels is None:
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+        match = _TABLE_RE.search(statement)
+        labels = (operation, match.group(1) if match else "")
+        if len(_statement_labels) < _MAX_CACHED_STATEMENTS:
+            _statement_labels[statement] = labels
+    return labels
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    operation, table = statement_labels(statement)
+    context._query_span = span(
+        f"db {operation} {table}".rstrip(), **{"db.statement": statement}
+    )
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_started
+    db_statement_duration.labels(*statement_labels(statement)).observe(elapsed)
+    context._query_span.end()
+
+
+def _handle_error(exception_context):
+    statement = exception_context.statement
+    if statement:
+        db_statement_errors.labels(*statement_labels(statement)).inc()
+
+    query_span = getattr(exception_context.execution_context, "_query_span", None)
+    if query_span is not None:
+        query_span.record_exception(exception_context.original_exception)
+        query_span.end()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Record statement timings and pool usage of a (sync) engine in metrics."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+    pool = engine.pool
+    if hasattr(pool, "checkedout"):
+        db_pool_size.set_function(pool.size)
+        db_pool_checked_out.set_function(pool.checkedout)
+        db_pool_overflow.set_function(lambda: max(0, pool.overflow()))
@@ -1,8 +1,17 @@
 from fastapi_users.db import SQLAlchemyBaseOAuthAccountTableUUID
+from sqlalchemy import Index
 from sqlalchemy.orm import Mapped, relationship
 
 from .base import Base
 
 
 class OAuthAccount(SQLAlchemyBaseOAuthAccountTableUUID, Base):
-    pass
+    __table_args__ = (
+        Index(
+            "ix_oauth_account_oauth_name_account_id",
+            "oauth_name",
+            "account_id",
+            unique=True,
+        ),
+        Index("ix_oauth_account_user_id", "user_id"),
+    )
@@ -0,0 +1,22 @@
+import uuid
+from datetime import datetime
+
+from fastapi_users_db_sqlalchemy.generics import GUID
+from sqlalchemy import DateTime, ForeignKey, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class PendingReferral(Base):
+    """Referral code of a user registered while codes couldn't be resolved."""
+
+    __tablename__ = "pending_referral"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        GUID, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    referral_code: Mapped[str] = mapped_column(String(length=32))
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), index=True
+    )
@@ -0,0 +1,26 @@
+import uuid
+from datetime import datetime
+
+from fastapi_users_db_sqlalchemy.generics import GUID
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class ReferralCodeStats(Base):
+    """Hourly referral code usage, rolled up from Redis."""
+
+    __tablename__ = "referral_code_stats"
+    __table_args__ = (
+        Index("ix_referral_code_stats_referrer_id_hour", "referrer_id", "hour"),
+    )
+
+    code: Mapped[str] = mapped_column(String(length=32), primary_key=True)
+    hour: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    referrer_id: Mapped[uuid.UUID] = mapped_column(
+        GUID, ForeignKey("user.id", ondelete="CASCADE")
+    )
+    clicks: Mapped[int] = mapped_column(Integer, default=0)
+    unique_visitors: Mapped[int] = mapped_column(Integer, default=0)
+    conversions: Mapped[int] = mapped_column(Integer, default=0)
@@ -1,7 +1,7 @@
 import uuid
 
 from fastapi_users.db import SQLAlchemyBaseUserTableUUID
-from sqlalchemy import ForeignKey, String
+from sqlalchemy import ForeignKey, Index, String, text
 from sqlalchemy.orm import Mapped, backref, mapped_column, relationship
 
 from .base import Base
@@ -11,11 +11,16 @@ from .oauth_account import OAuthAccount
 class User(SQLAlchemyBaseUserTableUUID, Base):
     """User sqlalchemy model."""
 
+    __table_args__ = (Index("ix_user_email_lower", text("lower(email)"), unique=True),)
+
     name: Mapped[str] = mapped_column(String(length=128))
     surname: Mapped[str] = mapped_column(String(length=128))
 
     referrer_id: Mapped[uuid.UUID | None] = mapped_column(
-        ForeignKey("user.id", ondelete="SET NULL"), nullable=True, default=None
+        ForeignKey("user.id", ondelete="SET NULL"),
+        nullable=True,
+        default=None,
+        index=True,
     )
 
     referrals: Mapped[list["User"]] = relationship(
@@ -1,11 +1,71 @@
+import time
+
 from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+
+from app.core.metrics.registry import Counter, Histogram
+from app.core.tracing.tracer import span
 
 from .settings import settings
 
+redis_command_duration = Histogram(
+    "redis_command_duration_seconds", "Redis command latency.", ["command"]
+)
+redis_command_errors = Counter(
+    "redis_command_errors_total", "Failed Redis commands.", ["command"]
+)
+
+
+class InstrumentedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        command = "MULTI" if self.is_transaction else "PIPELINE"
+        started = time.perf_counter()
+        try:
+            with span(f"redis {command}", **{"db.redis.commands": len(self)}):
+                return await super().execute(raise_on_error)
+        except Exception:
+            redis_command_errors.labels(command).inc()
+            raise
+        finally:
+            redis_command_duration.labels(command).observe(
+                time.perf_counter() - started
+            )
+
+
+class InstrumentedRedis(Redis):
+    """Redis client timing and tracing every command and pipeline."""
+
+    async def execute_command(self, *args, **options):
+        command = str(args[0]).upper()
+        started = time.perf_counter()
+        try:
+            with span(f"redis {command}"):
+                return await super().execute_command(*args, **options)
+        except Exception:
+            redis_command_errors.labels(command).inc()
+            raise
+        finally:
+            redis_command_duration.labels(command).observe(
+                time.perf_counter() - started
+            )
+
+    def pipeline(
+        self, transaction: bool = True, shard_hint: str | None = None
+    ) -> InstrumentedPipeline:
+        return InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
 
 def get_redis() -> Redis:
     raise NotImplementedError()
 
 
 def create_redis_client() -> Redis:
-    return Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return InstrumentedRedis.from_url(
+        settings.REDIS_URL,
+        decode_responses=True,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+        health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+    )
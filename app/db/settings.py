@@ -7,6 +7,22 @@ class DBSettings(BaseSettings):
     DB_URL: str
     TESTS_DB_URL: str
     REDIS_URL: str
+    # Bound every Redis command, so a stalled server can't hang requests
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 2.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
+    # Referral code calls fail fast after this many consecutive failures,
+    # until a probe succeeds after REDIS_BREAKER_RESET_TIMEOUT seconds
+    REDIS_BREAKER_FAILURE_THRESHOLD: int = 5
+    REDIS_BREAKER_RESET_TIMEOUT: float = 10.0
+    REDIS_BREAKER_CALL_TIMEOUT: float = 0.5
+
+    # Statements slower than this many seconds are logged
+    SLOW_QUERY_THRESHOLD: float = 0.1
+    # Each statement shape is logged at most once per this many seconds
+    SLOW_QUERY_SAMPLE_INTERVAL: int = 60
+    SLOW_QUERY_LOG_SIZE: int = 200
+    SLOW_QUERY_EXPLAIN: bool = True
 
 
 settings = DBSettings()
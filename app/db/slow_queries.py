@@ -0,0 +1,142 @@
+import asyncio
+import re
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.request_context import get_request_context
+from app.core.tracing.tracer import current_span
+
+from .settings import DBSettings
+from .settings import settings as db_settings
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_PLACEHOLDER_RE = re.compile(r"\$\d+|%\(\w+\)s|%s|\?|:\w+")
+_PLACEHOLDER_LIST_RE = re.compile(r"\(\?(?:, \?)+\)")
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so that it doesn't depend on parameter counts."""
+    shape = _WHITESPACE_RE.sub(" ", statement).strip()
+    shape = _PLACEHOLDER_RE.sub("?", shape)
+    return _PLACEHOLDER_LIST_RE.sub("(?...)", shape)
+
+
+def redact(parameters: Any) -> Any:
+    """Replace parameter values with their type names."""
+    if isinstance(parameters, dict):
+        return {key: f"<{type(value).__name__}>" for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (list, tuple, dict)):
+            # executemany, all rows have the same shape
+            return [redact(parameters[0]), f"... {len(parameters)} rows"]
+        return [f"<{type(value).__name__}>" for value in parameters]
+    return None
+
+
+class SlowQueryLog:
+    """Keeps the latest statements slower than ``SLOW_QUERY_THRESHOLD``.
+
+    Every distinct statement shape is recorded at most once per
+    ``SLOW_QUERY_SAMPLE_INTERVAL``. On PostgreSQL the plan of a recorded
+    statement is captured with ``EXPLAIN`` in a background task.
+    """
+
+    def __init__(self, settings: DBSettings = db_settings):
+        self.settings = settings
+        self.entries: deque[dict] = deque(maxlen=settings.SLOW_QUERY_LOG_SIZE)
+        self._last_logged: OrderedDict[str, float] = OrderedDict()
+        self._engine: AsyncEngine | None = None
+        self._explain_tasks: set[asyncio.Task] = set()
+
+    def attach(self, engine: AsyncEngine) -> None:
+        self._engine = engine
+        event.listen(engine.sync_engine, "before_cursor_execute", self._before)
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_started = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - context._slow_query_started
+        if duration < self.settings.SLOW_QUERY_THRESHOLD:
+            return
+        if statement.lstrip()[:7].upper() == "EXPLAIN":
+            return
+        self.record(statement, parameters, duration, executemany, conn.dialect.name)
+
+    def should_sample(self, shape: str) -> bool:
+        now = time.monotonic()
+        last_logged = self._last_logged.get(shape)
+        if (
+            last_logged is not None
+            and now - last_logged < self.settings.SLOW_QUERY_SAMPLE_INTERVAL
+        ):
+            return False
+
+        self._last_logged[shape] = now
+        self._last_logged.move_to_end(shape)
+        while len(self._last_logged) > self.settings.SLOW_QUERY_LOG_SIZE * 10:
+            self._last_logged.popitem(last=False)
+        return True
+
+    def record(
+        self,
+        statement: str,
+        parameters: Any,
+        duration: float,
+        executemany: bool = False,
+        dialect: str = "postgresql",
+    ) -> dict | None:
+        shape = statement_shape(statement)
+        if not self.should_sample(shape):
+            return None
+
+        request_context = get_request_context()
+        span = current_span()
+        entry = {
+            "statement": statement,
+            "parameters": redact(parameters),
+            "duration": duration,
+            "route": request_context.route if request_context else None,
+            "trace_id": span.trace_id if span else None,
+            "recorded_at": datetime.now(timezone.utc),
+            "plan": None,
+        }
+        self.entries.append(entry)
+
+        if (
+            self.settings.SLOW_QUERY_EXPLAIN
+            and self._engine is not None
+            and dialect == "postgresql"
+            and not executemany
+            and statement.lstrip()[:6].upper().startswith(_EXPLAINABLE)
+        ):
+            try:
+                task = asyncio.get_running_loop().create_task(
+                    self.explain(entry, statement, parameters)
+                )
+            except RuntimeError:
+                return entry
+            self._explain_tasks.add(task)
+            task.add_done_callback(self._explain_tasks.discard)
+        return entry
+
+    async def explain(self, entry: dict, statement: str, parameters: Any) -> None:
+        try:
+            async with self._engine.connect() as conn:
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE off) {statement}", parameters
+                )
+                entry["plan"] = "\n".join(row[0] for row in result)
+                await conn.rollback()
+        except Exception as exc:
+            entry["plan"] = f"EXPLAIN failed: {type(exc).__name__}"
+
+
+slow_query_log = SlowQueryLog()
@@ -0,0 +1,105 @@
+import uuid
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.auth.email_cache import EmailCache
+from app.core.conditional_get.versions import UserVersions
+from app.db.models.user import User
+from app.db.redis import Redis
+from app.leaderboard.leaderboard import Leaderboard
+from app.ref_code_manager import ReferralCodeManager
+
+from .settings import settings as job_settings
+
+
+@dataclass(slots=True)
+class UserCleanup:
+    user_id: uuid.UUID
+    session: AsyncSession
+    redis: Redis
+    batch_size: int = job_settings.USER_CLEANUP_BATCH_SIZE
+
+
+CleanupStep = Callable[[UserCleanup], Awaitable[None]]
+
+
+async def delete_referral_code(cleanup: UserCleanup) -> None:
+    await ReferralCodeManager(cleanup.redis).delete(cleanup.user_id)
+
+
+async def detach_referrals(cleanup: UserCleanup) -> None:
+    """Detach referrals in committed batches instead of one ON DELETE SET NULL."""
+    while True:
+        batch = (
+            select(User.id)
+            .where(User.referrer_id == cleanup.user_id)
+            .limit(cleanup.batch_size)
+            .scalar_subquery()
+        )
+        result = await cleanup.session.execute(
+            update(User)
+            .where(User.id.in_(batch))
+            .values(referrer_id=None)
+            .returning(User.id)
+            .execution_options(synchronize_session=False)
+        )
+        detached = result.scalars().all()
+        await cleanup.session.commit()
+        await UserVersions(cleanup.redis).bump(*detached)
+        if len(detached) < cleanup.batch_size:
+            return
+
+
+async def delete_email_cache(cleanup: UserCleanup) -> None:
+    email = await cleanup.session.scalar(
+        select(User.email).where(User.id == cleanup.user_id)
+    )
+    if email is not None:
+        await EmailCache(cleanup.redis).delete(email)
+
+
+async def update_leaderboard(cleanup: UserCleanup) -> None:
+    user = (
+        await cleanup.session.execute(
+            select(User.referrer_id, User.is_verified).where(User.id == cleanup.user_id)
+        )
+    ).one_or_none()
+    leaderboard = Leaderboard(cleanup.redis)
+    if user is not None and user.referrer_id is not None and user.is_verified:
+        await leaderboard.remove_referral(user.referrer_id, cleanup.user_id)
+    await leaderboard.remove_user(cleanup.user_id)
+
+
+async def bump_user_versions(cleanup: UserCleanup) -> None:
+    referrer_id = await cleanup.session.scalar(
+        select(User.referrer_id).where(User.id == cleanup.user_id)
+    )
+    await UserVersions(cleanup.redis).bump(cleanup.user_id, referrer_id)
+
+
+async def delete_user_row(cleanup: UserCleanup) -> None:
+    await cleanup.session.execute(
+        delete(User)
+        .where(User.id == cleanup.user_id)
+        .execution_options(synchronize_session=False)
+    )
+    await cleanup.session.commit()
+
+
+# Every step has to be idempotent, a failed cleanup is retried from the start
+USER_CLEANUP_STEPS: list[CleanupStep] = [
+    delete_referral_code,
+    detach_referrals,
+    delete_email_cache,
+    update_leaderboard,
+    bump_user_versions,
+    delete_user_row,
+]
+
+
+async def cleanup_user(cleanup: UserCleanup) -> None:
+    for step in USER_CLEANUP_STEPS:
+        await step(cleanup)
@@ -0,0 +1,75 @@
+import asyncio
+import smtplib
+from dataclasses import asdict, dataclass
+from email.message import EmailMessage
+from typing import Protocol
+
+import orjson
+
+from .settings import JobSettings
+from .settings import settings as job_settings
+
+
+@dataclass(slots=True)
+class Mail:
+    to: str
+    subject: str
+    body: str
+
+
+class MailTransport(Protocol):
+    async def send_batch(self, mails: list[Mail]) -> list[Exception | None]:
+        """Deliver mails, returning the error of each mail that failed."""
+        ...
+
+
+class FileTransport:
+    """Appends mails as JSON lines to a file, for development and tests."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    async def send_batch(self, mails: list[Mail]) -> list[Exception | None]:
+        await asyncio.to_thread(self._write, mails)
+        return [None] * len(mails)
+
+    def _write(self, mails: list[Mail]) -> None:
+        with open(self.path, "ab") as file:
+            file.writelines(orjson.dumps(asdict(mail)) + b"\n" for mail in mails)
+
+
+class SMTPTransport:
+    """Sends a batch of mails over a single SMTP connection."""
+
+    def __init__(self, settings: JobSettings):
+        self.settings = settings
+
+    async def send_batch(self, mails: list[Mail]) -> list[Exception | None]:
+        return await asyncio.to_thread(self._send, mails)
+
+    def _send(self, mails: list[Mail]) -> list[Exception | None]:
+        settings = self.settings
+        results: list[Exception | None] = []
+        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=30) as smtp:
+            if settings.SMTP_STARTTLS:
+                smtp.starttls()
+            if settings.SMTP_USERNAME:
+                smtp.login(settings.SMTP_USERNAME, settings.SMTP_PASSWORD or "")
+            for mail in mails:
+                message = EmailMessage()
+                message["From"] = settings.MAIL_FROM
+                message["To"] = mail.to
+                message["Subject"] = mail.subject
+                message.set_content(mail.body)
+                try:
+                    smtp.send_message(message)
+                    results.append(None)
+                except smtplib.SMTPException as exc:
+                    results.append(exc)
+        return results
+
+
+def create_mail_transport(settings: JobSettings = job_settings) -> MailTransport:
+    if settings.MAIL_TRANSPORT == "smtp":
+        return SMTPTransport(settings)
+    return FileTransport(settings.MAIL_FILE_PATH)
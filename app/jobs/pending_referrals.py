@@ -0,0 +1,81 @@
+import logging
+
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.conditional_get.versions import UserVersions
+from app.core.metrics.registry import Counter
+from app.db.models.pending_referral import PendingReferral
+from app.db.models.user import User
+from app.db.redis import Redis
+from app.leaderboard.leaderboard import Leaderboard
+from app.ref_code_manager import ReferralCodeManager
+from app.referral_events.events import ReferralEvents, referral_event_data
+
+from .settings import settings as job_settings
+
+logger = logging.getLogger(__name__)
+
+pending_referrals = Counter(
+    "pending_referrals_total",
+    "Referrals deferred while referral codes were unavailable, by outcome.",
+    ["result"],
+)
+
+
+async def reconcile_pending_referrals(
+    session: AsyncSession,
+    redis: Redis,
+    batch_size: int = job_settings.PENDING_REFERRALS_BATCH_SIZE,
+) -> int:
+    """Attach deferred referrals, returning the number of handled rows.
+
+    Codes that expired in the meantime, users that got a referrer otherwise
+    and self referrals are dropped. Raises ``ReferralCodesUnavailable``
+    while codes still can't be resolved, so the job is retried later.
+    """
+    ref_code_manager = ReferralCodeManager(redis)
+    handled = 0
+    while True:
+        batch = (
+            await session.scalars(
+                select(PendingReferral)
+                .order_by(PendingReferral.created_at)
+                .limit(batch_size)
+            )
+        ).all()
+        if not batch:
+            return handled
+
+        for pending in batch:
+            referrer_id = await ref_code_manager.retieve_user_id_by_code(
+                pending.referral_code
+            )
+            user = await session.get(User, pending.user_id)
+            attached = (
+                referrer_id is not None
+                and referrer_id != pending.user_id
+                and user is not None
+                and user.referrer_id is None
+                and await session.get(User, referrer_id) is not None
+            )
+            if attached:
+                user.referrer_id = referrer_id
+            await session.delete(pending)
+            await session.commit()
+            handled += 1
+
+            if not attached:
+                pending_referrals.labels("dropped").inc()
+                continue
+            pending_referrals.labels("attached").inc()
+            await UserVersions(redis).bump(user.id, referrer_id)
+            try:
+                if user.is_verified:
+                    await Leaderboard(redis).add_referral(referrer_id, user.id)
+                await ReferralEvents(redis).publish(
+                    referrer_id, "signup", referral_event_data(user)
+                )
+            except RedisError:
+                logger.exception("Failed to announce a reconciled referral")
@@ -0,0 +1,221 @@
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Annotated, Any
+
+import orjson
+from fastapi import Depends
+
+from app.core.metrics.registry import Counter
+from app.db.redis import Redis, get_redis
+
+from .settings import JobSettings
+from .settings import settings as job_settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE = "default"
+
+# Move jobs whose retry time has come from the delayed set to the ready list
+PROMOTE_DELAYED_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, job in ipairs(due) do
+    redis.call('ZREM', KEYS[1], job)
+    redis.call('LPUSH', KEYS[2], job)
+end
+return #due
+"""
+
+# Return jobs whose reservation wasn't renewed within the visibility timeout
+# to the ready list. Reservations of jobs missing from the sorted set, left by
+# a worker that died between reserving and recording them, start now.
+REQUEUE_EXPIRED_SCRIPT = """
+local requeued = 0
+for _, job in ipairs(redis.call('LRANGE', KEYS[1], 0, -1)) do
+    local reserved_at = redis.call('ZSCORE', KEYS[2], job)
+    if not reserved_at then
+        redis.call('ZADD', KEYS[2], ARGV[1], job)
+    elseif tonumber(reserved_at) <= tonumber(ARGV[2]) then
+        redis.call('LREM', KEYS[1], 1, job)
+        redis.call('ZREM', KEYS[2], job)
+        redis.call('LPUSH', KEYS[3], job)
+        requeued = requeued + 1
+    end
+end
+for _, job in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[2])) do
+    if not redis.call('LPOS', KEYS[1], job) then
+        redis.call('ZREM', KEYS[2], job)
+    end
+end
+return requeued
+"""
+
+jobs_enqueued = Counter("jobs_enqueued_total", "Enqueued background jobs.", ["type"])
+jobs_finished = Counter(
+    "jobs_finished_total", "Processed background jobs by outcome.", ["type", "outcome"]
+)
+
+
+@dataclass(slots=True)
+class Job:
+    id: str
+    type: str
+    payload: dict[str, Any]
+    attempts: int
+    # Serialized form, as stored in Redis lists
+    raw: str
+
+    @classmethod
+    def loads(cls, raw: str) -> "Job":
+        data = orjson.loads(raw)
+        return cls(data["id"], data["type"], data["payload"], data["attempts"], raw)
+
+    def dumps(self, attempts: int | None = None) -> str:
+        return orjson.dumps(
+            {
+                "id": self.id,
+                "type": self.type,
+                "payload": self.payload,
+                "attempts": self.attempts if attempts is None else attempts,
+            }
+        ).decode()
+
+
+class JobQueue:
+    """Reliable job queue on Redis lists.
+
+    Reserved jobs are atomically moved to a processing list and only removed
+    from it once handled. Their reservation times are kept in a sorted set
+    and renewed while they are handled, jobs of workers that died are
+    requeued once their reservation is older than ``JOBS_VISIBILITY_TIMEOUT``.
+    Failed jobs are retried with exponential backoff through a delayed
+    sorted set and end up in a dead letter list once they run out of
+    attempts, entries that can't be parsed go there at once.
+    """
+
+    def __init__(self, redis: Redis, settings: JobSettings = job_settings):
+        self.redis = redis
+        self.settings = settings
+        self._promote = redis.register_script(PROMOTE_DELAYED_SCRIPT)
+        self._requeue_expired = redis.register_script(REQUEUE_EXPIRED_SCRIPT)
+
+    def key(self, queue: str, kind: str | None = None) -> str:
+        key = f"{self.settings.JOBS_REDIS_PREFIX}{queue}"
+        return f"{key}:{kind}" if kind else key
+
+    async def enqueue(
+        self, job_type: str, payload: dict[str, Any], queue: str = DEFAULT_QUEUE
+    ) -> str:
+        job = Job(uuid.uuid4().hex, job_type, payload, 0, "")
+        await self.redis.lpush(self.key(queue), job.dumps())
+        jobs_enqueued.labels(job_type).inc()
+        return job.id
+
+    async def reserve(self, queue: str = DEFAULT_QUEUE) -> list[Job]:
+        """Wait for jobs and reserve up to ``JOBS_BATCH_SIZE`` of them."""
+        ready, processing = self.key(queue), self.key(queue, "processing")
+        batch_size = self.settings.JOBS_BATCH_SIZE
+        await self._promote(
+            keys=[self.key(queue, "delayed"), ready], args=[time.time(), batch_size]
+        )
+
+        raw = await self.redis.blmove(
+            ready, processing, self.settings.JOBS_POLL_TIMEOUT, "RIGHT", "LEFT"
+        )
+        if raw is None:
+            return []
+
+        raws = [raw]
+        while len(raws) < batch_size:
+            raw = await self.redis.lmove(ready, processing, "RIGHT", "LEFT")
+            if raw is None:
+                break
+            raws.append(raw)
+        await self.redis.zadd(
+            self.key(queue, "reserved"), {raw: time.time() for raw in raws}
+        )
+
+        jobs = []
+        for raw in raws:
+            try:
+                jobs.append(Job.loads(raw))
+            except (orjson.JSONDecodeError, KeyError, TypeError):
+                logger.warning("Malformed job dead lettered", extra={"job": raw})
+                await self.dead_letter_raw(raw, queue)
+        return jobs
+
+    async def touch(self, jobs: list[Job], queue: str = DEFAULT_QUEUE) -> None:
+        """Renew the reservations of jobs still being handled."""
+        await self.redis.zadd(
+            self.key(queue, "reserved"),
+            {job.raw: time.time() for job in jobs},
+            xx=True,
+        )
+
+    async def requeue_expired(self, queue: str = DEFAULT_QUEUE) -> int:
+        """Return jobs of workers that stopped renewing them to the ready list."""
+        now = time.time()
+        return await self._requeue_expired(
+            keys=[
+                self.key(queue, "processing"),
+                self.key(queue, "reserved"),
+                self.key(queue),
+            ],
+            args=[now, now - self.settings.JOBS_VISIBILITY_TIMEOUT],
+        )
+
+    async def dead_letter_raw(self, raw: str, queue: str = DEFAULT_QUEUE) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.lrem(self.key(queue, "processing"), 1, raw)
+            pipe.zrem(self.key(queue, "reserved"), raw)
+            pipe.lpush(self.key(queue, "dead"), raw)
+            await pipe.execute()
+        jobs_finished.labels("unknown", "dead").inc()
+
+    async def ack(self, job: Job, queue: str = DEFAULT_QUEUE) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.lrem(self.key(queue, "processing"), 1, job.raw)
+            pipe.zrem(self.key(queue, "reserved"), job.raw)
+            await pipe.execute()
+        jobs_finished.labels(job.type, "done").inc()
+
+    async def retry(self, job: Job, queue: str = DEFAULT_QUEUE) -> None:
+        """Schedule the job again with backoff, or dead letter it."""
+        attempts = job.attempts + 1
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.lrem(self.key(queue, "processing"), 1, job.raw)
+            pipe.zrem(self.key(queue, "reserved"), job.raw)
+            if attempts >= self.settings.JOBS_MAX_ATTEMPTS:
+                pipe.lpush(self.key(queue, "dead"), job.dumps(attempts))
+                outcome = "dead"
+            else:
+                delay = min(
+                    self.settings.JOBS_BACKOFF_BASE**attempts,
+                    self.settings.JOBS_BACKOFF_MAX,
+                )
+                pipe.zadd(
+                    self.key(queue, "delayed"),
+                    {job.dumps(attempts): time.time() + delay},
+                )
+                outcome = "retry"
+            await pipe.execute()
+        jobs_finished.labels(job.type, outcome).inc()
+
+    async def requeue_processing(self, queue: str = DEFAULT_QUEUE) -> int:
+        """Return all reserved jobs to the ready list at once.
+
+        Must only be called while no worker of the queue is running, running
+        workers get jobs of dead ones back through ``requeue_expired``.
+        """
+        count = 0
+        while await self.redis.lmove(
+            self.key(queue, "processing"), self.key(queue), "RIGHT", "LEFT"
+        ):
+            count += 1
+        await self.redis.delete(self.key(queue, "reserved"))
+        return count
+
+
+async def get_job_queue(redis: Annotated[Redis, Depends(get_redis)]) -> JobQueue:
+    return JobQueue(redis)
@@ -0,0 +1,52 @@
+import asyncio
+import logging
+import time
+
+from redis.exceptions import RedisError
+
+from .queue import JobQueue
+
+logger = logging.getLogger(__name__)
+
+
+class JobScheduler:
+    """Enqueues periodic jobs once per interval across all processes.
+
+    Every process running workers also runs a scheduler, the first one to
+    claim an interval's slot in Redis enqueues the job. Schedulers also
+    requeue jobs whose reservation expired.
+    """
+
+    def __init__(self, job_queue: JobQueue, jobs: dict[str, float]):
+        self.job_queue = job_queue
+        self.jobs = jobs
+
+    async def tick(self, now: float | None = None) -> list[str]:
+        now = time.time() if now is None else now
+        enqueued = []
+        for job_type, interval in self.jobs.items():
+            slot = int(now // interval)
+            claimed = await self.job_queue.redis.set(
+                self.job_queue.key("scheduled", f"{job_type}:{slot}"),
+                1,
+                nx=True,
+                ex=int(interval * 2),
+            )
+            if claimed:
+                await self.job_queue.enqueue(job_type, {})
+                enqueued.append(job_type)
+        return enqueued
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.tick()
+                requeued = await self.job_queue.requeue_expired()
+                if requeued:
+                    logger.warning(
+                        "Requeued jobs of stopped workers",
+                        extra={"requeued": requeued},
+                    )
+            except (RedisError, OSError):
+                logger.exception("Job queue is unavailable")
+            await asyncio.sleep(self.job_queue.settings.JOBS_SCHEDULER_INTERVAL)
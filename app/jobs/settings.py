@@ -0,0 +1,45 @@
+from typing import Literal
+
+from pydantic_settings import BaseSettings
+
+
+class JobSettings(BaseSettings):
+    """Background jobs and mail delivery settings"""
+
+    JOBS_REDIS_PREFIX: str = "jobs:"
+    # Workers started with the application, 0 to run them separately only
+    JOBS_WORKERS: int = 1
+    JOBS_BATCH_SIZE: int = 50
+    # Seconds a worker blocks waiting for new jobs
+    JOBS_POLL_TIMEOUT: float = 1.0
+    JOBS_MAX_ATTEMPTS: int = 5
+    JOBS_BACKOFF_BASE: float = 2.0
+    JOBS_BACKOFF_MAX: float = 600.0
+    # Seconds after which jobs of a worker that stopped renewing their
+    # reservation are handed out again
+    JOBS_VISIBILITY_TIMEOUT: float = 300.0
+    # Seconds workers get to finish their batches on shutdown before they are
+    # cancelled, their jobs are requeued after JOBS_VISIBILITY_TIMEOUT
+    JOBS_SHUTDOWN_TIMEOUT: float = 20.0
+    # Seconds between checks for due periodic jobs
+    JOBS_SCHEDULER_INTERVAL: float = 30.0
+
+    # Users with more referrals are deleted by a background cleanup job
+    USER_CLEANUP_INLINE_MAX_REFERRALS: int = 100
+    USER_CLEANUP_BATCH_SIZE: int = 1000
+
+    # Referrals deferred while referral codes were unavailable are attached
+    # by a periodic job in batches of this size
+    PENDING_REFERRALS_BATCH_SIZE: int = 100
+
+    MAIL_TRANSPORT: Literal["file", "smtp"] = "file"
+    MAIL_FILE_PATH: str = "mail.jsonl"
+    MAIL_FROM: str = "noreply@localhost"
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 587
+    SMTP_USERNAME: str | None = None
+    SMTP_PASSWORD: str | None = None
+    SMTP_STARTTLS: bool = True
+
+
+settings = JobSettings()
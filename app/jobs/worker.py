@@ -0,0 +1,248 @@
+import argparse
+import asyncio
+import logging
+import signal
+import uuid
+from collections import defaultdict
+from contextlib import AbstractAsyncContextManager
+from typing import Awaitable, Callable
+
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.db import session_context_manager
+from app.db.redis import Redis, create_redis_client
+from app.leaderboard.leaderboard import Leaderboard
+from app.referral_stats.stats import ReferralStats
+
+from .cleanup import UserCleanup, cleanup_user
+from .mail import Mail, MailTransport, create_mail_transport
+from .pending_referrals import reconcile_pending_referrals
+from .queue import DEFAULT_QUEUE, Job, JobQueue
+from .scheduler import JobScheduler
+
+logger = logging.getLogger(__name__)
+
+SEND_EMAIL = "send_email"
+CLEANUP_USER = "cleanup_user"
+REBUILD_LEADERBOARD = "rebuild_leaderboard"
+ROLLUP_REFERRAL_STATS = "rollup_referral_stats"
+RECONCILE_REFERRALS = "reconcile_referrals"
+
+# Job types enqueued by the scheduler, with their intervals in seconds
+PERIODIC_JOBS = {ROLLUP_REFERRAL_STATS: 3600, RECONCILE_REFERRALS: 60}
+
+BatchHandler = Callable[[list[Job]], Awaitable[list[Exception | None]]]
+SessionFactory = Callable[[], AbstractAsyncContextManager[AsyncSession]]
+
+
+class JobWorker:
+    """Reserves batches of jobs and hands them over to per type handlers.
+
+    A handler gets all reserved jobs of its type at once and returns the
+    error of every job that failed, so deliveries can share connections.
+    Once ``stopping`` is set workers exit after their current batch, reserved
+    jobs are never abandoned in the processing list.
+    """
+
+    def __init__(
+        self,
+        job_queue: JobQueue,
+        mail_transport: MailTransport | None = None,
+        queue: str = DEFAULT_QUEUE,
+        session_factory: SessionFactory = session_context_manager,
+    ):
+        self.job_queue = job_queue
+        self.queue = queue
+        self.mail_transport = mail_transport or create_mail_transport()
+        self.session_factory = session_factory
+        self.stopping = asyncio.Event()
+        self.handlers: dict[str, BatchHandler] = {
+            SEND_EMAIL: self.send_emails,
+            CLEANUP_USER: self.cleanup_users,
+            REBUILD_LEADERBOARD: self.rebuild_leaderboard,
+            ROLLUP_REFERRAL_STATS: self.rollup_referral_stats,
+            RECONCILE_REFERRALS: self.reconcile_referrals,
+        }
+
+    async def send_emails(self, jobs: list[Job]) -> list[Exception | None]:
+        return await self.mail_transport.send_batch(
+            [Mail(**job.payload) for job in jobs]
+        )
+
+    async def cleanup_users(self, jobs: list[Job]) -> list[Exception | None]:
+        errors: list[Exception | None] = []
+        async with self.session_factory() as session:
+            for job in jobs:
+                try:
+                    await cleanup_user(
+                        UserCleanup(
+                            uuid.UUID(job.payload["user_id"]),
+                            session,
+                            self.job_queue.redis,
+                        )
+                    )
+                    errors.append(None)
+                except Exception as exc:
+                    await session.rollback()
+                    errors.append(exc)
+        return errors
+
+    async def rebuild_leaderboard(self, jobs: list[Job]) -> list[Exception | None]:
+        # Duplicate requests in a batch are served by a single rebuild
+        async with self.session_factory() as session:
+            await Leaderboard(self.job_queue.redis).rebuild(session)
+        return [None] * len(jobs)
+
+    async def rollup_referral_stats(self, jobs: list[Job]) -> list[Exception | None]:
+        async with self.session_factory() as session:
+            await ReferralStats(self.job_queue.redis).rollup(session)
+        return [None] * len(jobs)
+
+    async def reconcile_referrals(self, jobs: list[Job]) -> list[Exception | None]:
+        async with self.session_factory() as session:
+            await reconcile_pending_referrals(session, self.job_queue.redis)
+        return [None] * len(jobs)
+
+    async def run(self) -> None:
+        # Reserving blocks for at most JOBS_POLL_TIMEOUT, so the flag is
+        # checked often without cancelling a reservation half way
+        while not self.stopping.is_set():
+            try:
+                await self.run_once()
+                continue
+            except (RedisError, OSError):
+                logger.exception("Job queue is unavailable")
+            except Exception:
+                logger.exception("Job worker failed")
+            try:
+                await asyncio.wait_for(
+                    self.stopping.wait(), self.job_queue.settings.JOBS_POLL_TIMEOUT
+                )
+            except TimeoutError:
+                pass
+
+    async def keep_reserved(self, jobs: list[Job]) -> None:
+        """Renew the reservations of ``jobs`` until cancelled."""
+        interval = self.job_queue.settings.JOBS_VISIBILITY_TIMEOUT / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.job_queue.touch(jobs, self.queue)
+            except RedisError:
+                logger.warning("Failed to renew job reservations", exc_info=True)
+
+    async def run_once(self) -> int:
+        """Process one batch of jobs, returning the number of reserved jobs."""
+        jobs = await self.job_queue.reserve(self.queue)
+        if not jobs:
+            return 0
+        keep_reserved = asyncio.create_task(self.keep_reserved(jobs))
+        try:
+            await self.handle(jobs)
+        finally:
+            keep_reserved.cancel()
+        return len(jobs)
+
+    async def handle(self, jobs: list[Job]) -> None:
+        by_type: defaultdict[str, list[Job]] = defaultdict(list)
+        for job in jobs:
+            by_type[job.type].append(job)
+
+        for job_type, typed_jobs in by_type.items():
+            handler = self.handlers.get(job_type)
+            try:
+                if handler is None:
+                    raise LookupError(f"Unknown job type {job_type!r}")
+                errors = await handler(typed_jobs)
+            except Exception as exc:
+                errors = [exc] * len(typed_jobs)
+
+            for job, error in zip(typed_jobs, errors):
+                if error is None:
+                    await self.job_queue.ack(job, self.queue)
+                else:
+                    logger.warning(
+                        "Job failed",
+                        extra={
+                            "job_id": job.id,
+                            "job_type": job.type,
+                            "error": repr(error),
+                        },
+                    )
+                    await self.job_queue.retry(job, self.queue)
+
+
+class JobWorkerPool:
+    """Job workers and the periodic job scheduler of one process."""
+
+    def __init__(self, redis: Redis, count: int):
+        self.count = count
+        self.worker = JobWorker(JobQueue(redis))
+        self.tasks: list[asyncio.Task] = []
+        self.scheduler: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Start ``count`` workers and, if there are any, the scheduler."""
+        if self.count <= 0:
+            return
+        self.tasks = [asyncio.create_task(self.worker.run()) for _ in range(self.count)]
+        self.scheduler = asyncio.create_task(
+            JobScheduler(self.worker.job_queue, PERIODIC_JOBS).run()
+        )
+
+    async def stop(self) -> None:
+        """Let workers finish their batches, cancel them after a timeout."""
+        self.worker.stopping.set()
+        if not self.tasks:
+            return
+        self.scheduler.cancel()
+
+        _, pending = await asyncio.wait(
+            self.tasks,
+            timeout=self.worker.job_queue.settings.JOBS_SHUTDOWN_TIMEOUT,
+        )
+        if pending:
+            logger.warning(
+                "Job workers cancelled with reserved jobs",
+                extra={"workers": len(pending)},
+            )
+            for task in pending:
+                task.cancel()
+        await asyncio.gather(*self.tasks, self.scheduler, return_exceptions=True)
+
+
+async def main(recover: bool) -> None:
+    redis = create_redis_client()
+    pool = JobWorkerPool(redis, 1)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+    try:
+        if recover:
+            requeued = await pool.worker.job_queue.requeue_processing(pool.worker.queue)
+            logger.info("Requeued reserved jobs", extra={"requeued": requeued})
+        pool.start()
+        await stop.wait()
+        await pool.stop()
+    finally:
+        await redis.aclose()
+
+
+if __name__ == "__main__":
+    from app.core.log.handlers import log_pipeline
+
+    parser = argparse.ArgumentParser(description="Run a background job worker.")
+    parser.add_argument(
+        "--recover",
+        action="store_true",
+        help="requeue jobs reserved by crashed workers before starting",
+    )
+    args = parser.parse_args()
+
+    log_pipeline.start()
+    try:
+        asyncio.run(main(args.recover))
+    finally:
+        log_pipeline.stop()
@@ -0,0 +1,172 @@
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from enum import StrEnum
+from typing import Annotated
+
+from fastapi import Depends
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.user import User
+from app.db.redis import Redis, get_redis
+
+from .settings import LeaderboardSettings
+from .settings import settings as leaderboard_settings
+
+# Decrement a referrer once per removed referral, so retried cleanups
+# don't count the same referral twice. The daily bucket the referral was
+# counted in, if it's still kept, is decremented as well.
+FORGET_REFERRAL_SCRIPT = """
+if not redis.call('SET', KEYS[1], 1, 'NX', 'EX', ARGV[2]) then
+    return 0
+end
+local function decrement(key)
+    redis.call('ZINCRBY', key, -1, ARGV[1])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', 0)
+end
+decrement(KEYS[2])
+if KEYS[4] then
+    decrement(KEYS[4])
+end
+redis.call('DEL', KEYS[3])
+return 1
+"""
+
+
+class Period(StrEnum):
+    day = "day"
+    week = "week"
+    all = "all"
+
+
+class Leaderboard:
+    """Verified referrals per referrer in Redis sorted sets.
+
+    The all-time board is adjusted on every change of a verified referral and
+    can be rebuilt from the database. Day and week boards count referrals
+    gained in the current UTC day and the last seven days, backed by daily
+    buckets.
+    """
+
+    def __init__(
+        self, redis: Redis, settings: LeaderboardSettings = leaderboard_settings
+    ):
+        self.redis = redis
+        self.settings = settings
+        self._forget_referral = redis.register_script(FORGET_REFERRAL_SCRIPT)
+
+    def key(self, name: str) -> str:
+        return f"{self.settings.LEADERBOARD_REDIS_PREFIX}{name}"
+
+    def day_key(self, day: date) -> str:
+        return self.key(f"day:{day.isoformat()}")
+
+    def recent_days(self, days: int = 7) -> list[date]:
+        today = datetime.now(timezone.utc).date()
+        return [today - timedelta(days=offset) for offset in range(days)]
+
+    async def add_referral(
+        self, referrer_id: uuid.UUID, referral_id: uuid.UUID
+    ) -> None:
+        """Count a referral, remembering the day for as long as it's kept."""
+        today = self.recent_days(1)[0]
+        day_key = self.day_key(today)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zincrby(self.key("all"), 1, str(referrer_id))
+            pipe.zincrby(day_key, 1, str(referrer_id))
+            pipe.expire(day_key, self.settings.LEADERBOARD_DAY_TTL)
+            pipe.set(
+                self.key(f"counted:{referral_id}"),
+                today.isoformat(),
+                ex=self.settings.LEADERBOARD_DAY_TTL,
+            )
+            pipe.delete(self.key(f"removed:{referral_id}"))
+            await pipe.execute()
+
+    async def remove_referral(
+        self, referrer_id: uuid.UUID, referral_id: uuid.UUID
+    ) -> None:
+        """Decrement the boards that counted ``referral_id``, at most once.
+
+        The weekly board follows once its cached union expires.
+        """
+        counted_key = self.key(f"counted:{referral_id}")
+        keys = [self.key(f"removed:{referral_id}"), self.key("all"), counted_key]
+        counted_day = await self.redis.get(counted_key)
+        if counted_day is not None:
+            keys.append(self.day_key(date.fromisoformat(counted_day)))
+        await self._forget_referral(
+            keys=keys, args=[str(referrer_id), self.settings.LEADERBOARD_DAY_TTL]
+        )
+
+    async def remove_user(self, user_id: uuid.UUID) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.zrem(self.key("all"), str(user_id))
+            for day in self.recent_days():
+                pipe.zrem(self.day_key(day), str(user_id))
+            await pipe.execute()
+
+    async def top(
+        self, period: Period, limit: int, offset: int = 0
+    ) -> list[tuple[uuid.UUID, int]]:
+        if period == Period.all:
+            key = self.key("all")
+        elif period == Period.day:
+            key = self.day_key(self.recent_days(1)[0])
+        else:
+            key = self.key("week")
+            if not await self.redis.exists(key):
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.zunionstore(
+                        key, [self.day_key(day) for day in self.recent_days()]
+                    )
+                    pipe.expire(key, self.settings.LEADERBOARD_WEEK_CACHE_TTL)
+                    await pipe.execute()
+
+        entries = await self.redis.zrevrangebyscore(
+            key, "+inf", 1, start=offset, num=limit, withscores=True
+        )
+        return [(uuid.UUID(user_id), int(score)) for user_id, score in entries]
+
+    async def rebuild(self, session: AsyncSession) -> int:
+        """Recount the all-time board from the database in batches.
+
+        Returns the number of referrers. Changes made while rebuilding may be
+        lost until the next rebuild.
+        """
+        rebuild_key = self.key("all:rebuild")
+        batch_size = self.settings.LEADERBOARD_REBUILD_BATCH_SIZE
+        await self.redis.delete(rebuild_key)
+
+        referrers = 0
+        last_referrer_id: uuid.UUID | None = None
+        while True:
+            stmt = (
+                select(User.referrer_id, func.count())
+                .where(User.referrer_id.is_not(None), User.is_verified == True)
+                .group_by(User.referrer_id)
+                .order_by(User.referrer_id)
+                .limit(batch_size)
+            )
+            if last_referrer_id is not None:
+                stmt = stmt.where(User.referrer_id > last_referrer_id)
+            rows = (await session.execute(stmt)).all()
+            if rows:
+                await self.redis.zadd(
+                    rebuild_key,
+                    {str(referrer_id): count for referrer_id, count in rows},
+                )
+                referrers += len(rows)
+                last_referrer_id = rows[-1][0]
+            if len(rows) < batch_size:
+                break
+
+        if referrers:
+            await self.redis.rename(rebuild_key, self.key("all"))
+        else:
+            await self.redis.delete(self.key("all"))
+        return referrers
+
+
+async def get_leaderboard(redis: Annotated[Redis, Depends(get_redis)]) -> Leaderboard:
+    return Leaderboard(redis)
@@ -0,0 +1,16 @@
+from pydantic_settings import BaseSettings
+
+
+class LeaderboardSettings(BaseSettings):
+    """Top referrers leaderboard settings"""
+
+    LEADERBOARD_REDIS_PREFIX: str = "leaderboard:"
+    # Daily buckets are kept long enough to build the weekly board
+    LEADERBOARD_DAY_TTL: int = 8 * 24 * 3600
+    # Seconds the union of daily buckets is reused for weekly boards
+    LEADERBOARD_WEEK_CACHE_TTL: int = 60
+    LEADERBOARD_MAX_LIMIT: int = 100
+    LEADERBOARD_REBUILD_BATCH_SIZE: int = 1000
+
+
+settings = LeaderboardSettings()
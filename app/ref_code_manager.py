@@ -1,15 +1,102 @@
 import asyncio
+import logging
 import secrets
+import time
 import uuid
-from typing import Annotated
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Annotated, Awaitable, Callable, TypeVar
+from weakref import WeakKeyDictionary
 
 from fastapi import Depends
+from redis.exceptions import RedisError
 
 from app.core.auth.settings import settings
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.core.conditional_get.versions import UserVersions
+from app.core.metrics.registry import Counter
+from app.core.single_flight import SingleFlight
 from app.db.redis import Redis, get_redis
+from app.db.settings import settings as db_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+ref_code_operations = Counter(
+    "referral_code_operations_total",
+    "ReferralCodeManager operations by result.",
+    ["operation", "result"],
+)
+
+# Lookups of a viral code by concurrent registrations share one Redis call
+code_lookups = SingleFlight("referral_code")
+
+referral_code_breaker = CircuitBreaker(
+    "referral_codes",
+    db_settings.REDIS_BREAKER_FAILURE_THRESHOLD,
+    db_settings.REDIS_BREAKER_RESET_TIMEOUT,
+    db_settings.REDIS_BREAKER_CALL_TIMEOUT,
+)
+
+
+class ReferralCodesUnavailable(Exception):
+    """Redis can't be reached and the local cache can't answer instead."""
+
+
+@dataclass(slots=True)
+class CachedValue:
+    value: str
+    cached_until: float
+    # Expiry of the Redis key, if known
+    expires_at: float | None = None
+
+
+class LocalCodeCache:
+    """Recently read codes, served while Redis is unavailable."""
+
+    def __init__(self, size: int, ttl: int):
+        self.size = size
+        self.ttl = ttl
+        self.entries: OrderedDict[str, CachedValue] = OrderedDict()
+
+    def get(self, key: str) -> CachedValue | None:
+        entry = self.entries.get(key)
+        if entry is None or entry.cached_until < time.monotonic():
+            return None
+        return entry
+
+    def set(self, key: str, value: str, expires_at: float | None = None) -> None:
+        previous = self.entries.pop(key, None)
+        if expires_at is None and previous is not None and previous.value == value:
+            expires_at = previous.expires_at
+        self.entries[key] = CachedValue(value, time.monotonic() + self.ttl, expires_at)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def set_expiry(self, key: str, expires_at: float) -> None:
+        entry = self.entries.get(key)
+        if entry is not None:
+            entry.expires_at = expires_at
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.entries.pop(key, None)
+
+
+local_codes = LocalCodeCache(
+    settings.REFERRAL_CODE_LOCAL_CACHE_SIZE, settings.REFERRAL_CODE_LOCAL_CACHE_TTL
+)
 
 
 class ReferralCodeManager:
+    """Referral codes in Redis, behind ``referral_code_breaker``.
+
+    Reads fall back to ``local_codes`` when Redis fails or the breaker is
+    open, and raise ``ReferralCodesUnavailable`` when that can't answer.
+    Writes always need Redis.
+    """
+
     def __init__(
         self,
         redis: Redis,
@@ -20,56 +107,115 @@ class ReferralCodeManager:
         self.uid_to_code_prefix = uid_to_code_prefix
         self.code_to_uid_prefix = code_to_uid_prefix
 
+    async def _call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        try:
+            return await referral_code_breaker.call(fn)
+        except (CircuitOpenError, RedisError, OSError) as exc:
+            ref_code_operations.labels("redis", "unavailable").inc()
+            raise ReferralCodesUnavailable() from exc
+
+    async def _read(self, key: str) -> str | None:
+        try:
+            value = await code_lookups.do(
+                key, lambda: self._call(lambda: self.redis.get(key))
+            )
+        except ReferralCodesUnavailable:
+            entry = local_codes.get(key)
+            if entry is None:
+                raise
+            ref_code_operations.labels("read", "local").inc()
+            if entry.expires_at is not None and entry.expires_at <= time.time():
+                return None
+            return entry.value
+
+        if value is None:
+            local_codes.delete(key)
+        else:
+            local_codes.set(key, value)
+        return value
+
+    async def _ttl(self, key: str) -> int:
+        try:
+            ttl = await self._call(lambda: self.redis.ttl(key))
+        except ReferralCodesUnavailable:
+            entry = local_codes.get(key)
+            if entry is None or entry.expires_at is None:
+                raise
+            ref_code_operations.labels("read", "local").inc()
+            ttl = int(entry.expires_at - time.time())
+            return ttl if ttl >= 0 else -2
+
+        if ttl >= 0:
+            local_codes.set_expiry(key, time.time() + ttl)
+        return ttl
+
     async def retrieve_code(self, user_id: uuid.UUID) -> str | None:
-        return await self.redis.get(f"{self.uid_to_code_prefix}{user_id}")
+        code = await self._read(f"{self.uid_to_code_prefix}{user_id}")
+        ref_code_operations.labels("retrieve_code", "hit" if code else "miss").inc()
+        return code
 
     async def retieve_user_id_by_code(self, ref_code: str) -> uuid.UUID | None:
-        uid = await self.redis.get(f"{self.code_to_uid_prefix}{ref_code}")
-        print(uid)
+        uid = await self._read(f"{self.code_to_uid_prefix}{ref_code}")
+        logger.debug("Referral code resolved", extra={"referrer_id": uid})
+        ref_code_operations.labels("resolve_code", "hit" if uid else "miss").inc()
+        if uid is None:
+            return None
         return uuid.UUID(uid)
 
     async def retrieve_ttl_by_user_id(self, user_id: uuid.UUID):
-        return await self.redis.ttl(f"{self.uid_to_code_prefix}{user_id}")
+        return await self._ttl(f"{self.uid_to_code_prefix}{user_id}")
 
     async def retrieve_ttl_by_ref_code(self, ref_code: str):
-        return await self.redis.ttl(f"{self.code_to_uid_prefix}{ref_code}")
+        return await self._ttl(f"{self.code_to_uid_prefix}{ref_code}")
 
     async def create(self, user_id: uuid.UUID, ttl: int) -> str | None:
-        stored_ttl = await self.retrieve_ttl_by_user_id(user_id)
+        uid_key = f"{self.uid_to_code_prefix}{user_id}"
+        stored_ttl = await self._call(lambda: self.redis.ttl(uid_key))
         if stored_ttl >= 0:
+            ref_code_operations.labels("create", "exists").inc()
             return None
 
         new_ref_code = secrets.token_urlsafe(8)
+        code_key = f"{self.code_to_uid_prefix}{new_ref_code}"
 
-        await asyncio.gather(
-            self.redis.set(
-                f"{self.uid_to_code_prefix}{user_id}",
-                new_ref_code,
-                ex=ttl,
-            ),
-            self.redis.set(
-                f"{self.code_to_uid_prefix}{new_ref_code}",
-                str(user_id),
-                ex=ttl,
-            ),
+        await self._call(
+            lambda: asyncio.gather(
+                self.redis.set(uid_key, new_ref_code, ex=ttl),
+                self.redis.set(code_key, str(user_id), ex=ttl),
+            )
         )
+        expires_at = time.time() + ttl
+        local_codes.set(uid_key, new_ref_code, expires_at)
+        local_codes.set(code_key, str(user_id), expires_at)
+        await UserVersions(self.redis).bump(user_id)
+        ref_code_operations.labels("create", "created").inc()
         return new_ref_code
 
     async def delete(self, user_id: uuid.UUID) -> bool:
-        stored_ttl = await self.retrieve_ttl_by_user_id(user_id)
+        uid_key = f"{self.uid_to_code_prefix}{user_id}"
+        stored_ttl = await self._call(lambda: self.redis.ttl(uid_key))
         if stored_ttl < 0:
+            ref_code_operations.labels("delete", "missing").inc()
             return False
 
-        ref_code = await self.retrieve_code(user_id)
+        ref_code = await self._call(lambda: self.redis.get(uid_key))
+        code_key = f"{self.code_to_uid_prefix}{ref_code}"
 
-        await asyncio.gather(
-            self.redis.delete(f"{self.uid_to_code_prefix}{user_id}"),
-            self.redis.delete(f"{self.retrieve_ttl_by_ref_code}{ref_code}"),
-        )
+        await self._call(lambda: self.redis.delete(uid_key, code_key))
+        local_codes.delete(uid_key, code_key)
+        await UserVersions(self.redis).bump(user_id)
+        ref_code_operations.labels("delete", "deleted").inc()
         return True
 
 
+# The manager only holds the client, one per client is shared by requests
+ref_code_managers: WeakKeyDictionary[Redis, ReferralCodeManager] = WeakKeyDictionary()
+
+
 async def get_ref_code_manager(
-    redis: Annotated[Redis, Depends(get_redis)]
+    redis: Annotated[Redis, Depends(get_redis)],
 ) -> ReferralCodeManager:
-    return ReferralCodeManager(redis)
+    manager = ref_code_managers.get(redis)
+    if manager is None:
+        manager = ref_code_managers[redis] = ReferralCodeManager(redis)
+    return manager
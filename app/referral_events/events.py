@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Annotated, Any, AsyncIterator, Iterator
+
+import orjson
+from fastapi import Depends
+from redis.exceptions import RedisError
+
+from app.core.metrics.registry import Counter, Gauge
+from app.db.redis import Redis, get_redis
+
+from .settings import ReferralEventsSettings
+from .settings import settings as events_settings
+
+logger = logging.getLogger(__name__)
+
+# Append the event to the referrer's history and announce it with its id
+PUBLISH_SCRIPT = """
+local id = redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[1], '*', 'data', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('PUBLISH', ARGV[4], ARGV[5] .. ' ' .. id .. ' ' .. ARGV[2])
+return id
+"""
+
+open_streams = Gauge("referral_event_streams", "Open referral event streams.")
+dropped_streams = Counter(
+    "referral_event_streams_dropped_total",
+    "Referral event streams closed because the client was too slow.",
+)
+
+
+def referral_event_data(user) -> dict[str, Any]:
+    return {
+        "user_id": str(user.id),
+        "email": user.email,
+        "name": user.name,
+        "surname": user.surname,
+    }
+
+
+def parse_event_id(event_id: str) -> tuple[int, int]:
+    milliseconds, _, sequence = event_id.partition("-")
+    return int(milliseconds), int(sequence or 0)
+
+
+class ReferralEvents:
+    """Publishes referral events and reads a referrer's recent history."""
+
+    def __init__(
+        self, redis: Redis, settings: ReferralEventsSettings = events_settings
+    ):
+        self.redis = redis
+        self.settings = settings
+        self._publish = redis.register_script(PUBLISH_SCRIPT)
+
+    def history_key(self, referrer_id: uuid.UUID) -> str:
+        return f"{self.settings.REFERRAL_EVENTS_REDIS_PREFIX}{referrer_id}"
+
+    async def publish(
+        self, referrer_id: uuid.UUID, event_type: str, data: dict[str, Any]
+    ) -> str | None:
+        """Publish an event, failures are only logged."""
+        try:
+            return await self._publish(
+                keys=[self.history_key(referrer_id)],
+                args=[
+                    self.settings.REFERRAL_EVENTS_HISTORY_SIZE,
+                    orjson.dumps({"type": event_type, **data}),
+                    self.settings.REFERRAL_EVENTS_HISTORY_TTL,
+                    self.settings.REFERRAL_EVENTS_CHANNEL,
+                    str(referrer_id),
+                ],
+            )
+        except RedisError:
+            logger.exception("Failed to publish referral event")
+            return None
+
+    async def history(
+        self, referrer_id: uuid.UUID, after: str
+    ) -> list[tuple[str, str]]:
+        entries = await self.redis.xrange(
+            self.history_key(referrer_id),
+            f"({after}",
+            "+",
+            count=self.settings.REFERRAL_EVENTS_HISTORY_SIZE,
+        )
+        return [(event_id, fields["data"]) for event_id, fields in entries]
+
+
+class Subscription:
+    __slots__ = ("queue", "overflowed", "closed")
+
+    def __init__(self, size: int):
+        # None wakes up the stream once it's closed
+        self.queue: asyncio.Queue[tuple[str, str] | None] = asyncio.Queue(size)
+        self.overflowed = False
+        self.closed = False
+
+
+class ReferralEventHub:
+    """Fans referral events out to the streams open in this process.
+
+    A single pub/sub connection receives the events of all referrers.
+    Streams whose buffer fills up are closed once drained; clients resume
+    from the history with Last-Event-ID. All streams are closed when the
+    server shuts down, so they don't hold up its graceful shutdown.
+    """
+
+    def __init__(self, settings: ReferralEventsSettings = events_settings):
+        self.settings = settings
+        self.subscriptions: defaultdict[str, set[Subscription]] = defaultdict(set)
+        self.closing = False
+        self._task: asyncio.Task | None = None
+
+    @property
+    def count(self) -> int:
+        return sum(len(subscriptions) for subscriptions in self.subscriptions.values())
+
+    def start(self, redis: Redis) -> None:
+        self._task = asyncio.create_task(self._listen(redis))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _listen(self, redis: Redis) -> None:
+        while True:
+            try:
+                async with redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(self.settings.REFERRAL_EVENTS_CHANNEL)
+                    while True:
+                        # Wait less than the socket timeout, which would
+                        # otherwise break idle subscriptions
+                        message = await pubsub.get_message(
+                            ignore_subscribe_messages=True, timeout=1.0
+                        )
+                        if message is not None and message["type"] == "message":
+                            self.dispatch(message["data"])
+            except (RedisError, OSError):
+                logger.exception("Referral events subscription failed")
+                await asyncio.sleep(1)
+
+    def close(self) -> None:
+        """End all open streams, clients reconnect to another worker."""
+        self.closing = True
+        for subscriptions in self.subscriptions.values():
+            for subscription in subscriptions:
+                subscription.closed = True
+                try:
+                    subscription.queue.put_nowait(None)
+                except asyncio.QueueFull:
+                    # The stream isn't waiting and sees the flag next
+                    pass
+
+    def dispatch(self, message: str) -> None:
+        referrer_id, event_id, data = message.split(" ", 2)
+        for subscription in self.subscriptions.get(referrer_id, ()):
+            if subscription.overflowed or subscription.closed:
+                continue
+            try:
+                subscription.queue.put_nowait((event_id, data))
+            except asyncio.QueueFull:
+                subscription.overflowed = True
+                dropped_streams.inc()
+
+    @contextmanager
+    def subscribe(self, referrer_id: uuid.UUID) -> Iterator[Subscription]:
+        key = str(referrer_id)
+        subscription = Subscription(self.settings.REFERRAL_EVENTS_QUEUE_SIZE)
+        subscription.closed = self.closing
+        self.subscriptions[key].add(subscription)
+        try:
+            yield subscription
+        finally:
+            self.subscriptions[key].discard(subscription)
+            if not self.subscriptions[key]:
+                del self.subscriptions[key]
+
+
+def format_event(event_id: str, data: str) -> str:
+    return f"id: {event_id}\nevent: referral\ndata: {data}\n\n"
+
+
+async def stream_events(
+    hub: ReferralEventHub,
+    events: ReferralEvents,
+    referrer_id: uuid.UUID,
+    last_event_id: str | None = None,
+) -> AsyncIterator[str]:
+    """Server-Sent Events of the referrer, resuming after ``last_event_id``."""
+    with hub.subscribe(referrer_id) as subscription:
+        # Subscribed before reading the history, so no event falls in between
+        last = parse_event_id(last_event_id) if last_event_id else None
+        yield f"retry: {int(hub.settings.REFERRAL_EVENTS_HEARTBEAT * 1000)}\n\n"
+        if last_event_id is not None:
+            for event_id, data in await events.history(referrer_id, last_event_id):
+                last = parse_event_id(event_id)
+                yield format_event(event_id, data)
+
+        while not subscription.closed and not (
+            subscription.overflowed and subscription.queue.empty()
+        ):
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(), hub.settings.REFERRAL_EVENTS_HEARTBEAT
+                )
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            if event is None:
+                break
+            event_id, data = event
+            if last is not None and parse_event_id(event_id) <= last:
+                continue
+            last = parse_event_id(event_id)
+            yield format_event(event_id, data)
+
+
+referral_event_hub = ReferralEventHub()
+open_streams.set_function(lambda: referral_event_hub.count)
+
+
+async def get_referral_events(
+    redis: Annotated[Redis, Depends(get_redis)],
+) -> ReferralEvents:
+    return ReferralEvents(redis)
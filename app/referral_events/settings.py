@@ -0,0 +1,20 @@
+from pydantic_settings import BaseSettings
+
+
+class ReferralEventsSettings(BaseSettings):
+    """Live referral notifications settings"""
+
+    REFERRAL_EVENTS_REDIS_PREFIX: str = "referral_events:"
+    REFERRAL_EVENTS_CHANNEL: str = "referral_events"
+    # Events kept per referrer for clients resuming with Last-Event-ID
+    REFERRAL_EVENTS_HISTORY_SIZE: int = 100
+    REFERRAL_EVENTS_HISTORY_TTL: int = 24 * 3600
+    # Seconds between heartbeat comments on idle streams
+    REFERRAL_EVENTS_HEARTBEAT: float = 15.0
+    # Events buffered per client, slower clients are disconnected
+    REFERRAL_EVENTS_QUEUE_SIZE: int = 100
+    # Open streams per process
+    REFERRAL_EVENTS_MAX_STREAMS: int = 10_000
+
+
+settings = ReferralEventsSettings()
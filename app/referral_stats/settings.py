@@ -0,0 +1,14 @@
+from pydantic_settings import BaseSettings
+
+
+class ReferralStatsSettings(BaseSettings):
+    """Referral code usage analytics settings"""
+
+    REFERRAL_STATS_REDIS_PREFIX: str = "refstats:"
+    # Hourly Redis buckets outlive several missed rollups before expiring
+    REFERRAL_STATS_TTL: int = 3 * 24 * 3600
+    REFERRAL_STATS_ROLLUP_BATCH_SIZE: int = 500
+    REFERRAL_STATS_MAX_HOURS: int = 24 * 31
+
+
+settings = ReferralStatsSettings()
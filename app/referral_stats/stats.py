@@ -0,0 +1,196 @@
+import hashlib
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Annotated
+
+from fastapi import Depends
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.referral_code_stats import ReferralCodeStats
+from app.db.models.user import User
+from app.db.redis import Redis, get_redis
+
+from .settings import ReferralStatsSettings
+from .settings import settings as stats_settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class Bucket:
+    code: str
+    hour: datetime
+    clicks: int = 0
+    unique_visitors: int = 0
+    conversions: int = 0
+
+
+def hour_start(timestamp: float) -> int:
+    return int(timestamp // 3600 * 3600)
+
+
+def as_utc(hour: datetime) -> datetime:
+    # SQLite drops the timezone of stored datetimes
+    if hour.tzinfo is None:
+        return hour.replace(tzinfo=timezone.utc)
+    return hour.astimezone(timezone.utc)
+
+
+def split_bucket(bucket: str) -> tuple[str, int]:
+    code, _, hour = bucket.rpartition(":")
+    return code, int(hour)
+
+
+class ReferralStats:
+    """Hourly clicks, unique visitors and conversions per referral code.
+
+    Events go to per code, per hour Redis hashes and HyperLogLogs which
+    expire on their own. A rollup job copies finished hours to the
+    ``referral_code_stats`` table.
+
+    Keys:
+        ``{prefix}{code}:{hour}`` hash with clicks and conversions
+        ``{prefix}{code}:{hour}:uv`` HyperLogLog of visitors
+        ``{prefix}referrer:{referrer_id}`` sorted set of the referrer's
+        ``{code}:{hour}`` buckets, scored by hour
+        ``{prefix}pending`` the same buckets of all referrers, to be rolled up
+    """
+
+    def __init__(self, redis: Redis, settings: ReferralStatsSettings = stats_settings):
+        self.redis = redis
+        self.settings = settings
+
+    def key(self, name: str) -> str:
+        return f"{self.settings.REFERRAL_STATS_REDIS_PREFIX}{name}"
+
+    async def record(
+        self, code: str, referrer_id: uuid.UUID, visitor: str, converted: bool
+    ) -> None:
+        """Record a code resolution in a single round trip.
+
+        Failures are only logged, analytics must not fail registrations.
+        """
+        hour = hour_start(time.time())
+        bucket = f"{code}:{hour}"
+        ttl = self.settings.REFERRAL_STATS_TTL
+        visitor_hash = hashlib.blake2b(visitor.encode(), digest_size=8).hexdigest()
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hincrby(self.key(bucket), "clicks", 1)
+            if converted:
+                pipe.hincrby(self.key(bucket), "conversions", 1)
+            pipe.expire(self.key(bucket), ttl)
+            pipe.pfadd(self.key(f"{bucket}:uv"), visitor_hash)
+            pipe.expire(self.key(f"{bucket}:uv"), ttl)
+            pipe.zadd(self.key(f"referrer:{referrer_id}"), {bucket: hour})
+            pipe.expire(self.key(f"referrer:{referrer_id}"), ttl)
+            pipe.zadd(self.key("pending"), {f"{referrer_id}:{bucket}": hour})
+            try:
+                await pipe.execute()
+            except RedisError:
+                logger.exception("Failed to record referral code usage")
+
+    async def read_buckets(self, buckets: list[str]) -> list[Bucket]:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for bucket in buckets:
+                pipe.hgetall(self.key(bucket))
+                pipe.pfcount(self.key(f"{bucket}:uv"))
+            results = await pipe.execute()
+
+        stats = []
+        for i, bucket in enumerate(buckets):
+            counters, unique_visitors = results[2 * i], results[2 * i + 1]
+            code, hour = split_bucket(bucket)
+            stats.append(
+                Bucket(
+                    code,
+                    datetime.fromtimestamp(hour, timezone.utc),
+                    int(counters.get("clicks", 0)),
+                    unique_visitors,
+                    int(counters.get("conversions", 0)),
+                )
+            )
+        return stats
+
+    async def get(
+        self, session: AsyncSession, referrer_id: uuid.UUID, hours: int
+    ) -> list[Bucket]:
+        """Buckets of the last ``hours`` hours, oldest first.
+
+        Rolled up hours come from the database, the rest from Redis.
+        """
+        since = hour_start(time.time()) - (hours - 1) * 3600
+        rows = await session.scalars(
+            select(ReferralCodeStats).where(
+                ReferralCodeStats.referrer_id == referrer_id,
+                ReferralCodeStats.hour >= datetime.fromtimestamp(since, timezone.utc),
+            )
+        )
+        stats = {}
+        for row in rows:
+            hour = as_utc(row.hour)
+            stats[row.code, int(hour.timestamp())] = Bucket(
+                row.code, hour, row.clicks, row.unique_visitors, row.conversions
+            )
+
+        live = [
+            bucket
+            for bucket in await self.redis.zrangebyscore(
+                self.key(f"referrer:{referrer_id}"), since, "+inf"
+            )
+            if split_bucket(bucket) not in stats
+        ]
+        for bucket in await self.read_buckets(live):
+            stats[(bucket.code, int(bucket.hour.timestamp()))] = bucket
+        return sorted(stats.values(), key=lambda bucket: (bucket.hour, bucket.code))
+
+    async def rollup(self, session: AsyncSession) -> int:
+        """Copy finished hours to the database, returning the number of buckets.
+
+        Rows are merged, so rolling up a bucket twice is harmless.
+        """
+        current_hour = hour_start(time.time())
+        batch_size = self.settings.REFERRAL_STATS_ROLLUP_BATCH_SIZE
+        rolled_up = 0
+        while True:
+            pending = await self.redis.zrangebyscore(
+                self.key("pending"), "-inf", f"({current_hour}", start=0, num=batch_size
+            )
+            if not pending:
+                return rolled_up
+
+            referrer_ids = [uuid.UUID(entry.partition(":")[0]) for entry in pending]
+            buckets = [entry.partition(":")[2] for entry in pending]
+            # Buckets of deleted referrers are dropped
+            existing = set(
+                await session.scalars(select(User.id).where(User.id.in_(referrer_ids)))
+            )
+            for referrer_id, bucket in zip(
+                referrer_ids, await self.read_buckets(buckets)
+            ):
+                if referrer_id not in existing:
+                    continue
+                await session.merge(
+                    ReferralCodeStats(
+                        code=bucket.code,
+                        hour=bucket.hour,
+                        referrer_id=referrer_id,
+                        clicks=bucket.clicks,
+                        unique_visitors=bucket.unique_visitors,
+                        conversions=bucket.conversions,
+                    )
+                )
+            await session.commit()
+            await self.redis.zrem(self.key("pending"), *pending)
+            rolled_up += len(pending)
+
+
+async def get_referral_stats(
+    redis: Annotated[Redis, Depends(get_redis)],
+) -> ReferralStats:
+    return ReferralStats(redis)
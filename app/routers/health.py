@@ -0,0 +1,28 @@
+import time
+
+from fastapi import APIRouter, Request
+from fastapi.responses import ORJSONResponse
+
+health_router = APIRouter(tags=["health"])
+
+started_at = time.time()
+
+
+@health_router.get("/health")
+async def liveness():
+    """Answers as long as the worker's event loop runs, without dependencies."""
+    return {"status": "ok", "uptime": round(time.time() - started_at, 3)}
+
+
+@health_router.get("/ready")
+async def readiness(request: Request):
+    """Whether to route traffic to this worker.
+
+    Fails until startup warmup finishes, while required dependencies are
+    down and once the worker starts draining for shutdown. The public answer
+    is the status only, admins get the checks from ``/api/v1/admin/health``.
+    """
+    ready, report = await request.app.state.health.readiness()
+    return ORJSONResponse(
+        {"status": report["status"]}, status_code=200 if ready else 503
+    )
@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics.registry import default_registry
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(
+        default_registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
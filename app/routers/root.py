@@ -1,7 +1,19 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, FastAPI
 
+from .health import health_router
+from .v1.oauth import get_oauth_router
 from .v1.root import v1_root_router
 
 root_router = APIRouter(prefix="/api")
 
+root_router.include_router(health_router)
 root_router.include_router(v1_root_router)
+
+
+def include_lazy_routers(app: FastAPI) -> None:
+    """Include routers that are built on startup rather than on import."""
+    if getattr(app.state, "lazy_routers_included", False):
+        return
+    app.include_router(get_oauth_router(), prefix="/api/v1")
+    app.openapi_schema = None
+    app.state.lazy_routers_included = True
@@ -0,0 +1,35 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Request
+
+from app.core.auth.auth import User, current_superuser
+from app.db.slow_queries import slow_query_log
+from app.jobs.queue import JobQueue, get_job_queue
+from app.jobs.worker import REBUILD_LEADERBOARD
+from app.schemas.admin import JobEnqueued, SlowQueries
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/slow_queries", response_model=SlowQueries)
+async def get_slow_queries(user: Annotated[User, Depends(current_superuser)]):
+    """Latest slow SQL statements with their plans, newest first."""
+    return SlowQueries(queries=reversed(slow_query_log.entries))
+
+
+@router.get("/health")
+async def get_health(
+    request: Request, user: Annotated[User, Depends(current_superuser)]
+):
+    """Readiness checks, database pool usage and circuit breaker states."""
+    _, report = await request.app.state.health.readiness()
+    return report
+
+
+@router.post("/leaderboard/rebuild", response_model=JobEnqueued, status_code=202)
+async def rebuild_leaderboard(
+    user: Annotated[User, Depends(current_superuser)],
+    job_queue: Annotated[JobQueue, Depends(get_job_queue)],
+):
+    """Recount the all-time referrals leaderboard from the database."""
+    return JobEnqueued(job_id=await job_queue.enqueue(REBUILD_LEADERBOARD, {}))
@@ -0,0 +1,33 @@
+from fastapi import APIRouter
+
+from app.core.auth.auth import auth_backend, fastapi_users_app
+from app.core.auth.settings import settings as auth_settings
+from app.schemas.user import UserRead
+
+
+def get_oauth_router() -> APIRouter:
+    """Login and account association routes of the OAuth providers.
+
+    Rarely used, so the clients and routes are only built on startup
+    instead of on application import.
+    """
+    from app.core.auth.oauth2 import get_github_oauth_client, get_google_oauth_client
+
+    router = APIRouter()
+    for name, client, secret in (
+        ("google", get_google_oauth_client(), auth_settings.OAUTH_GOOGLE_SECRET),
+        ("github", get_github_oauth_client(), auth_settings.OAUTH_GITHUB_SECRET),
+    ):
+        router.include_router(
+            fastapi_users_app.get_oauth_router(
+                client, auth_backend, secret, associate_by_email=True
+            ),
+            prefix=f"/auth/{name}",
+            tags=["auth"],
+        )
+        router.include_router(
+            fastapi_users_app.get_oauth_associate_router(client, UserRead, secret),
+            prefix=f"/auth/associate/{name}",
+            tags=["auth"],
+        )
+    return router
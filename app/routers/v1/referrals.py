@@ -0,0 +1,55 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+
+from app.core.auth.auth import (
+    User,
+    UserManager,
+    current_verified_user,
+    get_user_manager,
+)
+from app.leaderboard.leaderboard import Leaderboard, Period, get_leaderboard
+from app.leaderboard.settings import settings as leaderboard_settings
+from app.schemas.referrals import Leaderboard as LeaderboardRead
+from app.schemas.referrals import LeaderboardEntry
+
+router = APIRouter(prefix="/referrals", tags=["referrals"])
+
+
+@router.get("/leaderboard", response_model=LeaderboardRead)
+async def get_leaderboard_top(
+    user: Annotated[User, Depends(current_verified_user)],
+    leaderboard: Annotated[Leaderboard, Depends(get_leaderboard)],
+    user_manager: Annotated[UserManager, Depends(get_user_manager)],
+    period: Period = Period.all,
+    limit: Annotated[
+        int, Query(ge=1, le=leaderboard_settings.LEADERBOARD_MAX_LIMIT)
+    ] = 10,
+):
+    """Active referrers with the most verified referrals in the period."""
+    entries: list[LeaderboardEntry] = []
+    offset = 0
+    # Deleted and deactivated users may still be on the board, skip them
+    while len(entries) < limit:
+        top = await leaderboard.top(period, limit, offset)
+        users = {
+            referrer.id: referrer
+            for referrer in await user_manager.user_db.get_many(
+                [user_id for user_id, _ in top]
+            )
+            if referrer.is_active
+        }
+        entries.extend(
+            LeaderboardEntry(
+                user_id=user_id,
+                name=users[user_id].name,
+                surname=users[user_id].surname,
+                referrals=referrals,
+            )
+            for user_id, referrals in top
+            if user_id in users
+        )
+        if len(top) < limit:
+            break
+        offset += limit
+    return LeaderboardRead(period=period, entries=entries[:limit])
@@ -1,7 +1,11 @@
 from fastapi import APIRouter
 
+from .admin import router as admin_router
+from .referrals import router as referrals_router
 from .user import router as user_router
 
 v1_root_router = APIRouter(prefix="/v1")
 
 v1_root_router.include_router(user_router)
+v1_root_router.include_router(referrals_router)
+v1_root_router.include_router(admin_router)
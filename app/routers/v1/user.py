@@ -1,11 +1,24 @@
+import logging
 import uuid
 from typing import Annotated
 
-from fastapi import APIRouter, Cookie, Depends, HTTPException, Request, Response
+import orjson
+from fastapi import (
+    APIRouter,
+    Cookie,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
 from fastapi_users.authentication.authenticator import Authenticator
 from fastapi_users.authentication.strategy import JWTStrategy
 from fastapi_users.authentication.transport.bearer import BearerResponse
 from fastapi_users.exceptions import UserNotExists
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth.auth import (
     User,
@@ -17,22 +30,37 @@ from app.core.auth.auth import (
     get_jwt_refresh_strategy,
     get_jwt_strategy,
     get_user_manager,
+    own_user_db,
 )
 from app.core.auth.auth_routers import get_auth_router, get_register_router
-from app.core.auth.oauth2 import github_oauth_client, google_oauth_client
 from app.core.auth.settings import settings as auth_settings
+from app.core.response_cache.cache import ResponseCache, get_response_cache
+from app.db.db import get_session
 from app.ref_code_manager import ReferralCodeManager, get_ref_code_manager
+from app.referral_events.events import (
+    ReferralEvents,
+    get_referral_events,
+    parse_event_id,
+    referral_event_hub,
+    stream_events,
+)
+from app.referral_events.settings import settings as events_settings
+from app.referral_stats.settings import settings as stats_settings
+from app.referral_stats.stats import ReferralStats, get_referral_stats
 from app.schemas.user import (
     ReferralCodeExpiraton,
     ReferralCodeRead,
     ReferralCodeReadWithExpire,
     ReferralCodeRequest,
+    ReferralCodeStats,
     UserCreate,
     UserRead,
     UserReferrals,
     UserUpdate,
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
@@ -66,40 +94,6 @@ router.include_router(
     prefix="/users",
     tags=["users"],
 )
-router.include_router(
-    fastapi_users_app.get_oauth_router(
-        google_oauth_client,
-        auth_backend,
-        auth_settings.OAUTH_GOOGLE_SECRET,
-        associate_by_email=True,
-    ),
-    prefix="/auth/google",
-    tags=["auth"],
-)
-router.include_router(
-    fastapi_users_app.get_oauth_associate_router(
-        google_oauth_client, UserRead, auth_settings.OAUTH_GOOGLE_SECRET
-    ),
-    prefix="/auth/associate/google",
-    tags=["auth"],
-)
-router.include_router(
-    fastapi_users_app.get_oauth_router(
-        github_oauth_client,
-        auth_backend,
-        auth_settings.OAUTH_GITHUB_SECRET,
-        associate_by_email=True,
-    ),
-    prefix="/auth/github",
-    tags=["auth"],
-)
-router.include_router(
-    fastapi_users_app.get_oauth_associate_router(
-        github_oauth_client, UserRead, auth_settings.OAUTH_GITHUB_SECRET
-    ),
-    prefix="/auth/associate/github",
-    tags=["auth"],
-)
 
 
 @router.post("/auth/refresh", tags=["auth"], response_model=BearerResponse)
@@ -129,6 +123,7 @@ async def refresh_token(
         domain=auth_settings.COOKIE_DOMAIN,
         secure=True,
     )
+    return response
 
 
 @router.get("/users/me/referrals", tags=["users"], response_model=UserReferrals)
@@ -139,15 +134,55 @@ async def get_my_referrals(
     return UserReferrals(referrals=await user_manager.get_referrals(user.id))
 
 
+@router.get(
+    "/users/me/referrals/stream", tags=["users"], response_class=StreamingResponse
+)
+async def stream_my_referrals(
+    user: Annotated[User, Depends(current_verified_user)],
+    events: Annotated[ReferralEvents, Depends(get_referral_events)],
+    last_event_id: Annotated[str | None, Header()] = None,
+):
+    """Server-Sent Events about your new and verified referrals.
+
+    Reconnecting clients get the events they missed after ``Last-Event-ID``.
+    """
+    if referral_event_hub.count >= events_settings.REFERRAL_EVENTS_MAX_STREAMS:
+        raise HTTPException(status_code=503, detail="Too many open streams.")
+    if last_event_id is not None:
+        try:
+            parse_event_id(last_event_id)
+        except ValueError:
+            last_event_id = None
+
+    return StreamingResponse(
+        stream_events(referral_event_hub, events, user.id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/users/referrals/{user_id}", tags=["users"], response_model=UserReferrals)
 async def get_user_referrals(
-    user_manager: Annotated[UserManager, Depends(get_user_manager)], user_id: uuid.UUID
+    user_manager: Annotated[UserManager, Depends(get_user_manager)],
+    response_cache: Annotated[ResponseCache, Depends(get_response_cache)],
+    user_id: uuid.UUID,
 ):
-    try:
-        user = await user_manager.get(user_id)
-    except UserNotExists:
+    bind = user_manager.user_db.session.bind
+
+    # Cold refills are shared with concurrent requests, so they don't use the
+    # session of this request, which closes if it's cancelled
+    async def build() -> bytes | None:
+        async with own_user_db(bind) as user_db:
+            user = await user_db.get(user_id)
+            if user is None:
+                return None
+            referrals = UserReferrals(referrals=await user_db.get_referrals(user.id))
+            return orjson.dumps(referrals.model_dump(mode="json"))
+
+    body = await response_cache.get_or_build("referrals", user_id, build)
+    if body is None:
         raise HTTPException(status_code=404, detail="User not found.")
-    return UserReferrals(referrals=await user_manager.get_referrals(user.id))
+    return Response(body, media_type="application/json")
 
 
 @router.post("/users/referral_code", tags=["users"], response_model=ReferralCodeRead)
@@ -157,7 +192,10 @@ async def get_token_by_user_email(
     request: ReferralCodeRequest,
 ):
     user: User = await user_manager.get_by_email(request.email)
-    print(user)
+    logger.debug(
+        "Referral code requested by email",
+        extra={"found_user_id": user.id if user else None},
+    )
     if user is None:
         raise UserNotExists()
 
@@ -227,3 +265,21 @@ async def delete_referral_code(
         )
 
     return Response(status_code=204)
+
+
+@router.get(
+    "/users/me/referral_code/stats", response_model=ReferralCodeStats, tags=["users"]
+)
+async def get_my_referral_code_stats(
+    user: Annotated[User, Depends(current_verified_user)],
+    referral_stats: Annotated[ReferralStats, Depends(get_referral_stats)],
+    session: Annotated[AsyncSession, Depends(get_session)],
+    hours: Annotated[int, Query(ge=1, le=stats_settings.REFERRAL_STATS_MAX_HOURS)] = 24,
+):
+    """Hourly usage of your referral codes over the last ``hours`` hours."""
+    buckets = await referral_stats.get(session, user.id, hours)
+    return ReferralCodeStats(
+        clicks=sum(bucket.clicks for bucket in buckets),
+        conversions=sum(bucket.conversions for bucket in buckets),
+        buckets=buckets,
+    )
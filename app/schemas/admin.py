@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel
+
+
+class SlowQueryRead(BaseModel):
+    statement: str
+    parameters: Any = None
+    duration: float
+    route: str | None = None
+    trace_id: str | None = None
+    recorded_at: datetime
+    plan: str | None = None
+
+
+class SlowQueries(BaseModel):
+    queries: list[SlowQueryRead] = []
+
+
+class JobEnqueued(BaseModel):
+    job_id: str
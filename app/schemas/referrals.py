@@ -0,0 +1,17 @@
+import uuid
+
+from pydantic import BaseModel
+
+from app.leaderboard.leaderboard import Period
+
+
+class LeaderboardEntry(BaseModel):
+    user_id: uuid.UUID
+    name: str
+    surname: str
+    referrals: int
+
+
+class Leaderboard(BaseModel):
+    period: Period
+    entries: list[LeaderboardEntry] = []
@@ -1,5 +1,5 @@
 import uuid
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 from fastapi_users import schemas
 from pydantic import BaseModel, ConfigDict, EmailStr, Field
@@ -41,6 +41,22 @@ class ReferralCodeReadWithExpire(ReferralCodeRead):
     expires_in: timedelta
 
 
+class ReferralCodeStatsBucket(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    code: str
+    hour: datetime
+    clicks: int
+    unique_visitors: int
+    conversions: int
+
+
+class ReferralCodeStats(BaseModel):
+    clicks: int = 0
+    conversions: int = 0
+    buckets: list[ReferralCodeStatsBucket] = []
+
+
 class ReferralCodeExpiraton(BaseModel):
     expires_in_seconds: int
 
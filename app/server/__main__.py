@@ -0,0 +1,7 @@
+from app.application import fastapi_app
+
+from .supervisor import Supervisor
+
+if __name__ == "__main__":
+    # The application is imported before forking, workers share its memory
+    Supervisor(fastapi_app).run()
@@ -0,0 +1,33 @@
+from pydantic_settings import BaseSettings
+
+
+class ServerSettings(BaseSettings):
+    """Production server settings"""
+
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 5000
+    SERVER_BACKLOG: int = 2048
+    # 0 runs a worker per CPU available to the process
+    SERVER_WORKERS: int = 0
+    # Workers are replaced after this many requests, plus a random jitter so
+    # that they don't all restart at once. 0 disables recycling.
+    SERVER_MAX_REQUESTS: int = 10_000
+    SERVER_MAX_REQUESTS_JITTER: int = 1_000
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+    # Seconds workers keep serving with readiness failing after SIGTERM, so
+    # load balancers stop routing to them before connections are refused
+    SERVER_DRAIN_DELAY: float = 3.0
+    SERVER_KEEPALIVE_TIMEOUT: int = 5
+    SERVER_PROXY_HEADERS: bool = True
+    # Comma separated addresses or networks of the reverse proxy. X-Forwarded-*
+    # headers from any other peer are ignored, so clients can't pick their IP.
+    SERVER_FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+
+    SERVER_WARMUP_ENABLED: bool = True
+    SERVER_WARMUP_TIMEOUT: float = 10.0
+    # Database and Redis connections opened before the worker is ready
+    SERVER_WARMUP_DB_CONNECTIONS: int = 5
+    SERVER_WARMUP_REDIS_CONNECTIONS: int = 5
+
+
+settings = ServerSettings()
@@ -0,0 +1,231 @@
+import logging
+import os
+import random
+import signal
+import socket
+import sys
+import time
+from types import FrameType
+
+import uvicorn
+from fastapi import FastAPI
+
+from app.core.log.handlers import JsonFormatter
+from app.jobs.settings import settings as job_settings
+from app.referral_events.events import referral_event_hub
+
+from .settings import ServerSettings
+from .settings import settings as server_settings
+
+logger = logging.getLogger(__name__)
+# Workers set up the log pipeline in their lifespan, the supervisor only
+# needs plain synchronous output that is safe to fork with
+_handler = logging.StreamHandler(sys.stdout)
+_handler.setFormatter(JsonFormatter())
+logger.addHandler(_handler)
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+
+def default_workers() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+class DrainingServer(uvicorn.Server):
+    """Fails readiness for a while before shutting down on a signal.
+
+    Event streams never end on their own, they are closed as the shutdown
+    starts so that they don't hold it up for the whole graceful timeout.
+    """
+
+    def __init__(self, config: uvicorn.Config, app: FastAPI, drain_delay: float):
+        super().__init__(config)
+        self.app = app
+        self.drain_delay = drain_delay
+        self.drain_signal: int | None = None
+        self.drain_deadline = 0.0
+
+    def handle_exit(self, sig: int, frame: FrameType | None) -> None:
+        if self.drain_signal is not None or self.drain_delay <= 0:
+            super().handle_exit(sig, frame)
+            return
+        self.drain_signal = sig
+        self.drain_deadline = time.monotonic() + self.drain_delay
+        self.app.state.ready = False
+
+    async def on_tick(self, counter: int) -> bool:
+        if (
+            self.drain_signal is not None
+            and not self.should_exit
+            and time.monotonic() >= self.drain_deadline
+        ):
+            super().handle_exit(self.drain_signal, None)
+        return await super().on_tick(counter)
+
+    async def shutdown(self, sockets: list[socket.socket] | None = None) -> None:
+        referral_event_hub.close()
+        await super().shutdown(sockets)
+
+
+class Supervisor:
+    """Pre-fork process manager for uvicorn workers.
+
+    The application is imported once and the listening socket bound before
+    forking, so workers share both. Workers run uvicorn on uvloop and
+    httptools and exit after their request budget, the supervisor replaces
+    them. SIGTERM and SIGINT shut down gracefully, SIGHUP replaces all
+    workers one at a time.
+    """
+
+    def __init__(self, app: FastAPI, settings: ServerSettings = server_settings):
+        self.app = app
+        self.settings = settings
+        self.worker_count = settings.SERVER_WORKERS or default_workers()
+        self.workers: dict[int, float] = {}
+        self.stopping = False
+        self.socket: socket.socket | None = None
+        # Workers left to replace in a reload and the one being replaced
+        self.reload_pending: set[int] = set()
+        self.retiring: int | None = None
+
+    def bind(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.settings.SERVER_HOST, self.settings.SERVER_PORT))
+        sock.listen(self.settings.SERVER_BACKLOG)
+        sock.set_inheritable(True)
+        return sock
+
+    def max_requests(self) -> int | None:
+        if not self.settings.SERVER_MAX_REQUESTS:
+            return None
+        jitter = random.randint(0, self.settings.SERVER_MAX_REQUESTS_JITTER)
+        return self.settings.SERVER_MAX_REQUESTS + jitter
+
+    def spawn(self) -> None:
+        max_requests = self.max_requests()
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = time.monotonic()
+            return
+
+        exit_code = 0
+        try:
+            for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+                signal.signal(signum, signal.SIG_DFL)
+            self.run_worker(max_requests)
+        except BaseException:
+            logger.exception("Worker failed")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def run_worker(self, max_requests: int | None) -> None:
+        config = uvicorn.Config(
+            self.app,
+            loop="uvloop",
+            http="httptools",
+            lifespan="on",
+            proxy_headers=self.settings.SERVER_PROXY_HEADERS,
+            forwarded_allow_ips=self.settings.SERVER_FORWARDED_ALLOW_IPS,
+            limit_max_requests=max_requests,
+            timeout_keep_alive=self.settings.SERVER_KEEPALIVE_TIMEOUT,
+            timeout_graceful_shutdown=self.settings.SERVER_GRACEFUL_TIMEOUT,
+            access_log=False,
+            log_config=None,
+        )
+        server = DrainingServer(config, self.app, self.settings.SERVER_DRAIN_DELAY)
+        server.run(sockets=[self.socket])
+
+    def reap(self) -> None:
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.workers.clear()
+                return
+            if pid == 0:
+                return
+            started = self.workers.pop(pid, None)
+            exit_code = os.waitstatus_to_exitcode(status)
+            if not self.stopping:
+                logger.info("Worker exited", extra={"pid": pid, "exit_code": exit_code})
+            if exit_code != 0 and started and time.monotonic() - started < 1:
+                # Don't spin on workers failing at startup
+                time.sleep(1)
+
+    def signal_workers(self, signum: int) -> None:
+        for pid in self.workers:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def handle_stop(self, signum, frame) -> None:
+        self.stopping = True
+
+    def handle_reload(self, signum, frame) -> None:
+        self.reload_pending = set(self.workers)
+
+    def replace_next(self) -> None:
+        """Start a worker and stop an old one, once the previous one exited."""
+        if self.retiring in self.workers:
+            return
+        self.retiring = None
+        while self.reload_pending:
+            pid = self.reload_pending.pop()
+            if pid not in self.workers:
+                continue
+            self.spawn()
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+            self.retiring = pid
+            return
+
+    def run(self) -> None:
+        self.socket = self.bind()
+        signal.signal(signal.SIGTERM, self.handle_stop)
+        signal.signal(signal.SIGINT, self.handle_stop)
+        signal.signal(signal.SIGHUP, self.handle_reload)
+        logger.info(
+            "Starting workers",
+            extra={
+                "workers": self.worker_count,
+                "address": f"{self.settings.SERVER_HOST}:{self.settings.SERVER_PORT}",
+            },
+        )
+        try:
+            while not self.stopping:
+                self.reap()
+                while len(self.workers) < self.worker_count and not self.stopping:
+                    self.spawn()
+                if not self.stopping:
+                    self.replace_next()
+                time.sleep(0.2)
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        self.signal_workers(signal.SIGTERM)
+        # Workers drain, close connections and then stop their job workers
+        deadline = (
+            time.monotonic()
+            + self.settings.SERVER_DRAIN_DELAY
+            + self.settings.SERVER_GRACEFUL_TIMEOUT
+            + job_settings.JOBS_SHUTDOWN_TIMEOUT
+            + 5
+        )
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        self.signal_workers(signal.SIGKILL)
+        for pid in list(self.workers):
+            os.waitpid(pid, 0)
+        self.workers.clear()
+        if self.socket is not None:
+            self.socket.close()
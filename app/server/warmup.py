@@ -0,0 +1,64 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from sqlalchemy import text
+
+from app.db.db import get_session
+from app.db.redis import Redis
+
+from .settings import ServerSettings
+from .settings import settings as server_settings
+
+logger = logging.getLogger(__name__)
+
+
+async def open_db_connections(app: FastAPI, count: int) -> None:
+    get_app_session = app.dependency_overrides.get(get_session, get_session)
+
+    async def check_out() -> None:
+        async with asynccontextmanager(get_app_session)() as session:
+            await session.execute(text("SELECT 1"))
+
+    # Concurrent checkouts leave that many connections in the pool
+    await asyncio.gather(*(check_out() for _ in range(count)))
+
+
+async def open_redis_connections(redis: Redis, count: int) -> None:
+    await asyncio.gather(*(redis.ping() for _ in range(count)))
+
+
+async def warm_up(
+    app: FastAPI, redis: Redis, settings: ServerSettings = server_settings
+) -> None:
+    """Open connections and build lazily computed state before serving.
+
+    Failures are logged only: a worker with a cold pool can still serve.
+    """
+    if not settings.SERVER_WARMUP_ENABLED:
+        return
+    started = time.perf_counter()
+    steps = {
+        "database": open_db_connections(app, settings.SERVER_WARMUP_DB_CONNECTIONS),
+        "redis": open_redis_connections(
+            redis, settings.SERVER_WARMUP_REDIS_CONNECTIONS
+        ),
+        "openapi": asyncio.to_thread(app.openapi),
+    }
+    results = await asyncio.gather(
+        *(
+            asyncio.wait_for(step, settings.SERVER_WARMUP_TIMEOUT)
+            for step in steps.values()
+        ),
+        return_exceptions=True,
+    )
+    for name, result in zip(steps, results):
+        if isinstance(result, BaseException):
+            logger.warning(
+                "Warmup step failed", extra={"step": name, "error": repr(result)}
+            )
+    logger.info(
+        "Warmed up", extra={"duration": round(time.perf_counter() - started, 3)}
+    )
@@ -9,9 +9,13 @@ from sqlalchemy.orm.exc import ObjectDeletedError
 from sqlalchemy.pool import StaticPool
 
 from app.application import fastapi_app
+from app.core.load_shedding.settings import settings as load_shedding_settings
+from app.core.rate_limit.settings import settings as rate_limit_settings
+from app.core.tracing.settings import settings as tracing_settings
 from app.db.db import get_session
 from app.db.models.base import Base
 from app.db.models.user import User
+from app.jobs.settings import settings as job_settings
 
 
 @pytest.fixture(name="session")
@@ -41,10 +45,25 @@ async def async_session():
 
 
 @pytest.fixture(name="client")
-def client_fixture(session: Session, async_session: AsyncSession):
+def client_fixture(
+    session: Session,
+    async_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path,
+):
     async def get_session_override():
         yield async_session
 
+    # Tests log in far more often than real clients and hash passwords on the
+    # event loop, enable limits and load shedding explicitly where tested
+    monkeypatch.setattr(rate_limit_settings, "RATE_LIMIT_ENABLED", False)
+    monkeypatch.setattr(load_shedding_settings, "LOAD_SHEDDING_ENABLED", False)
+    # Jobs are left in the queue for tests to inspect
+    monkeypatch.setattr(job_settings, "JOBS_WORKERS", 0)
+    # Sampled spans of any test don't end up in the working directory
+    monkeypatch.setattr(
+        tracing_settings, "TRACING_FILE_PATH", str(tmp_path / "traces.jsonl")
+    )
     fastapi_app.dependency_overrides[get_session] = get_session_override
 
     with TestClient(fastapi_app) as test_client:
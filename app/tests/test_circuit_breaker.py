@@ -0,0 +1,101 @@
+import time
+import uuid
+from collections import OrderedDict
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError, State
+from app.db.models.pending_referral import PendingReferral
+from app.db.models.user import User
+from app.jobs.pending_referrals import reconcile_pending_referrals
+from app.ref_code_manager import local_codes, referral_code_breaker
+from app.tests.test_user import get_auth_header
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.1)
+
+    async def fail():
+        raise ConnectionError()
+
+    async def succeed():
+        return "ok"
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            await breaker.call(fail)
+    assert breaker.state == State.OPEN
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(succeed)
+
+    time.sleep(0.1)
+    assert breaker.state == State.HALF_OPEN
+    with pytest.raises(ConnectionError):
+        await breaker.call(fail)
+    assert breaker.state == State.OPEN, "A failed probe opens the breaker again"
+
+    time.sleep(0.1)
+    assert await breaker.call(succeed) == "ok"
+    assert breaker.state == State.CLOSED
+
+
+def register(client: TestClient, email: str, referral_code: str) -> dict:
+    resp = client.post(
+        "/api/v1/auth/register",
+        json={
+            "user_create": {
+                "email": email,
+                "password": "somepass",
+                "name": "MyName",
+                "surname": "MySurname",
+            },
+            "referral_code": referral_code,
+        },
+    )
+    assert resp.status_code == 201
+    return resp.json()
+
+
+def test_degraded_registration(
+    client: TestClient,
+    verified_user: User,
+    session: Session,
+    async_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    auth_header = get_auth_header(client, verified_user.email, "password1234")
+    resp = client.post(
+        "/api/v1/users/me/referral_code",
+        headers=auth_header,
+        json={"expires_in_seconds": 100},
+    )
+    code = resp.json()["referral_code"]
+
+    # Redis keeps failing
+    monkeypatch.setattr(referral_code_breaker, "opened_at", time.monotonic())
+    user = register(client, "degraded1@mail.com", code)
+    assert user["referrer_id"] == str(verified_user.id), "Served from the local cache"
+
+    monkeypatch.setattr(local_codes, "entries", OrderedDict())
+    user = register(client, "degraded2@mail.com", code)
+    assert user["referrer_id"] is None
+    assert session.scalars(select(PendingReferral.referral_code)).all() == [code]
+
+    resp = client.delete("/api/v1/users/me/referral_code", headers=auth_header)
+    assert resp.status_code == 503
+
+    referral_code_breaker.record_success()
+    assert (
+        client.portal.call(
+            reconcile_pending_referrals, async_session, client.app.state.redis
+        )
+        == 1
+    )
+    session.expire_all()
+    assert session.get(User, uuid.UUID(user["id"])).referrer_id == verified_user.id
+    assert session.scalars(select(PendingReferral)).all() == []
@@ -0,0 +1,67 @@
+from fastapi.testclient import TestClient
+
+from app.core.conditional_get.versions import UserVersions
+from app.db.models.user import User
+from app.tests.test_user import get_auth_header
+
+
+def test_conditional_get(client: TestClient, verified_user: User):
+    client.portal.call(UserVersions(client.app.state.redis).bump, verified_user.id)
+    auth_header = get_auth_header(client, verified_user.email, "password1234")
+
+    resp = client.get("/api/v1/users/me", headers=auth_header)
+    assert resp.status_code == 200
+    assert resp.headers["Cache-Control"] == "private, no-cache"
+    etag = resp.headers["ETag"]
+
+    resp = client.get(
+        "/api/v1/users/me", headers={**auth_header, "If-None-Match": etag}
+    )
+    assert resp.status_code == 304
+    assert resp.headers["ETag"] == etag
+    assert resp.content == b""
+
+    resp = client.get(
+        "/api/v1/users/me/referrals", headers={**auth_header, "If-None-Match": etag}
+    )
+    assert resp.status_code == 200, "ETags differ between endpoints"
+
+    resp = client.patch(
+        "/api/v1/users/me",
+        headers=auth_header,
+        json={"name": "Jane", "surname": "Doe"},
+    )
+    assert resp.status_code == 200
+    resp = client.get(
+        "/api/v1/users/me", headers={**auth_header, "If-None-Match": etag}
+    )
+    assert resp.status_code == 200
+    assert resp.json()["name"] == "Jane"
+    assert resp.headers["ETag"] != etag
+
+
+def test_conditional_get_referral_code(client: TestClient, verified_user: User):
+    auth_header = get_auth_header(client, verified_user.email, "password1234")
+    resp = client.post(
+        "/api/v1/users/me/referral_code",
+        headers=auth_header,
+        json={"expires_in_seconds": 3600},
+    )
+    assert resp.status_code == 200
+    resp = client.get("/api/v1/users/me/referral_code", headers=auth_header)
+    assert resp.status_code == 200
+    etag = resp.headers["ETag"]
+
+    resp = client.delete("/api/v1/users/me/referral_code", headers=auth_header)
+    assert resp.status_code == 204
+    resp = client.get(
+        "/api/v1/users/me/referral_code", headers={**auth_header, "If-None-Match": etag}
+    )
+    assert resp.status_code == 400, "Deleting the code changes the ETag"
+    assert "ETag" not in resp.headers
+
+
+def test_conditional_get_without_token(client: TestClient):
+    resp = client.get("/api/v1/users/me", headers={"If-None-Match": "*"})
+    assert resp.status_code == 401
+    assert "ETag" not in resp.headers
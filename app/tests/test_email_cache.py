@@ -0,0 +1,30 @@
+from fastapi.testclient import TestClient
+
+from app.core.auth.email_cache import EmailCache
+from app.db.models.user import User
+from app.tests.test_user import get_auth_header
+
+
+def test_email_cache(client: TestClient, verified_user: User):
+    email_cache = EmailCache(client.app.state.redis)
+    client.portal.call(email_cache.delete, verified_user.email)
+
+    auth_header = get_auth_header(client, verified_user.email.upper(), "password1234")
+    assert client.portal.call(email_cache.get, verified_user.email) == verified_user.id
+
+    resp = client.patch(
+        "/api/v1/users/me",
+        headers=auth_header,
+        json={"email": "new@email.com", "name": "John", "surname": "Doe"},
+    )
+    assert resp.status_code == 200
+    assert client.portal.call(email_cache.get, verified_user.email) is None
+
+    resp = client.post(
+        "/api/v1/auth/login",
+        data={"username": verified_user.email, "password": "password1234"},
+        files={"none": ""},
+    )
+    assert resp.status_code == 400
+    get_auth_header(client, "new@email.com", "password1234")
+    client.portal.call(email_cache.delete, "new@email.com")
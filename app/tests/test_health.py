@@ -0,0 +1,63 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.health.settings import settings as health_settings
+from app.db.models.user import User
+from app.tests.test_user import get_auth_header
+
+
+def test_liveness(client: TestClient):
+    resp = client.get("/api/health")
+    assert resp.status_code == 200
+    assert resp.json()["status"] == "ok"
+
+
+def test_readiness(
+    client: TestClient,
+    verified_user: User,
+    admin_user: User,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    resp = client.get("/api/ready")
+    assert resp.status_code == 200
+    assert resp.json() == {"status": "ready"}, "Details aren't public"
+
+    auth_header = get_auth_header(client, verified_user.email, "password1234")
+    assert client.get("/api/v1/admin/health", headers=auth_header).status_code == 403
+    auth_header = get_auth_header(client, admin_user.email, "password1234")
+    resp = client.get("/api/v1/admin/health", headers=auth_header)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["status"] == "ready"
+    assert data["checks"]["database"]["ok"]
+    assert data["checks"]["redis"]["ok"]
+    assert data["breakers"]["referral_codes"] == "closed"
+    assert "saturation" in data["database_pool"]
+
+    # Probe results are reused instead of hitting the dependencies again
+    checked_at = client.app.state.health.probes[0].result.checked_at
+    client.get("/api/ready")
+    assert client.app.state.health.probes[0].result.checked_at == checked_at
+
+    monkeypatch.setattr(client.app.state, "ready", False)
+    resp = client.get("/api/ready")
+    assert resp.status_code == 503, "Draining workers aren't ready"
+
+
+def test_readiness_dependency_down(
+    client: TestClient, admin_user: User, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(health_settings, "HEALTH_PROBE_INTERVAL", 0)
+    monkeypatch.setattr(health_settings, "HEALTH_REQUIRED_CHECKS", ["redis"])
+
+    async def down():
+        raise ConnectionError("down")
+
+    monkeypatch.setattr(client.app.state.health.probes[1], "check", down)
+    resp = client.get("/api/ready")
+    assert resp.status_code == 503
+    assert "down" not in resp.text
+
+    auth_header = get_auth_header(client, admin_user.email, "password1234")
+    resp = client.get("/api/v1/admin/health", headers=auth_header)
+    assert "down" in resp.json()["checks"]["redis"]["error"]
@@ -0,0 +1,102 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from fastapi_users.jwt import generate_jwt
+
+from app.core.auth.auth import access_strategy
+from app.core.idempotency.settings import settings as idempotency_settings
+from app.core.idempotency.store import IN_PROGRESS, Record
+from app.db.models.user import User
+from app.tests.test_user import get_auth_header
+
+
+def register_json(email: str, name: str = "MyName") -> dict:
+    return {
+        "user_create": {
+            "email": email,
+            "password": "somepass",
+            "name": name,
+            "surname": "MySurname",
+        }
+    }
+
+
+@pytest.fixture
+def idempotency_prefix(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        idempotency_settings, "IDEMPOTENCY_REDIS_PREFIX", f"test:{uuid.uuid4()}:"
+    )
+
+
+def test_idempotent_register(client: TestClient, idempotency_prefix):
+    body = register_json("idempotent1@mail.com")
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    resp = client.post("/api/v1/auth/register", json=body, headers=headers)
+    assert resp.status_code == 201
+    assert "Idempotent-Replayed" not in resp.headers
+
+    replay = client.post("/api/v1/auth/register", json=body, headers=headers)
+    assert replay.status_code == 201
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.json() == resp.json()
+
+    resp = client.post(
+        "/api/v1/auth/register",
+        json=register_json("idempotent1@mail.com", "Other"),
+        headers=headers,
+    )
+    assert resp.status_code == 422
+
+    resp = client.post("/api/v1/auth/register", json=body)
+    assert resp.status_code == 400, "Requests without a key aren't replayed"
+
+
+def test_idempotent_referral_code(
+    client: TestClient, verified_user: User, idempotency_prefix
+):
+    auth_header = get_auth_header(client, verified_user.email, "password1234")
+    # The client refreshes its access token before retrying
+    refreshed_token = generate_jwt(
+        {"sub": str(verified_user.id), "aud": access_strategy.token_audience},
+        access_strategy.encode_key,
+        access_strategy.lifetime_seconds + 1,
+        algorithm=access_strategy.algorithm,
+    )
+    codes = [
+        client.post(
+            "/api/v1/users/me/referral_code",
+            headers={**headers, "Idempotency-Key": "create-code"},
+            json={"expires_in_seconds": 100},
+        )
+        for headers in (auth_header, {"Authorization": f"Bearer {refreshed_token}"})
+    ]
+    assert [resp.status_code for resp in codes] == [200, 200]
+    assert codes[0].json() == codes[1].json()
+    assert codes[1].headers["idempotent-replayed"] == "true"
+
+
+def test_idempotency_in_progress(
+    client: TestClient, idempotency_prefix, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(idempotency_settings, "IDEMPOTENCY_WAIT", 0.2)
+    redis = client.app.state.redis
+    body = register_json("idempotent2@mail.com")
+    headers = {"Idempotency-Key": "in-progress"}
+    resp = client.post("/api/v1/auth/register", json=body, headers=headers)
+    assert resp.status_code == 201
+
+    # Turn the completed record into one of a request still running
+    (key,) = client.portal.call(
+        redis.keys, f"{idempotency_settings.IDEMPOTENCY_REDIS_PREFIX}*"
+    )
+    record = Record.loads(client.portal.call(redis.get, key))
+    client.portal.call(redis.set, key, Record(IN_PROGRESS, record.fingerprint).dumps())
+
+    resp = client.post("/api/v1/auth/register", json=body, headers=headers)
+    assert resp.status_code == 409
+
+    # The running request failed and released the key
+    client.portal.call(redis.delete, key)
+    resp = client.post("/api/v1/auth/register", json=body, headers=headers)
+    assert resp.status_code == 400
@@ -0,0 +1,254 @@
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+from fastapi_users.password import PasswordHelper
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.db.models.user import User
+from app.db.redis import create_redis_client
+from app.jobs.mail import Mail
+from app.jobs.queue import JobQueue
+from app.jobs.settings import JobSettings
+from app.jobs.settings import settings as job_settings
+from app.jobs.worker import SEND_EMAIL, JobWorker
+from app.ref_code_manager import ReferralCodeManager
+from app.tests.test_user import get_auth_header
+
+
+class FlakyTransport:
+    def __init__(self):
+        self.sent: list[Mail] = []
+
+    async def send_batch(self, mails: list[Mail]) -> list[Exception | None]:
+        results = []
+        for mail in mails:
+            if mail.to.startswith("broken"):
+                results.append(OSError("Mailbox unavailable"))
+            else:
+                self.sent.append(mail)
+                results.append(None)
+        return results
+
+
+@pytest.mark.asyncio
+async def test_worker_retries_and_dead_letters():
+    redis = create_redis_client()
+    settings = JobSettings(
+        JOBS_REDIS_PREFIX=f"test:{uuid.uuid4()}:",
+        JOBS_MAX_ATTEMPTS=2,
+        JOBS_BACKOFF_BASE=0,
+        JOBS_POLL_TIMEOUT=0.1,
+    )
+    job_queue = JobQueue(redis, settings)
+    transport = FlakyTransport()
+    worker = JobWorker(job_queue, transport)
+
+    try:
+        for to in ("ok@email.com", "broken@email.com"):
+            await job_queue.enqueue(SEND_EMAIL, {"to": to, "subject": "S", "body": "B"})
+
+        assert await worker.run_once() == 2
+        assert [mail.to for mail in transport.sent] == ["ok@email.com"]
+        assert await redis.zcard(job_queue.key("default", "delayed")) == 1
+
+        assert await worker.run_once() == 1
+        assert await worker.run_once() == 0
+        assert await redis.llen(job_queue.key("default", "processing")) == 0
+
+        dead = await redis.lrange(job_queue.key("default", "dead"), 0, -1)
+        assert len(dead) == 1
+        assert orjson.loads(dead[0])["attempts"] == 2
+    finally:
+        await redis.delete(
+            *(job_queue.key("default", kind) for kind in ("delayed", "dead"))
+        )
+        await redis.aclose()
+
+
+class SlowTransport(FlakyTransport):
+    def __init__(self):
+        super().__init__()
+        self.started = asyncio.Event()
+
+    async def send_batch(self, mails: list[Mail]) -> list[Exception | None]:
+        self.started.set()
+        await asyncio.sleep(0.2)
+        return await super().send_batch(mails)
+
+
+@pytest.mark.asyncio
+async def test_stopped_worker_finishes_its_batch():
+    redis = create_redis_client()
+    settings = JobSettings(
+        JOBS_REDIS_PREFIX=f"test:{uuid.uuid4()}:", JOBS_POLL_TIMEOUT=0.1
+    )
+    job_queue = JobQueue(redis, settings)
+    transport = SlowTransport()
+    worker = JobWorker(job_queue, transport)
+
+    try:
+        await job_queue.enqueue(
+            SEND_EMAIL, {"to": "ok@email.com", "subject": "S", "body": "B"}
+        )
+        task = asyncio.create_task(worker.run())
+        await transport.started.wait()
+        worker.stopping.set()
+        await asyncio.wait_for(task, 1)
+
+        assert [mail.to for mail in transport.sent] == ["ok@email.com"]
+        assert await redis.llen(job_queue.key("default", "processing")) == 0
+    finally:
+        await redis.aclose()
+
+
+@pytest.mark.asyncio
+async def test_malformed_jobs_are_dead_lettered():
+    redis = create_redis_client()
+    settings = JobSettings(
+        JOBS_REDIS_PREFIX=f"test:{uuid.uuid4()}:", JOBS_POLL_TIMEOUT=0.1
+    )
+    job_queue = JobQueue(redis, settings)
+    transport = FlakyTransport()
+    worker = JobWorker(job_queue, transport)
+
+    try:
+        await redis.lpush(job_queue.key("default"), "not json")
+        await job_queue.enqueue(
+            SEND_EMAIL, {"to": "ok@email.com", "subject": "S", "body": "B"}
+        )
+        assert await worker.run_once() == 1
+        assert [mail.to for mail in transport.sent] == ["ok@email.com"]
+        assert await redis.lrange(job_queue.key("default", "dead"), 0, -1) == [
+            "not json"
+        ]
+        assert await redis.llen(job_queue.key("default", "processing")) == 0
+        assert await redis.zcard(job_queue.key("default", "reserved")) == 0
+    finally:
+        await redis.delete(job_queue.key("default", "dead"))
+        await redis.aclose()
+
+
+@pytest.mark.asyncio
+async def test_expired_reservations_are_requeued():
+    redis = create_redis_client()
+    settings = JobSettings(
+        JOBS_REDIS_PREFIX=f"test:{uuid.uuid4()}:",
+        JOBS_POLL_TIMEOUT=0.1,
+        JOBS_VISIBILITY_TIMEOUT=60,
+    )
+    job_queue = JobQueue(redis, settings)
+
+    try:
+        job_id = await job_queue.enqueue(SEND_EMAIL, {"to": "ok@email.com"})
+        # Reserved by a worker that died without handling it
+        [job] = await job_queue.reserve()
+        assert await job_queue.requeue_expired() == 0, "The reservation is fresh"
+
+        await redis.zadd(job_queue.key("default", "reserved"), {job.raw: 0})
+        assert await job_queue.requeue_expired() == 1
+        assert await redis.llen(job_queue.key("default", "processing")) == 0
+        [job] = await job_queue.reserve()
+        assert job.id == job_id
+        await job_queue.ack(job)
+        assert await redis.zcard(job_queue.key("default", "reserved")) == 0
+    finally:
+        await redis.aclose()
+
+
+def test_register_enqueues_welcome_email(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch, tmp_path
+):
+    monkeypatch.setattr(
+        job_settings, "JOBS_REDIS_PREFIX", f"test:{uuid.uuid4()}:", raising=True
+    )
+    email = f"{uuid.uuid4().hex[:12]}@mail.com"
+    resp = client.post(
+        "/api/v1/auth/register",
+        json={
+            "user_create": {
+                "email": email,
+                "password": "somepass",
+                "name": "MyName",
+                "surname": "MySurname",
+            }
+        },
+    )
+    assert resp.status_code == 201
+
+    redis = client.app.state.redis
+    job_queue = JobQueue(redis)
+    jobs = client.portal.call(job_queue.reserve)
+    assert [(job.type, job.payload["to"]) for job in jobs] == [(SEND_EMAIL, email)]
+
+    path = tmp_path / "mail.jsonl"
+    monkeypatch.setattr(job_settings, "MAIL_FILE_PATH", str(path))
+    worker = JobWorker(job_queue)
+    try:
+        client.portal.call(worker.handlers[SEND_EMAIL], jobs)
+        with open(path, "rb") as file:
+            assert orjson.loads(file.readline())["to"] == email
+    finally:
+        client.portal.call(job_queue.ack, jobs[0])
+
+
+def test_delete_referrer_in_background(
+    client: TestClient,
+    verified_user: User,
+    admin_user: User,
+    session: Session,
+    async_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(job_settings, "JOBS_REDIS_PREFIX", f"test:{uuid.uuid4()}:")
+    monkeypatch.setattr(job_settings, "USER_CLEANUP_INLINE_MAX_REFERRALS", 0)
+    referral = User(
+        email="referral@mail.com",
+        hashed_password=PasswordHelper().hash("somepass"),
+        name="MyName",
+        surname="MySurname",
+        referrer_id=verified_user.id,
+    )
+    session.add(referral)
+    session.commit()
+
+    redis = client.app.state.redis
+    ref_code_manager = ReferralCodeManager(redis)
+    ref_code = client.portal.call(ref_code_manager.create, verified_user.id, 100)
+
+    auth_header = get_auth_header(client, admin_user.email, "password1234")
+    resp = client.delete(f"/api/v1/users/{verified_user.id}", headers=auth_header)
+    assert resp.status_code == 204
+
+    resp = client.post(
+        "/api/v1/auth/login",
+        data={"username": verified_user.email, "password": "password1234"},
+        files={"none": ""},
+    )
+    assert resp.status_code == 400, "Deleted user should be deactivated at once"
+
+    @asynccontextmanager
+    async def session_factory():
+        yield async_session
+
+    worker = JobWorker(JobQueue(redis), session_factory=session_factory)
+    assert client.portal.call(worker.run_once) == 1
+
+    async def load_users():
+        async_session.expire_all()
+        return (await async_session.scalars(select(User))).unique().all()
+
+    users = {user.id: user for user in client.portal.call(load_users)}
+    assert verified_user.id not in users
+    assert users[referral.id].referrer_id is None
+    assert (
+        client.portal.call(ref_code_manager.retieve_user_id_by_code, ref_code) is None
+    )
+
+    session.delete(referral)
+    session.commit()
@@ -0,0 +1,168 @@
+import uuid
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.user import User
+from app.jobs.queue import JobQueue
+from app.jobs.settings import settings as job_settings
+from app.jobs.worker import JobWorker
+from app.leaderboard.leaderboard import Leaderboard
+from app.leaderboard.settings import settings as leaderboard_settings
+from app.tests.test_user import get_auth_header
+
+
+@pytest.fixture(autouse=True)
+def leaderboard_prefix(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(
+        leaderboard_settings, "LEADERBOARD_REDIS_PREFIX", f"test:{uuid.uuid4()}:"
+    )
+    monkeypatch.setattr(job_settings, "JOBS_REDIS_PREFIX", f"test:{uuid.uuid4()}:")
+
+
+def get_board(
+    client: TestClient, auth_header: dict, period: str
+) -> list[tuple[str, int]]:
+    resp = client.get(
+        "/api/v1/referrals/leaderboard", headers=auth_header, params={"period": period}
+    )
+    assert resp.status_code == 200
+    return [(entry["user_id"], entry["referrals"]) for entry in resp.json()["entries"]]
+
+
+def test_leaderboard(client: TestClient, verified_user: User, admin_user: User):
+    auth_header = get_auth_header(client, verified_user.email, "password1234")
+    resp = client.post(
+        "/api/v1/users/me/referral_code",
+        headers=auth_header,
+        json={"expires_in_seconds": 100},
+    )
+    resp = client.post(
+        "/api/v1/auth/register",
+        json={
+            "user_create": {
+                "email": "leaderboard@mail.com",
+                "password": "somepass",
+                "name": "MyName",
+                "surname": "MySurname",
+            },
+            "referral_code": resp.json()["referral_code"],
+        },
+    )
+    referral_id = resp.json()["id"]
+    client.delete("/api/v1/users/me/referral_code", headers=auth_header)
+    assert (
+        get_board(client, auth_header, "all") == []
+    ), "Unverified referrals don't count"
+
+    admin_header = get_auth_header(client, admin_user.email, "password1234")
+    resp = client.patch(
+        f"/api/v1/users/{referral_id}",
+        headers=admin_header,
+        json={"is_verified": True, "name": "MyName", "surname": "MySurname"},
+    )
+    assert resp.status_code == 200
+
+    for period in ("day", "week", "all"):
+        assert get_board(client, auth_header, period) == [(str(verified_user.id), 1)]
+
+    resp = client.delete(f"/api/v1/users/{referral_id}", headers=admin_header)
+    assert resp.status_code == 204
+    for period in ("day", "all"):
+        assert get_board(client, auth_header, period) == []
+
+
+def test_leaderboard_hides_inactive_users(
+    client: TestClient, verified_user: User, admin_user: User, session
+):
+    resp = client.get("/api/v1/referrals/leaderboard")
+    assert resp.status_code == 401
+
+    auth_header = get_auth_header(client, admin_user.email, "password1234")
+    referral = User(
+        email="inactive-referral@mail.com",
+        hashed_password="x",
+        name="MyName",
+        surname="MySurname",
+        referrer_id=verified_user.id,
+    )
+    session.add(referral)
+    session.commit()
+    resp = client.patch(
+        f"/api/v1/users/{referral.id}",
+        headers=auth_header,
+        json={"is_verified": True, "name": "MyName", "surname": "MySurname"},
+    )
+    assert resp.status_code == 200
+    assert get_board(client, auth_header, "all") == [(str(verified_user.id), 1)]
+
+    resp = client.patch(
+        f"/api/v1/users/{verified_user.id}",
+        headers=auth_header,
+        json={"is_active": False, "name": "John", "surname": "Doe"},
+    )
+    assert resp.status_code == 200
+    assert get_board(client, auth_header, "all") == []
+
+    session.delete(referral)
+    session.commit()
+
+
+def test_leaderboard_rebuild(
+    client: TestClient,
+    verified_user: User,
+    session,
+    async_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(leaderboard_settings, "LEADERBOARD_REBUILD_BATCH_SIZE", 1)
+    referrals = [
+        User(
+            email=f"referral{i}@mail.com",
+            hashed_password="x",
+            name="MyName",
+            surname="MySurname",
+            is_verified=is_verified,
+            referrer_id=referrer_id,
+        )
+        for i, (is_verified, referrer_id) in enumerate(
+            [
+                (True, verified_user.id),
+                (True, verified_user.id),
+                (False, verified_user.id),
+            ]
+        )
+    ]
+    session.add_all(referrals)
+    session.commit()
+    for referral in referrals[:2]:
+        referrals.append(
+            User(
+                email=f"second-{referral.email}",
+                hashed_password="x",
+                name="MyName",
+                surname="MySurname",
+                is_verified=True,
+                referrer_id=referral.id,
+            )
+        )
+    session.add_all(referrals[3:])
+    session.commit()
+
+    @asynccontextmanager
+    async def session_factory():
+        yield async_session
+
+    redis = client.app.state.redis
+    worker = JobWorker(JobQueue(redis), session_factory=session_factory)
+    client.portal.call(worker.rebuild_leaderboard, [])
+
+    board = client.portal.call(Leaderboard(redis).top, "all", 10)
+    assert board[0] == (verified_user.id, 2)
+    assert sorted(board[1:]) == sorted((referral.id, 1) for referral in referrals[:2])
+
+    for referral in reversed(referrals):
+        session.delete(referral)
+    session.commit()
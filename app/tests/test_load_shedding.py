@@ -0,0 +1,29 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.load_shedding.settings import settings as load_shedding_settings
+
+
+def test_shed_when_overloaded(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(load_shedding_settings, "LOAD_SHEDDING_ENABLED", True)
+    monkeypatch.setattr(load_shedding_settings, "LOAD_SHEDDING_MAX_IN_FLIGHT", 0)
+
+    resp = client.get("/api/v1/users/me")
+
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == str(
+        load_shedding_settings.LOAD_SHEDDING_RETRY_AFTER
+    )
+
+    resp = client.get("/metrics")
+
+    assert resp.status_code == 200
+    assert 'http_requests_shed_total{reason="in_flight"}' in resp.text
+
+
+def test_metrics_export_loop_lag(client: TestClient):
+    resp = client.get("/metrics")
+
+    assert resp.status_code == 200
+    assert "# TYPE event_loop_lag_seconds histogram" in resp.text
+    assert 'event_loop_lag_seconds_bucket{le="+Inf"}' in resp.text
@@ -0,0 +1,46 @@
+import logging
+import queue
+
+import orjson
+
+from app.core.log.handlers import (
+    DebugSamplingFilter,
+    DroppingQueueHandler,
+    JsonFormatter,
+    dropped_records,
+)
+
+
+def make_record(level: int = logging.INFO, **extra) -> logging.LogRecord:
+    record = logging.makeLogRecord(
+        {"name": "app.test", "levelno": level, "msg": "Hello %s", "args": ("world",)}
+    )
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter():
+    data = orjson.loads(JsonFormatter().format(make_record(route="/api/v1/users/me")))
+
+    assert data["message"] == "Hello world"
+    assert data["logger"] == "app.test"
+    assert data["route"] == "/api/v1/users/me"
+
+
+def test_queue_handler_drops_when_full():
+    handler = DroppingQueueHandler(queue.Queue(1))
+    dropped_before = dropped_records._default.value
+
+    handler.handle(make_record())
+    handler.handle(make_record())
+
+    assert handler.queue.qsize() == 1
+    assert handler.queue.get_nowait().msg == "Hello world"
+    assert dropped_records._default.value == dropped_before + 1
+
+
+def test_debug_sampling():
+    sampling_filter = DebugSamplingFilter(0)
+
+    assert sampling_filter.filter(make_record(logging.INFO))
+    assert not sampling_filter.filter(make_record(logging.DEBUG))
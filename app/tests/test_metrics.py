@@ -0,0 +1,29 @@
+from fastapi.testclient import TestClient
+
+from app.db.models.user import User
+from app.tests.test_user import get_auth_header
+
+
+def test_metrics(client: TestClient, verified_user: User):
+    auth_header = get_auth_header(client, verified_user.email, "password1234")
+    client.get("/api/v1/users/me/referral_code", headers=auth_header)
+
+    resp = client.get("/metrics")
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+
+    text = resp.text
+    assert (
+        'http_requests_total{method="GET",route="/api/v1/users/me/referral_code",'
+        'status="400"}' in text
+    )
+    assert (
+        'http_request_duration_seconds_count{method="POST",'
+        'route="/api/v1/auth/login"}' in text
+    )
+    assert 'redis_command_duration_seconds_count{command="GET"}' in text
+    assert (
+        'referral_code_operations_total{operation="retrieve_code",result="miss"}'
+        in text
+    )
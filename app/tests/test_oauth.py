@@ -0,0 +1,87 @@
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.auth.oauth2 import (
+    get_github_oauth_client,
+    get_google_oauth_client,
+    oauth_request_duration,
+)
+from app.core.auth.user_db import MySQLAlchemyUserDatabase
+from app.core.http.client import http_client
+from app.db.models.oauth_account import OAuthAccount
+from app.db.models.user import User
+
+
+def mock_provider(request: httpx.Request) -> httpx.Response:
+    if request.url.path.endswith("/token"):
+        return httpx.Response(200, json={"access_token": "google-token"})
+    if request.url.path == "/user":
+        assert request.headers["Authorization"] == "token github-token"
+        return httpx.Response(200, json={"id": 42, "email": None})
+    if request.url.path == "/user/emails":
+        return httpx.Response(
+            200,
+            json=[
+                {"email": "secondary@email.com"},
+                {"email": "primary@email.com", "primary": True},
+            ],
+        )
+    return httpx.Response(404)
+
+
+@pytest.mark.asyncio
+async def test_oauth_clients_share_http_client():
+    clients: set[int] = set()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        clients.add(id(http_client.client))
+        return mock_provider(request)
+
+    http_client.start(httpx.MockTransport(handler))
+    histogram = oauth_request_duration.labels("github", "profile")
+    observed_before = histogram.count
+    try:
+        token = await get_google_oauth_client().get_access_token(
+            "code", "http://localhost"
+        )
+        assert token["access_token"] == "google-token"
+
+        assert await get_github_oauth_client().get_id_email("github-token") == (
+            "42",
+            "primary@email.com",
+        )
+    finally:
+        await http_client.aclose()
+
+    assert len(clients) == 1
+    assert histogram.count == observed_before + 1
+
+
+@pytest.mark.asyncio
+async def test_get_by_oauth_account(
+    session: Session, async_session: AsyncSession, verified_user: User
+):
+    oauth_accounts = [
+        OAuthAccount(
+            oauth_name=oauth_name,
+            access_token="token",
+            account_id=account_id,
+            account_email=verified_user.email,
+            user_id=verified_user.id,
+        )
+        for oauth_name, account_id in (("google", "1"), ("github", "2"))
+    ]
+    session.add_all(oauth_accounts)
+    session.commit()
+    user_db = MySQLAlchemyUserDatabase(async_session, User, OAuthAccount)
+
+    user = await user_db.get_by_oauth_account("github", "2")
+    assert user.id == verified_user.id
+    assert len(user.oauth_accounts) == 2
+    assert await user_db.get_by_oauth_account("google", "2") is None
+
+    for oauth_account in oauth_accounts:
+        session.delete(oauth_account)
+    session.commit()
@@ -0,0 +1,39 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.profiling.settings import settings as profiling_settings
+from app.db.models.user import User
+from app.tests.test_user import get_auth_header
+
+
+def test_profile_inline(client: TestClient, admin_user: User):
+    auth_header = get_auth_header(client, admin_user.email, "password1234")
+
+    resp = client.get(
+        "/api/v1/users/me", headers={**auth_header, "X-Profile": "inline"}
+    )
+
+    assert resp.status_code == 200
+    assert resp.headers["X-Profile-Status"] == "200"
+    assert resp.headers["content-type"].startswith("text/plain")
+
+
+def test_profile_to_file(
+    client: TestClient, admin_user: User, monkeypatch: pytest.MonkeyPatch, tmp_path
+):
+    monkeypatch.setattr(profiling_settings, "PROFILING_DIR", str(tmp_path))
+    auth_header = get_auth_header(client, admin_user.email, "password1234")
+
+    resp = client.get("/api/v1/users/me", headers={**auth_header, "X-Profile": "1"})
+
+    assert resp.status_code == 200
+    assert resp.json()["email"] == admin_user.email
+    assert (tmp_path / resp.headers["X-Profile-File"]).exists()
+
+
+def test_profile_forbidden(client: TestClient, verified_user: User):
+    auth_header = get_auth_header(client, verified_user.email, "password1234")
+
+    resp = client.get("/api/v1/users/me", headers={**auth_header, "X-Profile": "1"})
+
+    assert resp.status_code == 403
@@ -0,0 +1,45 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.rate_limit.limiter import LocalBlocklist
+from app.core.rate_limit.settings import settings as rate_limit_settings
+
+
+def test_local_blocklist():
+    blocklist = LocalBlocklist(max_size=2)
+
+    assert blocklist.retry_after(["a"]) == 0
+
+    blocklist.block("a", 10)
+    assert 0 < blocklist.retry_after(["a", "b"]) <= 10
+
+    blocklist.block("b", -1)
+    assert blocklist.retry_after(["b"]) == 0
+
+    blocklist.block("c", 10)
+    blocklist.block("d", 10)
+    assert blocklist.retry_after(["a"]) == 0, "Oldest entry should be evicted"
+
+
+def test_login_rate_limit(client: TestClient, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(rate_limit_settings, "RATE_LIMIT_ENABLED", True)
+    email = f"{uuid.uuid4()}@email.com"
+
+    for _ in range(5):
+        resp = client.post(
+            "/api/v1/auth/login",
+            data={"username": email, "password": "wrong"},
+            files={"none": ""},
+        )
+        assert resp.status_code == 400
+
+    resp = client.post(
+        "/api/v1/auth/login",
+        data={"username": email.upper(), "password": "wrong"},
+        files={"none": ""},
+    )
+
+    assert resp.status_code == 429
+    assert int(resp.headers["Retry-After"]) > 0
@@ -0,0 +1,76 @@
+import asyncio
+import uuid
+
+import orjson
+import pytest
+
+from app.db.redis import create_redis_client
+from app.referral_events.events import ReferralEventHub, ReferralEvents, stream_events
+from app.referral_events.settings import ReferralEventsSettings
+
+
+def parse(chunk: str) -> tuple[str, dict]:
+    fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines())
+    return fields["id"], orjson.loads(fields["data"])
+
+
+@pytest.mark.asyncio
+async def test_referral_event_stream():
+    settings = ReferralEventsSettings(
+        REFERRAL_EVENTS_REDIS_PREFIX=f"test:{uuid.uuid4()}:",
+        REFERRAL_EVENTS_CHANNEL=f"test:{uuid.uuid4()}",
+        REFERRAL_EVENTS_HEARTBEAT=0.2,
+        REFERRAL_EVENTS_QUEUE_SIZE=1,
+    )
+    redis = create_redis_client()
+    events = ReferralEvents(redis, settings)
+    hub = ReferralEventHub(settings)
+    hub.start(redis)
+    referrer_id = uuid.uuid4()
+    try:
+        first_id = await events.publish(referrer_id, "signup", {"n": 1})
+        await events.publish(referrer_id, "signup", {"n": 2})
+
+        stream = stream_events(hub, events, referrer_id, first_id)
+        assert (await anext(stream)).startswith("retry: ")
+        _, data = parse(await anext(stream))
+        assert data == {"type": "signup", "n": 2}, "Missed events are replayed"
+
+        # Give the subscription time to receive published events
+        assert await anext(stream) == ": heartbeat\n\n"
+        await events.publish(referrer_id, "verified", {"n": 3})
+        _, data = parse(await anext(stream))
+        assert data == {"type": "verified", "n": 3}
+
+        # The client doesn't read while two events arrive
+        await events.publish(referrer_id, "signup", {"n": 4})
+        await events.publish(referrer_id, "signup", {"n": 5})
+        await asyncio.sleep(0.1)
+        _, data = parse(await anext(stream))
+        assert data["n"] == 4
+        with pytest.raises(StopAsyncIteration):
+            await anext(stream)
+        assert hub.count == 0
+    finally:
+        await hub.stop()
+        await redis.delete(events.history_key(referrer_id))
+        await redis.aclose()
+
+
+@pytest.mark.asyncio
+async def test_streams_end_on_close():
+    settings = ReferralEventsSettings(REFERRAL_EVENTS_HEARTBEAT=10)
+    redis = create_redis_client()
+    hub = ReferralEventHub(settings)
+    try:
+        stream = stream_events(hub, ReferralEvents(redis, settings), uuid.uuid4())
+        assert (await anext(stream)).startswith("retry: ")
+        waiting = asyncio.create_task(anext(stream))
+        await asyncio.sleep(0.01)
+
+        hub.close()
+        with pytest.raises(StopAsyncIteration):
+            await asyncio.wait_for(waiting, 1)
+        assert hub.count == 0
+    finally:
+        await redis.aclose()
@@ -0,0 +1,106 @@
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.referral_code_stats import ReferralCodeStats
+from app.db.models.user import User
+from app.jobs.queue import JobQueue
+from app.jobs.scheduler import JobScheduler
+from app.jobs.settings import JobSettings
+from app.jobs.worker import ROLLUP_REFERRAL_STATS, JobWorker
+from app.referral_stats.settings import settings as stats_settings
+from app.tests.test_user import get_auth_header
+
+
+def register(client: TestClient, email: str, referral_code: str) -> int:
+    resp = client.post(
+        "/api/v1/auth/register",
+        json={
+            "user_create": {
+                "email": email,
+                "password": "somepass",
+                "name": "MyName",
+                "surname": "MySurname",
+            },
+            "referral_code": referral_code,
+        },
+    )
+    return resp.status_code
+
+
+def test_referral_code_stats(
+    client: TestClient,
+    verified_user: User,
+    async_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(
+        stats_settings, "REFERRAL_STATS_REDIS_PREFIX", f"test:{uuid.uuid4()}:"
+    )
+    auth_header = get_auth_header(client, verified_user.email, "password1234")
+    resp = client.post(
+        "/api/v1/users/me/referral_code",
+        headers=auth_header,
+        json={"expires_in_seconds": 100},
+    )
+    ref_code = resp.json()["referral_code"]
+
+    assert register(client, "stats@mail.com", ref_code) == 201
+    assert register(client, "stats@mail.com", ref_code) == 400
+    client.delete("/api/v1/users/me/referral_code", headers=auth_header)
+
+    def get_stats():
+        resp = client.get("/api/v1/users/me/referral_code/stats", headers=auth_header)
+        assert resp.status_code == 200
+        return resp.json()
+
+    stats = get_stats()
+    assert (stats["clicks"], stats["conversions"]) == (2, 1)
+    assert len(stats["buckets"]) == 1
+    assert stats["buckets"][0]["code"] == ref_code
+    assert stats["buckets"][0]["unique_visitors"] == 1
+
+    @asynccontextmanager
+    async def session_factory():
+        yield async_session
+
+    worker = JobWorker(
+        JobQueue(client.app.state.redis), session_factory=session_factory
+    )
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 3600)
+    client.portal.call(worker.rollup_referral_stats, [])
+    monkeypatch.setattr(time, "time", lambda: now)
+
+    async def load_rows():
+        return (await async_session.scalars(select(ReferralCodeStats))).all()
+
+    rows = client.portal.call(load_rows)
+    assert [(row.code, row.clicks, row.conversions) for row in rows] == [
+        (ref_code, 2, 1)
+    ]
+    assert get_stats() == stats
+
+    async def cleanup():
+        await async_session.execute(delete(ReferralCodeStats))
+        await async_session.execute(delete(User).where(User.email == "stats@mail.com"))
+        await async_session.commit()
+
+    client.portal.call(cleanup)
+
+
+def test_scheduler_enqueues_once_per_interval(client: TestClient):
+    settings = JobSettings(JOBS_REDIS_PREFIX=f"test:{uuid.uuid4()}:")
+    job_queue = JobQueue(client.app.state.redis, settings)
+    schedulers = [
+        JobScheduler(job_queue, {ROLLUP_REFERRAL_STATS: 3600}) for _ in range(2)
+    ]
+
+    assert client.portal.call(schedulers[0].tick, 7200) == [ROLLUP_REFERRAL_STATS]
+    assert client.portal.call(schedulers[1].tick, 7300) == []
+    assert client.portal.call(schedulers[1].tick, 10800) == [ROLLUP_REFERRAL_STATS]
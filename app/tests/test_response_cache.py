@@ -0,0 +1,57 @@
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.core.conditional_get.versions import UserVersions
+from app.core.response_cache.cache import ResponseCache
+from app.core.response_cache.settings import ResponseCacheSettings
+from app.core.response_cache.settings import settings as response_cache_settings
+
+
+def test_response_cache(client: TestClient):
+    redis = client.app.state.redis
+    settings = ResponseCacheSettings(
+        RESPONSE_CACHE_REDIS_PREFIX=f"test:{uuid.uuid4()}:"
+    )
+    response_cache = ResponseCache(redis, settings)
+    user_id = uuid.uuid4()
+    builds = []
+
+    async def build() -> bytes:
+        builds.append(None)
+        return f'{{"builds":{len(builds)}}}'.encode()
+
+    def get() -> bytes:
+        return client.portal.call(response_cache.get_or_build, "test", user_id, build)
+
+    assert get() == b'{"builds":1}'
+    assert get() == b'{"builds":1}'
+
+    # Another request holds the rebuild lock of the outdated entry
+    client.portal.call(UserVersions(redis).bump, user_id)
+    key = response_cache.key("test", user_id)
+    client.portal.call(redis.set, f"{key}:lock", 1)
+    assert get() == b'{"builds":1}', "Stale entries are served during rebuilds"
+
+    client.portal.call(redis.delete, f"{key}:lock")
+    assert get() == b'{"builds":2}'
+    assert get() == b'{"builds":2}'
+    assert len(builds) == 2
+
+    settings.RESPONSE_CACHE_FRESH_TTL = 0
+    client.portal.call(UserVersions(redis).bump, user_id)
+    assert get() == b'{"builds":3}'
+    assert get() == b'{"builds":4}', "Expired entries are rebuilt"
+    client.portal.call(redis.delete, key)
+
+
+def test_user_referrals_not_found(client: TestClient):
+    user_id = uuid.uuid4()
+    resp = client.post(f"/api/v1/users/referrals/{user_id}")
+    assert resp.status_code == 404
+
+    redis = client.app.state.redis
+    ttl = client.portal.call(redis.ttl, UserVersions(redis).key(user_id))
+    assert (
+        ttl <= response_cache_settings.RESPONSE_CACHE_LOCK_TTL
+    ), "Versions of unknown users expire soon"
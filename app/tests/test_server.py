@@ -0,0 +1,49 @@
+import os
+import signal
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.application import fastapi_app
+from app.server.settings import ServerSettings
+from app.server.supervisor import Supervisor
+
+
+def test_ready_after_warmup(client: TestClient):
+    assert client.app.state.ready
+    assert client.app.openapi_schema is not None, "The schema is built in warmup"
+
+
+def test_worker_request_budget():
+    supervisor = Supervisor(
+        fastapi_app,
+        ServerSettings(SERVER_MAX_REQUESTS=100, SERVER_MAX_REQUESTS_JITTER=10),
+    )
+    assert supervisor.worker_count >= 1
+    assert all(100 <= supervisor.max_requests() <= 110 for _ in range(20))
+    supervisor.settings.SERVER_MAX_REQUESTS = 0
+    assert supervisor.max_requests() is None
+
+
+def test_rolling_reload(monkeypatch: pytest.MonkeyPatch):
+    supervisor = Supervisor(fastapi_app, ServerSettings(SERVER_WORKERS=2))
+    supervisor.workers = {1: 0.0, 2: 0.0}
+    spawned = iter(range(3, 10))
+    killed = []
+    monkeypatch.setattr(
+        supervisor, "spawn", lambda: supervisor.workers.update({next(spawned): 0.0})
+    )
+    monkeypatch.setattr(os, "kill", lambda pid, signum: killed.append(pid))
+
+    supervisor.handle_reload(signal.SIGHUP, None)
+    supervisor.replace_next()
+    assert len(killed) == 1 and len(supervisor.workers) == 3
+    supervisor.replace_next()
+    assert len(killed) == 1, "Waits for the replaced worker to exit"
+
+    del supervisor.workers[killed[0]]
+    supervisor.replace_next()
+    assert sorted(killed) == [1, 2]
+    del supervisor.workers[killed[1]]
+    supervisor.replace_next()
+    assert sorted(supervisor.workers) == [3, 4]
@@ -0,0 +1,78 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.auth.auth import UserManager
+from app.core.auth.user_db import MySQLAlchemyUserDatabase
+from app.core.single_flight import RedisSingleFlight, SingleFlight
+from app.db.models.oauth_account import OAuthAccount
+from app.db.models.user import User
+from app.db.redis import create_redis_client
+
+
+@pytest.mark.asyncio
+async def test_single_flight():
+    single_flight = SingleFlight("test")
+    calls = []
+    release = asyncio.Event()
+
+    async def lookup() -> int:
+        calls.append(None)
+        await release.wait()
+        return len(calls)
+
+    waiters = [asyncio.create_task(single_flight.do("key", lookup)) for _ in range(5)]
+    other = asyncio.create_task(single_flight.do("other", lookup))
+    await asyncio.sleep(0)
+    waiters[0].cancel()
+    release.set()
+
+    results = await asyncio.gather(*waiters[1:], other)
+    assert len(calls) == 2
+    assert set(results[:-1]) == {results[0]}, "Cancelled callers don't cancel others"
+    assert await single_flight.do("key", lookup) == 3, "Finished calls are forgotten"
+
+
+@pytest.mark.asyncio
+async def test_redis_single_flight():
+    redis = create_redis_client()
+    prefix = f"test:{uuid.uuid4()}:"
+    cache_key = f"{prefix}value"
+    refills = []
+
+    async def refill() -> str:
+        refills.append(None)
+        await asyncio.sleep(0.1)
+        await redis.set(cache_key, "filled")
+        return "filled"
+
+    try:
+        # Separate instances stand for separate workers
+        results = await asyncio.gather(
+            *(
+                RedisSingleFlight(redis, "test", poll_interval=0.01, prefix=prefix).do(
+                    "value", refill, lambda: redis.get(cache_key)
+                )
+                for _ in range(3)
+            )
+        )
+        assert results == ["filled"] * 3
+        assert len(refills) == 1
+        assert not await redis.exists(f"{prefix}test:value"), "The lock is released"
+    finally:
+        await redis.delete(cache_key)
+        await redis.aclose()
+
+
+@pytest.mark.asyncio
+async def test_user_lookup_uses_own_session(
+    async_session: AsyncSession, verified_user: User
+):
+    user_manager = UserManager(
+        MySQLAlchemyUserDatabase(async_session, User, OAuthAccount)
+    )
+    assert await user_manager.exists(verified_user.id)
+    assert not await user_manager.exists(uuid.uuid4())
+    assert not async_session.in_transaction(), "The request session isn't used"
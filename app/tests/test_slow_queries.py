@@ -0,0 +1,59 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.models.user import User
+from app.db.settings import settings as db_settings
+from app.db.slow_queries import SlowQueryLog, redact, slow_query_log, statement_shape
+from app.tests.test_user import get_auth_header
+
+
+def test_statement_shape():
+    assert statement_shape("SELECT *\n  FROM user WHERE id IN ($1, $2, $3)") == (
+        statement_shape("SELECT * FROM user WHERE id IN ($1, $2)")
+    )
+
+
+def test_redact():
+    assert redact(("secret", 1)) == ["<str>", "<int>"]
+    assert redact({"email": "a@b.c"}) == {"email": "<str>"}
+
+
+@pytest.mark.asyncio
+async def test_slow_query_sampling():
+    slow_log = SlowQueryLog(
+        db_settings.model_copy(
+            update={"SLOW_QUERY_THRESHOLD": 0, "SLOW_QUERY_SAMPLE_INTERVAL": 60}
+        )
+    )
+    engine = create_async_engine("sqlite+aiosqlite://")
+    slow_log.attach(engine)
+
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT :value"), {"value": "secret"})
+        await conn.execute(text("SELECT :value"), {"value": "other"})
+
+    await engine.dispose()
+
+    assert len(slow_log.entries) == 1
+    entry = slow_log.entries[0]
+    assert entry["parameters"] == ["<str>"]
+    assert entry["plan"] is None
+
+
+def test_slow_queries_endpoint(
+    client: TestClient, admin_user: User, verified_user: User
+):
+    slow_query_log.record("SELECT pg_sleep(1)", (), 1.0, dialect="sqlite")
+
+    auth_header = get_auth_header(client, verified_user.email, "password1234")
+    resp = client.get("/api/v1/admin/slow_queries", headers=auth_header)
+
+    assert resp.status_code == 403
+
+    auth_header = get_auth_header(client, admin_user.email, "password1234")
+    resp = client.get("/api/v1/admin/slow_queries", headers=auth_header)
+
+    assert resp.status_code == 200
+    assert resp.json()["queries"][0]["statement"] == "SELECT pg_sleep(1)"
@@ -0,0 +1,88 @@
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.tracing.exporter import SpanExporter
+from app.core.tracing.settings import TracingSettings
+from app.core.tracing.settings import settings as tracing_settings
+from app.core.tracing.tracer import exporter, start_trace
+
+
+def test_register_spans(client: TestClient, monkeypatch: pytest.MonkeyPatch, tmp_path):
+    traces_path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing_settings, "TRACING_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(tracing_settings, "TRACING_FILE_PATH", str(traces_path))
+
+    resp = client.post(
+        "/api/v1/auth/register",
+        json={
+            "user_create": {
+                "email": "traced@mail.com",
+                "password": "somepass",
+                "name": "MyName",
+                "surname": "MySurname",
+            }
+        },
+    )
+
+    assert resp.status_code == 201
+    trace_id = resp.headers["X-Trace-Id"]
+
+    client.portal.call(exporter.flush)
+    spans = [orjson.loads(line) for line in traces_path.read_bytes().splitlines()]
+    spans = {span["name"]: span for span in spans if span["traceId"] == trace_id}
+
+    root = spans["POST /api/v1/auth/register"]
+    assert "parentSpanId" not in root
+    assert spans["user.create"]["parentSpanId"] == root["spanId"]
+    assert spans["password.hash"]["parentSpanId"] == spans["user.create"]["spanId"]
+
+
+def test_traceparent_propagation(client: TestClient):
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+    resp = client.get(
+        "/api/v1/users/me",
+        headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-00"},
+    )
+
+    assert resp.headers["X-Trace-Id"] == trace_id
+
+
+def test_untrusted_parents_dont_force_sampling(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(tracing_settings, "TRACING_SAMPLE_RATE", 0.0)
+    traceparent = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+    root = start_trace("GET /", traceparent)
+    assert root.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert not root.sampled
+    assert start_trace("GET /", traceparent, trusted=True).sampled
+
+
+def test_trace_file_rotation(tmp_path):
+    traces_path = tmp_path / "traces.jsonl"
+    file_exporter = SpanExporter(
+        TracingSettings(
+            TRACING_FILE_PATH=str(traces_path),
+            TRACING_FILE_MAX_BYTES=100,
+            TRACING_FILE_BACKUPS=2,
+        )
+    )
+
+    # Every second write reaches the limit, spans 0 and 1 are dropped
+    for index in range(7):
+        file_exporter.write_file([{"name": f"span {index}", "padding": "x" * 40}])
+
+    def span_names(path):
+        return [orjson.loads(line)["name"] for line in path.read_bytes().splitlines()]
+
+    files = {
+        path.name: span_names(path)
+        for path in tmp_path.iterdir()
+        if not path.name.endswith(".lock")
+    }
+    assert files == {
+        "traces.jsonl": ["span 6"],
+        "traces.jsonl.1": ["span 4", "span 5"],
+        "traces.jsonl.2": ["span 2", "span 3"],
+    }
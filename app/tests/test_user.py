@@ -1,10 +1,18 @@
 from datetime import timedelta
+from http.cookies import SimpleCookie
 
 from fastapi.testclient import TestClient
 from fastapi_users.password import PasswordHelper
 from pydantic import TypeAdapter
 
+from app.core.auth.auth import (
+    access_strategy,
+    get_jwt_refresh_strategy,
+    get_jwt_strategy,
+    refresh_strategy,
+)
 from app.db.models.user import User
+from app.ref_code_manager import get_ref_code_manager
 
 timedelta_adapter = TypeAdapter(timedelta)
 
@@ -41,6 +49,24 @@ def test_login(client: TestClient, verified_user: User):
     assert json_data.get("access_token") is not None
 
 
+def test_refresh(client: TestClient, verified_user: User):
+    resp = client.post(
+        "/api/v1/auth/login",
+        data={"username": verified_user.email, "password": "password1234"},
+        files={"none": ""},
+    )
+    # The cookie is set for COOKIE_DOMAIN, the client wouldn't send it
+    refresh_token = SimpleCookie(resp.headers["set-cookie"])["refresh_token"].value
+
+    resp = client.post(
+        "/api/v1/auth/refresh", headers={"Cookie": f"refresh_token={refresh_token}"}
+    )
+
+    assert resp.status_code == 200
+    assert resp.json().get("access_token") is not None
+    assert "refresh_token=" in resp.headers["set-cookie"]
+
+
 def test_users_me_unverified(client: TestClient, unverified_user: User):
     auth_header = get_auth_header(client, unverified_user.email, "password1234")
 
@@ -293,3 +319,12 @@ def test_delete_referrer(
     data = resp.json()
 
     assert data.get("referrer_id") is None
+
+
+def test_dependencies_are_shared(client: TestClient):
+    redis = client.app.state.redis
+
+    ref_code_manager = client.portal.call(get_ref_code_manager, redis)
+    assert client.portal.call(get_ref_code_manager, redis) is ref_code_manager
+    assert client.portal.call(get_jwt_strategy) is access_strategy
+    assert client.portal.call(get_jwt_refresh_strategy) is refresh_strategy
@@ -0,0 +1,124 @@
+"""Dependency resolution overhead per route.
+
+Mounts do-nothing endpoints depending on the application's dependencies
+and calls them straight through ASGI, with the database session and Redis
+replaced by stand-ins that do no I/O. The overhead is the time above the
+endpoint without dependencies, i.e. what FastAPI spends resolving them.
+
+    python -m benchmarks.dependencies --iterations 20000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Annotated
+
+from fastapi import Depends, FastAPI
+from redis.asyncio import Redis
+
+from app.core.auth.auth import (
+    auth_backend,
+    get_jwt_refresh_strategy,
+    get_jwt_strategy,
+    get_user_manager,
+)
+from app.db.db import get_session
+from app.db.redis import get_redis
+from app.ref_code_manager import get_ref_code_manager
+
+ROUTES = {
+    "baseline": [],
+    "user_manager": [get_user_manager],
+    "ref_code_manager": [get_ref_code_manager],
+    "auth_strategy": [auth_backend.get_strategy],
+    "token_strategies": [get_jwt_strategy, get_jwt_refresh_strategy],
+}
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+    for name, dependencies in ROUTES.items():
+
+        async def endpoint() -> None:
+            return None
+
+        app.add_api_route(
+            f"/{name}",
+            endpoint,
+            dependencies=[Depends(dependency) for dependency in dependencies],
+        )
+
+    redis = Redis()
+
+    async def get_session_override():
+        yield None
+
+    async def get_redis_override() -> Redis:
+        return redis
+
+    app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_redis] = get_redis_override
+    return app
+
+
+async def call(app: FastAPI, path: str) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 5000),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message
+
+    await app(scope, receive, send)
+
+
+async def measure(app: FastAPI, path: str, iterations: int) -> float:
+    """Median time of a call, in batches to keep the timer out of it."""
+    batch = 100
+    durations = []
+    for _ in range(max(iterations // batch, 1)):
+        started = time.perf_counter()
+        for _ in range(batch):
+            await call(app, path)
+        durations.append((time.perf_counter() - started) / batch)
+    return statistics.median(durations)
+
+
+async def main(iterations: int) -> None:
+    app = create_app()
+    results = {}
+    for name in ROUTES:
+        # Warm up
+        await measure(app, f"/{name}", iterations // 10)
+        results[name] = await measure(app, f"/{name}", iterations)
+
+    baseline = results["baseline"]
+    print(f"{'route':<18} {'per call':>10} {'overhead':>10}")
+    for name, duration in results.items():
+        print(
+            f"{name:<18} {duration * 1e6:7.1f} us"
+            f" {(duration - baseline) * 1e6:7.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
@@ -0,0 +1,135 @@
+"""Import time of the application, with a budget for CI.
+
+Imports the module in fresh interpreters under ``-X importtime`` and
+reports the median wall time and the slowest imports. The budget is
+relative, so it holds on any machine: the module may take at most
+``--max-ratio`` times as long as ``--reference``, the dependencies it
+can't avoid importing, measured in the same run. Exits with status 1 when
+the module is over the budget or ``--max-seconds``, if given.
+
+    python -m benchmarks.import_time --runs 5 --max-ratio 1.6
+
+CI runs it through the manual ``import-time`` pre-commit hook:
+
+    pre-commit run import-time --hook-stage manual
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# fastapi-users brings in FastAPI, pydantic, SQLAlchemy and PyJWT, which the
+# application can't do without
+REFERENCE_MODULE = "fastapi_users"
+# The application measures 1.2-1.4x the reference, the rest is for noise
+MAX_RATIO = 1.6
+
+SNIPPET = (
+    "import time; started = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - started)"
+)
+
+
+def run(module: str) -> tuple[float, dict[str, tuple[int, int]]]:
+    """Wall time of one import and the self/cumulative microseconds of modules."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SNIPPET.format(module=module)],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    imports = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        if self_us.strip().isdigit():
+            imports[name.strip()] = (int(self_us), int(cumulative_us))
+    return float(result.stdout.strip().splitlines()[-1]), imports
+
+
+def main(
+    module: str,
+    runs: int,
+    top: int,
+    reference: str | None = REFERENCE_MODULE,
+    max_ratio: float | None = MAX_RATIO,
+    max_seconds: float | None = None,
+) -> int:
+    durations, reference_durations = [], []
+    samples: dict[str, list[tuple[int, int]]] = {}
+    for _ in range(runs):
+        # Interleaved, so that load on the machine affects both alike
+        if reference:
+            reference_durations.append(run(reference)[0])
+        duration, imports = run(module)
+        durations.append(duration)
+        for name, times in imports.items():
+            samples.setdefault(name, []).append(times)
+
+    median = statistics.median(durations)
+    print(f"import {module}: median {median * 1000:.0f} ms over {runs} runs")
+    if reference:
+        reference_median = statistics.median(reference_durations)
+        ratio = median / reference_median
+        print(
+            f"import {reference}: median {reference_median * 1000:.0f} ms, "
+            f"{module} takes {ratio:.2f}x as long"
+        )
+    print(f"{'self ms':>9} {'cumulative ms':>14}  module")
+    slowest = sorted(
+        samples.items(),
+        key=lambda item: statistics.median(times[0] for times in item[1]),
+        reverse=True,
+    )
+    for name, times in slowest[:top]:
+        self_ms = statistics.median(t[0] for t in times) / 1000
+        cumulative_ms = statistics.median(t[1] for t in times) / 1000
+        print(f"{self_ms:9.1f} {cumulative_ms:14.1f}  {name}")
+
+    failed = False
+    if reference and max_ratio and ratio > max_ratio:
+        print(f"Over the budget of {max_ratio:.2f}x {reference}", file=sys.stderr)
+        failed = True
+    if max_seconds and median > max_seconds:
+        print(f"Over the budget of {max_seconds * 1000:.0f} ms", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app.application")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20, help="slowest imports shown")
+    parser.add_argument(
+        "--reference",
+        default=REFERENCE_MODULE,
+        help="module the budget is relative to, empty to disable",
+    )
+    parser.add_argument(
+        "--max-ratio",
+        type=float,
+        default=MAX_RATIO,
+        help="fail when the import takes longer than this times the reference",
+    )
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=None,
+        help="fail when the median import time is above this",
+    )
+    args = parser.parse_args()
+    sys.exit(
+        main(
+            args.module,
+            args.runs,
+            args.top,
+            args.reference,
+            args.max_ratio,
+            args.max_seconds,
+        )
+    )
@@ -0,0 +1,182 @@
+"""End-to-end load test of the application against local stores.
+
+Spawns ``python -m app.server`` against a throwaway in-memory redis-server
+and a freshly seeded database, runs each scenario for ``--duration``
+seconds with ``--concurrency`` virtual users, and writes the throughput
+and latency percentiles by request to a JSON report. ``--compare`` prints
+the change from an earlier report, e.g. of another commit.
+
+    python -m benchmarks.load --duration 20 --output load.json
+    python -m benchmarks.load --compare main.json --output load.json
+
+The database tables are dropped, ``--db-url`` defaults to a sqlite file.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from .scenarios import SCENARIOS, Recorder, VirtualUser, create_code, login
+from .stack import StackConfig, local_stack
+
+
+async def prepare_users(client: httpx.AsyncClient, count: int) -> list[VirtualUser]:
+    """Log the seeded users in and give each of them a referral code."""
+    users = [VirtualUser(f"load-user{i}@email.com") for i in range(count)]
+    recorder = Recorder()
+    for user in users:
+        await login(client, user, recorder)
+        await create_code(client, user, recorder)
+    if recorder.errors:
+        sys.exit(f"Failed to prepare the users: {dict(recorder.errors)}")
+    return users
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, scenario, users: list[VirtualUser], duration: float
+) -> tuple[Recorder, float]:
+    recorder = Recorder()
+    started = time.perf_counter()
+    deadline = started + duration
+
+    async def virtual_user(user: VirtualUser) -> None:
+        while time.perf_counter() < deadline:
+            await scenario(client, user, recorder)
+
+    await asyncio.gather(*(virtual_user(user) for user in users))
+    return recorder, time.perf_counter() - started
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict[str, dict]:
+    results = {}
+    for name, latencies in recorder.latencies.items():
+        if len(latencies) > 1:
+            quantiles = statistics.quantiles(latencies, n=100)
+            p50, p95, p99 = quantiles[49], quantiles[94], quantiles[98]
+        else:
+            p50 = p95 = p99 = latencies[0]
+        results[name] = {
+            "requests": len(latencies),
+            "errors": recorder.errors.get(name, 0),
+            "rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(p50 * 1000, 3),
+            "p95_ms": round(p95 * 1000, 3),
+            "p99_ms": round(p99 * 1000, 3),
+        }
+    return results
+
+
+def commit() -> str | None:
+    result = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True
+    )
+    return result.stdout.strip() or None
+
+
+def print_results(results: dict[str, dict], previous: dict[str, dict]) -> None:
+    print(
+        f"{'request':<20} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+        f" {'errors':>7}"
+    )
+    for name, result in results.items():
+        line = (
+            f"{name:<20} {result['rps']:9.1f} {result['p50_ms']:9.2f}"
+            f" {result['p95_ms']:9.2f} {result['p99_ms']:9.2f} {result['errors']:7}"
+        )
+        if name in previous:
+            before = previous[name]
+            line += (
+                f"  rps {change(before['rps'], result['rps'])}"
+                f" p95 {change(before['p95_ms'], result['p95_ms'])}"
+            )
+        print(line)
+
+
+def change(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+async def load_test(base_url: str, args: argparse.Namespace) -> dict[str, dict]:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        users = await prepare_users(client, args.concurrency)
+        results = {}
+        for name in args.scenarios:
+            # Warm up
+            await run_scenario(client, SCENARIOS[name], users, args.duration / 10)
+            recorder, elapsed = await run_scenario(
+                client, SCENARIOS[name], users, args.duration
+            )
+            results.update(summarize(recorder, elapsed))
+    return results
+
+
+def main(args: argparse.Namespace) -> None:
+    config = StackConfig(
+        db_url=args.db_url,
+        redis_url=args.redis_url,
+        redis_server=args.redis_server,
+        workers=args.workers,
+        users=args.concurrency,
+        server_log=args.server_log,
+    )
+    with local_stack(config) as base_url:
+        results = asyncio.run(load_test(base_url, args))
+
+    previous = {}
+    if args.compare is not None:
+        with open(args.compare) as file:
+            previous = json.load(file)["results"]
+    print_results(results, previous)
+
+    report = {
+        "commit": commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "duration": args.duration,
+        "concurrency": args.concurrency,
+        "workers": args.workers,
+        "db": args.db_url.split(":", 1)[0],
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        choices=list(SCENARIOS),
+        default=list(SCENARIOS),
+    )
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument(
+        "--db-url",
+        default="sqlite+aiosqlite:///load_test.db",
+        help="database to load, all of its tables are dropped",
+    )
+    parser.add_argument(
+        "--redis-url",
+        default=None,
+        help="Redis to use instead of spawning a throwaway in-memory one",
+    )
+    parser.add_argument("--redis-server", default="redis-server")
+    parser.add_argument("--server-log", default="load_test_server.log")
+    parser.add_argument("--output", default="load_test.json")
+    parser.add_argument("--compare", default=None, help="earlier report")
+    main(parser.parse_args())
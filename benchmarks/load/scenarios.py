@@ -0,0 +1,190 @@
+"""Scenarios of the load test, each a loop body of a virtual user."""
+
+import itertools
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from http.cookies import SimpleCookie
+from typing import Awaitable, Callable
+
+import httpx
+
+from .stack import PASSWORD
+
+API = "/api/v1"
+
+
+class Recorder:
+    """Latencies and errors by request name."""
+
+    def __init__(self):
+        self.latencies: defaultdict[str, list[float]] = defaultdict(list)
+        self.errors: defaultdict[str, int] = defaultdict(int)
+
+    async def request(
+        self,
+        client: httpx.AsyncClient,
+        name: str,
+        expected_status: int,
+        method: str,
+        url: str,
+        **kwargs,
+    ) -> httpx.Response | None:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.TransportError:
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - started)
+        if response.status_code != expected_status:
+            self.errors[name] += 1
+        return response
+
+
+@dataclass
+class VirtualUser:
+    """A seeded, verified user and the tokens of its login."""
+
+    email: str
+    access_token: str = ""
+    refresh_token: str = ""
+    # Registrations with a code refer new users to this one
+    referral_code: str | None = None
+    emails: itertools.count = field(default_factory=itertools.count)
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {"Authorization": f"Bearer {self.access_token}"}
+
+    def new_email(self) -> str:
+        """Unique email of a registration, per run of the load test."""
+        return f"load-{time.time_ns()}-{next(self.emails)}-{self.email}"
+
+
+async def login(
+    client: httpx.AsyncClient, user: VirtualUser, recorder: Recorder
+) -> None:
+    response = await recorder.request(
+        client,
+        "login",
+        200,
+        "POST",
+        f"{API}/auth/login",
+        data={"username": user.email, "password": PASSWORD},
+    )
+    if response is not None and response.status_code == 200:
+        user.access_token = response.json()["access_token"]
+        # The cookie is for COOKIE_DOMAIN, it's read from the header instead
+        cookie = SimpleCookie(response.headers.get("set-cookie", ""))
+        user.refresh_token = cookie["refresh_token"].value
+
+
+def registration(user: VirtualUser, referral_code: str | None = None) -> dict:
+    data = {
+        "user_create": {
+            "email": user.new_email(),
+            "password": PASSWORD,
+            "name": "Load",
+            "surname": "User",
+        }
+    }
+    if referral_code is not None:
+        data["referral_code"] = referral_code
+    return data
+
+
+async def register(
+    client: httpx.AsyncClient, user: VirtualUser, recorder: Recorder
+) -> None:
+    await recorder.request(
+        client, "register", 201, "POST", f"{API}/auth/register", json=registration(user)
+    )
+
+
+async def register_with_code(
+    client: httpx.AsyncClient, user: VirtualUser, recorder: Recorder
+) -> None:
+    await recorder.request(
+        client,
+        "register_with_code",
+        201,
+        "POST",
+        f"{API}/auth/register",
+        json=registration(user, user.referral_code),
+    )
+
+
+async def refresh(
+    client: httpx.AsyncClient, user: VirtualUser, recorder: Recorder
+) -> None:
+    await recorder.request(
+        client,
+        "refresh",
+        200,
+        "POST",
+        f"{API}/auth/refresh",
+        headers={"Cookie": f"refresh_token={user.refresh_token}"},
+    )
+
+
+async def users_me(
+    client: httpx.AsyncClient, user: VirtualUser, recorder: Recorder
+) -> None:
+    await recorder.request(
+        client, "users_me", 200, "GET", f"{API}/users/me", headers=user.headers
+    )
+
+
+async def create_code(
+    client: httpx.AsyncClient, user: VirtualUser, recorder: Recorder
+) -> None:
+    response = await recorder.request(
+        client,
+        "code_create",
+        200,
+        "POST",
+        f"{API}/users/me/referral_code",
+        json={"expires_in_seconds": 3600},
+        headers=user.headers,
+    )
+    if response is not None and response.status_code == 200:
+        user.referral_code = response.json()["referral_code"]
+
+
+async def referral_code(
+    client: httpx.AsyncClient, user: VirtualUser, recorder: Recorder
+) -> None:
+    # Users start with a code, which is replaced rather than left missing
+    url = f"{API}/users/me/referral_code"
+    await recorder.request(
+        client, "code_delete", 204, "DELETE", url, headers=user.headers
+    )
+    await create_code(client, user, recorder)
+    await recorder.request(client, "code_read", 200, "GET", url, headers=user.headers)
+
+
+async def referrals(
+    client: httpx.AsyncClient, user: VirtualUser, recorder: Recorder
+) -> None:
+    await recorder.request(
+        client,
+        "referrals",
+        200,
+        "GET",
+        f"{API}/users/me/referrals",
+        headers=user.headers,
+    )
+
+
+Scenario = Callable[[httpx.AsyncClient, VirtualUser, Recorder], Awaitable[None]]
+
+SCENARIOS: dict[str, Scenario] = {
+    "register": register,
+    "register_with_code": register_with_code,
+    "login": login,
+    "refresh": refresh,
+    "users_me": users_me,
+    "referral_code": referral_code,
+    "referrals": referrals,
+}
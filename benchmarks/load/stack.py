@@ -0,0 +1,148 @@
+"""The application and its stores, spawned locally for a load test."""
+
+import asyncio
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import httpx
+from fastapi_users.password import PasswordHelper
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.models.base import Base
+from app.db.models.oauth_account import OAuthAccount  # noqa: F401
+from app.db.models.pending_referral import PendingReferral  # noqa: F401
+from app.db.models.referral_code_stats import ReferralCodeStats  # noqa: F401
+from app.db.models.user import User
+
+PASSWORD = "load-password"
+
+
+@dataclass
+class StackConfig:
+    db_url: str
+    # Spawns an in-memory redis-server when not set
+    redis_url: str | None
+    redis_server: str
+    workers: int
+    users: int
+    server_log: str
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def prepare_database(db_url: str, users: int) -> None:
+    """Recreate the tables and seed verified users, all sharing a password."""
+    engine = create_async_engine(db_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    # Hashing is slow, the users share the hash
+    hashed_password = PasswordHelper().hash(PASSWORD)
+    async with async_sessionmaker(engine)() as session:
+        session.add_all(
+            User(
+                email=f"load-user{i}@email.com",
+                hashed_password=hashed_password,
+                name="Load",
+                surname="User",
+                is_verified=True,
+            )
+            for i in range(users)
+        )
+        await session.commit()
+    await engine.dispose()
+
+
+@contextmanager
+def redis_server(binary: str):
+    """A redis-server keeping everything in memory, on a free port."""
+    path = shutil.which(binary)
+    if path is None:
+        sys.exit(f"{binary} not found, install Redis or pass --redis-url")
+    port = free_port()
+    process = subprocess.Popen(
+        [path, "--port", str(port), "--save", "", "--appendonly", "no"],
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        yield f"redis://127.0.0.1:{port}/0"
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def wait_ready(base_url: str, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            sys.exit("The application exited on startup, see its log")
+        try:
+            if httpx.get(f"{base_url}/api/ready").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    sys.exit(f"The application wasn't ready in {timeout} seconds")
+
+
+@contextmanager
+def app_server(config: StackConfig, redis_url: str):
+    """``python -m app.server`` with limits off, yields its base URL."""
+    port = free_port()
+    env = {
+        **os.environ,
+        "DB_URL": config.db_url,
+        "REDIS_URL": redis_url,
+        "SERVER_HOST": "127.0.0.1",
+        "SERVER_PORT": str(port),
+        "SERVER_WORKERS": str(config.workers),
+        "SERVER_DRAIN_DELAY": "0",
+        # Measure the application, not the protections against the load test
+        "RATE_LIMIT_ENABLED": "false",
+        "LOAD_SHEDDING_ENABLED": "false",
+        # Emails and other jobs stay queued
+        "JOBS_WORKERS": "0",
+    }
+    with open(config.server_log, "w") as log:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "app.server"],
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            wait_ready(base_url, process, timeout=60)
+            yield base_url
+        finally:
+            process.send_signal(signal.SIGTERM)
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+
+@contextmanager
+def local_stack(config: StackConfig):
+    """Seeded stores and the application serving them, yields its base URL."""
+    asyncio.run(prepare_database(config.db_url, config.users))
+    if config.redis_url is not None:
+        with app_server(config, config.redis_url) as base_url:
+            yield base_url
+        return
+    with redis_server(config.redis_server) as redis_url:
+        with app_server(config, redis_url) as base_url:
+            yield base_url
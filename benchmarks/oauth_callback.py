@@ -0,0 +1,110 @@
+"""Database time of the OAuth callback for an already linked account.
+
+Seeds users with linked OAuth accounts, then times the account lookup and
+token update the callback performs, with the upstream lookup and with
+``MySQLAlchemyUserDatabase.get_by_oauth_account``.
+
+    python -m benchmarks.oauth_callback --db-url postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from fastapi_users.db import SQLAlchemyUserDatabase
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.auth.user_db import MySQLAlchemyUserDatabase
+from app.db.models.base import Base
+from app.db.models.oauth_account import OAuthAccount
+from app.db.models.user import User
+
+
+async def seed(session_maker: async_sessionmaker, users: int) -> None:
+    async with session_maker() as session:
+        for i in range(users):
+            user = User(
+                email=f"oauth{i}@email.com",
+                hashed_password="x",
+                name="Name",
+                surname="Surname",
+            )
+            user.oauth_accounts.append(
+                OAuthAccount(
+                    oauth_name=random.choice(("google", "github")),
+                    access_token="token",
+                    account_id=str(i),
+                    account_email=f"oauth{i}@email.com",
+                )
+            )
+            session.add(user)
+        await session.commit()
+
+
+async def callback(user_db: MySQLAlchemyUserDatabase, account_id: str, lookup) -> None:
+    user = await lookup(user_db, "google", account_id) or await lookup(
+        user_db, "github", account_id
+    )
+    await user_db.update_oauth_account(
+        user, user.oauth_accounts[0], {"access_token": f"token-{time.time_ns()}"}
+    )
+
+
+async def measure(
+    session_maker: async_sessionmaker, users: int, iterations: int, lookup
+) -> list[float]:
+    durations = []
+    for _ in range(iterations):
+        account_id = str(random.randrange(users))
+        async with session_maker() as session:
+            user_db = MySQLAlchemyUserDatabase(session, User, OAuthAccount)
+            started = time.perf_counter()
+            await callback(user_db, account_id, lookup)
+            durations.append(time.perf_counter() - started)
+    return durations
+
+
+def report(name: str, durations: list[float]) -> None:
+    quantiles = statistics.quantiles(durations, n=100)
+    print(
+        f"{name:<10} p50 {quantiles[49] * 1000:7.3f} ms"
+        f"  p95 {quantiles[94] * 1000:7.3f} ms"
+        f"  p99 {quantiles[98] * 1000:7.3f} ms"
+    )
+
+
+async def main(db_url: str, users: int, iterations: int) -> None:
+    engine = create_async_engine(db_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    await seed(session_maker, users)
+    lookups = {
+        "upstream": SQLAlchemyUserDatabase.get_by_oauth_account,
+        "optimized": MySQLAlchemyUserDatabase.get_by_oauth_account,
+    }
+    for name, lookup in lookups.items():
+        # Warm up connections and statement caches
+        await measure(session_maker, users, iterations // 10 or 1, lookup)
+        report(name, await measure(session_maker, users, iterations, lookup))
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--db-url",
+        default="sqlite+aiosqlite:///oauth_benchmark.db",
+        help="database to benchmark against, all of its tables are dropped",
+    )
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--iterations", type=int, default=1_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.db_url, args.users, args.iterations))